@@ -0,0 +1,99 @@
+import threading
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.question_cache import questions_version, questions_version_async
+
+class AnswerKey:
+    """
+    Per-worker map of question_number -> correct option letters, per event.
+
+    Lets submit_quiz grade a whole submission in memory instead of looking
+    up each question. Each copy is tagged with the event's questions_version
+    and rebuilt when a caller brings a newer one, so an upload takes effect
+    on every worker with its next submission. submit_quiz reads the version
+    along with the participant, so grading itself needs no query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # event_id -> (key, questions_version)
+
+    def get(self, db: Session, event_id: int, version: int = None):
+        """
+        Return the event's answer key for questions_version `version`
+        (read from the database when not given), loading it if the cache
+        is empty or stale
+        """
+        if version is None:
+            version = questions_version(db, event_id)
+        key = self._current_key(event_id, version)
+        if key is None:
+            with self._lock:
+                key = self._current_key(event_id, version)
+                if key is None:
+                    key = self._load(db, event_id)
+                    self._entries[event_id] = key, version
+        return key
+
+    async def get_async(self, db: AsyncSession, event_id: int, version: int = None):
+        """Same as get() for the async stack (lock-free, like QuestionCache.get_async)"""
+        if version is None:
+            version = await questions_version_async(db, event_id)
+        key = self._current_key(event_id, version)
+        if key is None:
+            key = await db.run_sync(self._load, event_id)
+            self._entries[event_id] = key, version
+        return key
+
+    def invalidate(self, event_id: int = None):
+        """Drop the event's cached key (every event's without one) so the next submission reloads it"""
+        if event_id is None:
+            self._entries = {}
+        else:
+            self._entries.pop(event_id, None)
+
+    def grade(self, db: Session, event_id: int, responses: list, version: int = None):
+        """
+        Grade submitted answers against the event's key.
+
+        Returns a list of is_correct values aligned with `responses`, with
+        None for answers to questions that don't exist.
+        """
+        return self._grade(self.get(db, event_id, version), responses)
+
+    async def grade_async(self, db: AsyncSession, event_id: int, responses: list, version: int = None):
+        return self._grade(await self.get_async(db, event_id, version), responses)
+
+    def _grade(self, key: dict, responses: list):
+        return [
+            None if r.question_number not in key
+            else r.selected_answer is not None and r.selected_answer in key[r.question_number]
+            for r in responses
+        ]
+
+    def _current_key(self, event_id: int, version: int):
+        entry = self._entries.get(event_id)
+        if entry is None or entry[1] != version:
+            return None
+        return entry[0]
+
+    def _load(self, db: Session, event_id: int):
+        # Read after the version, so at worst this is a newer key under an
+        # older version, which the next submission replaces
+        questions = db.query(
+            models.Question.question_number,
+            models.Question.option1_is_correct,
+            models.Question.option2_is_correct,
+            models.Question.option3_is_correct,
+            models.Question.option4_is_correct
+        ).filter(models.Question.event_id == event_id).all()
+
+        return {
+            q.question_number: frozenset(
+                letter for letter, is_correct in zip("ABCD", q[1:]) if is_correct
+            )
+            for q in questions
+        }
+
+answer_key = AnswerKey()
@@ -0,0 +1,70 @@
+"""
+Async counterparts of the app.crud functions used on the hot endpoints.
+
+Simple lookups and inserts are written natively against AsyncSession. The
+submission write reuses the sync implementation through run_sync, which
+runs it on the async connection without blocking the event loop.
+"""
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, models, schemas
+
+async def create_participant(db: AsyncSession, event_id: int, participant: schemas.ParticipantCreate):
+    """Create a new participant of an event in a single INSERT ... RETURNING (see crud.create_participant)"""
+    try:
+        result = await db.execute(
+            insert(models.Participant).values(
+                event_id=event_id,
+                full_name=participant.full_name,
+                contact_number=participant.contact_number,
+                email=participant.email,
+                school_college=participant.school_college,
+                application_number=participant.application_number
+            ).returning(models.Participant.id)
+        )
+        participant_id = result.scalar_one()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return participant_id
+
+async def get_participant_with_receipt(db: AsyncSession, participant_id: int):
+    """
+    Get (participant, submission receipt or None, their event's
+    questions_version, their stored question set or None) in one query, or
+    None if there's no such participant
+    """
+    result = await db.execute(
+        select(
+            models.Participant, models.SubmissionReceipt, models.Event.questions_version, models.QuestionSet
+        ).join(
+            models.Event,
+            models.Participant.event_id == models.Event.id
+        ).outerjoin(
+            models.SubmissionReceipt,
+            models.Participant.id == models.SubmissionReceipt.participant_id
+        ).outerjoin(
+            models.QuestionSet,
+            models.Participant.id == models.QuestionSet.participant_id
+        ).where(models.Participant.id == participant_id)
+    )
+    return result.first()
+
+async def get_submission_receipt(db: AsyncSession, participant_id: int):
+    """Get the stored result of a participant's quiz submission"""
+    result = await db.execute(
+        select(models.SubmissionReceipt).where(models.SubmissionReceipt.participant_id == participant_id)
+    )
+    return result.scalars().first()
+
+async def get_all_questions(db: AsyncSession, event_id: int):
+    """Get all of an event's questions ordered by question_number"""
+    result = await db.execute(
+        select(models.Question).where(models.Question.event_id == event_id).order_by(models.Question.question_number)
+    )
+    return result.scalars().all()
+
+async def save_quiz_submissions(db: AsyncSession, submissions: list):
+    """Store graded submissions and update the leaderboard in one transaction"""
+    return await db.run_sync(crud.save_quiz_submissions, submissions)
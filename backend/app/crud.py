@@ -1,52 +1,264 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import Integer
 from app import models, schemas
+from app.pagination import Cursor, keyset_after
+from app.question_cache import question_cache
+from app.answer_key import answer_key
+from app.question_analytics import question_analytics
+from app.question_bank import QUIZ_MODE, QUESTION_SET_SIZE, question_bank
+from app.rank_index import rank_index
+from app.leaderboard_feed import leaderboard_feed
+from app.events import event_directory
+from app.metrics import submit_phase
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
+import os
+from typing import Optional
 
-def create_participant(db: Session, participant: schemas.ParticipantCreate):
-    """Create a new participant"""
-    db_participant = models.Participant(
-        full_name=participant.full_name,
-        contact_number=participant.contact_number,
-        email=participant.email,
-        school_college=participant.school_college,
-        application_number=participant.application_number
+# "incremental" updates only the submitting participant's leaderboard row,
+# "full" rebuilds the whole leaderboard on every submission
+LEADERBOARD_MODE = os.getenv("LEADERBOARD_MODE", "incremental")
+
+def create_participant(db: Session, event_id: int, participant: schemas.ParticipantCreate):
+    """
+    Create a new participant of an event in a single INSERT ... RETURNING.
+    
+    Duplicates within the event are rejected by the unique indexes on
+    (event_id, lower(email)) and (event_id, application_number) rather than
+    by lookups first, so concurrent registrations can't race. Raises
+    IntegrityError on a duplicate; use get_conflicting_field to tell which one.
+    """
+    from sqlalchemy import insert
+    
+    try:
+        participant_id = db.execute(
+            insert(models.Participant).values(
+                event_id=event_id,
+                full_name=participant.full_name,
+                contact_number=participant.contact_number,
+                email=participant.email,
+                school_college=participant.school_college,
+                application_number=participant.application_number
+            ).returning(models.Participant.id)
+        ).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return participant_id
+
+def get_conflicting_field(error: IntegrityError):
+    """Map a unique violation on participants to "email" or "application_number" (or None)"""
+    # psycopg2 exposes the constraint name; other drivers include it in the message
+    diag = getattr(error.orig, "diag", None)
+    constraint = getattr(diag, "constraint_name", None) or str(error.orig)
+    for field in ("application_number", "email"):
+        if field in constraint:
+            return field
+    return None
+
+def get_participant_by_email(db: Session, event_id: int, email: str):
+    """Get an event's participant by email (case-insensitive)"""
+    from sqlalchemy import func
+    
+    return db.query(models.Participant).filter(
+        models.Participant.event_id == event_id,
+        func.lower(models.Participant.email) == email.lower()
+    ).first()
+
+def get_participant_by_application_number(db: Session, event_id: int, application_number: str):
+    """Get an event's participant by application number"""
+    return db.query(models.Participant).filter(
+        models.Participant.event_id == event_id,
+        models.Participant.application_number == application_number
+    ).first()
+
+def get_all_questions(db: Session, event_id: int):
+    """Get all of an event's questions ordered by question_number"""
+    return db.query(models.Question).filter(
+        models.Question.event_id == event_id
+    ).order_by(models.Question.question_number).all()
+
+def get_question_by_number(db: Session, event_id: int, question_number: int):
+    """Get a specific question of an event by its number"""
+    return db.query(models.Question).filter(
+        models.Question.event_id == event_id,
+        models.Question.question_number == question_number
+    ).first()
+
+def create_quiz_responses(db: Session, answers: list):
+    """
+    Insert quiz responses in a single multi-row INSERT.
+    
+    `answers` are dicts with event_id, participant_id, question_number,
+    selected_answer, time_taken and is_correct. Nothing is committed, so the caller can write
+    the leaderboard in the same transaction.
+    """
+    from sqlalchemy import insert
+    
+    if not answers:
+        return 0
+    
+    db.execute(insert(models.QuizResponse), answers)
+    return len(answers)
+
+def set_leaderboard_total_time(db: Session, participant_id: int, event_id: int, total_time: int):
+    """Record the exact overall time reported on submission (not committed)"""
+    leaderboard_entry = db.query(models.Leaderboard).filter(
+        models.Leaderboard.participant_id == participant_id
+    ).first()
+    if leaderboard_entry:
+        leaderboard_entry.total_time = total_time
+    else:
+        db.add(models.Leaderboard(participant_id=participant_id, event_id=event_id, total_time=total_time))
+    db.flush()
+
+def save_quiz_submissions(db: Session, submissions: list):
+    """
+    Store graded submissions and update the leaderboard in one transaction.
+    
+    Each submission is a dict with event_id, participant_id, total_time,
+    its graded answers and the receipt returned to the client. All answers
+    go into one INSERT and the whole batch is committed once, or rolled back
+    entirely on error. Resubmissions fail with IntegrityError on the unique
+    indexes. A batch may mix events; scores and ranks are updated per event.
+    """
+    from sqlalchemy import insert
+    
+    events = {}
+    for submission in submissions:
+        events.setdefault(submission["event_id"], []).append(submission["participant_id"])
+    
+    try:
+        with submit_phase("responses"):
+            create_quiz_responses(db, [
+                dict(answer, event_id=submission["event_id"], participant_id=submission["participant_id"])
+                for submission in submissions
+                for answer in submission["answers"]
+            ])
+            db.execute(insert(models.SubmissionReceipt), [
+                dict(submission["receipt"], participant_id=submission["participant_id"])
+                for submission in submissions
+            ])
+            
+            for event_id, participant_ids in events.items():
+                update_participant_scores(db, event_id, participant_ids)
+        
+        with submit_phase("leaderboard"):
+            if LEADERBOARD_MODE == "full":
+                for submission in submissions:
+                    set_leaderboard_total_time(
+                        db, submission["participant_id"], submission["event_id"], submission["total_time"]
+                    )
+                for event_id in events:
+                    _rebuild_leaderboard(db, event_id, rebuild_scores=False)
+                db.commit()
+                db.expire_all()
+            else:
+                for submission in submissions:
+                    update_participant_leaderboard(
+                        db, submission["participant_id"], submission["event_id"], submission["total_time"]
+                    )
+                db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    # Keep this worker's rank index in step with the committed leaderboard
+    for submission in submissions:
+        rank_index.update(
+            submission["participant_id"], submission["event_id"],
+            submission["receipt"]["score"], submission["total_time"]
+        )
+    for event_id in events:
+        leaderboard_feed.notify(event_id)
+        question_analytics.invalidate(event_id)
+    
+    return len(submissions)
+
+def questions_per_participant(db: Session, event_id: int):
+    """Questions each of the event's participants is asked: all of them, or their QUESTION_SET_SIZE draw in question-bank mode"""
+    from sqlalchemy import func
+    
+    total = db.query(func.count(models.Question.id)).filter(models.Question.event_id == event_id).scalar()
+    return min(total, QUESTION_SET_SIZE) if QUIZ_MODE == "bank" else total
+
+def update_participant_scores(db: Session, event_id: int, participant_ids: list = None):
+    """
+    Re-aggregate an event's participant_scores from its quiz_responses
+    (not committed).
+    
+    With participant_ids only those rows are upserted, using the
+    (event_id, participant_id, question_number) index; without, every row
+    of the event is rebuilt. On PostgreSQL only the event's partition is read.
+    """
+    from sqlalchemy import func, case, delete
+    
+    QuizResponse = models.QuizResponse
+    total_questions_count = questions_per_participant(db, event_id)
+    
+    aggregates = db.query(
+        QuizResponse.participant_id,
+        QuizResponse.event_id,
+        func.count(QuizResponse.id),
+        func.coalesce(func.sum(case((QuizResponse.is_correct == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(QuizResponse.time_taken), 0),
+        func.coalesce(func.avg(QuizResponse.time_taken), 0),
+        func.count(QuizResponse.id) >= total_questions_count
+    ).filter(
+        QuizResponse.event_id == event_id
+    ).group_by(QuizResponse.event_id, QuizResponse.participant_id)
+    
+    if participant_ids is None:
+        db.execute(delete(models.ParticipantScore).where(models.ParticipantScore.event_id == event_id))
+    else:
+        aggregates = aggregates.filter(QuizResponse.participant_id.in_(participant_ids))
+    
+    stmt = _insert(db, models.ParticipantScore).from_select(
+        ['participant_id', 'event_id', 'total_questions', 'total_marks', 'total_time_taken', 'avg_time', 'completed'],
+        aggregates
     )
-    db.add(db_participant)
-    db.commit()
-    db.refresh(db_participant)
-    return db_participant
-
-def get_participant_by_email(db: Session, email: str):
-    """Get participant by email"""
-    return db.query(models.Participant).filter(models.Participant.email == email).first()
-
-def get_participant_by_application_number(db: Session, application_number: str):
-    """Get participant by application number"""
-    return db.query(models.Participant).filter(models.Participant.application_number == application_number).first()
-
-def get_all_questions(db: Session):
-    """Get all questions ordered by question_number"""
-    return db.query(models.Question).order_by(models.Question.question_number).all()
-
-def get_question_by_number(db: Session, question_number: int):
-    """Get a specific question by its number"""
-    return db.query(models.Question).filter(models.Question.question_number == question_number).first()
-
-def create_quiz_response(db: Session, participant_id: int, question_number: int, 
-                         selected_answer: str, time_taken: int, is_correct: bool):
-    """Create a quiz response"""
-    db_response = models.QuizResponse(
-        participant_id=participant_id,
-        question_number=question_number,
-        selected_answer=selected_answer,
-        time_taken=time_taken,
-        is_correct=is_correct
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['participant_id'],
+        set_={
+            'total_questions': stmt.excluded.total_questions,
+            'total_marks': stmt.excluded.total_marks,
+            'total_time_taken': stmt.excluded.total_time_taken,
+            'avg_time': stmt.excluded.avg_time,
+            'completed': stmt.excluded.completed,
+            'updated_at': func.now(),
+        }
     )
-    db.add(db_response)
-    db.commit()
-    db.refresh(db_response)
-    return db_response
+    db.execute(stmt)
+
+def get_participant_with_receipt(db: Session, participant_id: int):
+    """
+    Get (participant, submission receipt or None, their event's
+    questions_version, their stored question set or None) in one query, or
+    None if there's no such participant
+    """
+    return db.query(
+        models.Participant,
+        models.SubmissionReceipt,
+        models.Event.questions_version,
+        models.QuestionSet
+    ).join(
+        models.Event,
+        models.Participant.event_id == models.Event.id
+    ).outerjoin(
+        models.SubmissionReceipt,
+        models.Participant.id == models.SubmissionReceipt.participant_id
+    ).outerjoin(
+        models.QuestionSet,
+        models.Participant.id == models.QuestionSet.participant_id
+    ).filter(
+        models.Participant.id == participant_id
+    ).first()
+
+def get_submission_receipt(db: Session, participant_id: int):
+    """Get the stored result of a participant's quiz submission"""
+    return db.query(models.SubmissionReceipt).filter(
+        models.SubmissionReceipt.participant_id == participant_id
+    ).first()
 
 def get_participant_responses(db: Session, participant_id: int):
     """Get all responses for a participant"""
@@ -54,246 +266,563 @@ def get_participant_responses(db: Session, participant_id: int):
         models.QuizResponse.participant_id == participant_id
     ).all()
 
-def get_all_participant_statistics(db: Session):
-    """Get statistics for all participants including total marks and average response time"""
-    from sqlalchemy import func
-    
-    # Query to get participant info with their statistics
+def get_all_participant_statistics(db: Session, event_id: int):
+    """Get statistics for all of an event's participants including total marks and average response time"""
+    # Read from the participant_scores summary instead of aggregating responses
     results = db.query(
         models.Participant.id,
         models.Participant.full_name,
         models.Participant.email,
         models.Participant.school_college,
         models.Participant.application_number,
-        func.count(models.QuizResponse.id).label('total_questions'),
-        func.sum(models.QuizResponse.is_correct.cast(Integer)).label('total_marks'),
-        func.avg(models.QuizResponse.time_taken).label('avg_time')
+        models.ParticipantScore.total_questions,
+        models.ParticipantScore.total_marks,
+        models.ParticipantScore.avg_time
     ).outerjoin(
-        models.QuizResponse, 
-        models.Participant.id == models.QuizResponse.participant_id
-    ).group_by(
-        models.Participant.id,
-        models.Participant.full_name,
-        models.Participant.email,
-        models.Participant.school_college,
-        models.Participant.application_number
+        models.ParticipantScore,
+        models.Participant.id == models.ParticipantScore.participant_id
+    ).filter(
+        models.Participant.event_id == event_id
     ).all()
     
     return results
 
 # ============= ADMIN CRUD FUNCTIONS =============
 
-def bulk_create_questions(db: Session, questions: list):
-    """Bulk create or update questions"""
-    from sqlalchemy import func
+# Questions written per INSERT ... ON CONFLICT statement (10 bound values
+# each, well inside SQLite's and PostgreSQL's parameter limits)
+QUESTION_UPSERT_BATCH_SIZE = 1000
+
+QUESTION_FIELDS = [
+    "text",
+    "option1_text", "option1_is_correct",
+    "option2_text", "option2_is_correct",
+    "option3_text", "option3_is_correct",
+    "option4_text", "option4_is_correct",
+]
+
+def bulk_create_questions(db: Session, event_id: int, questions: list):
+    """
+    Bulk create or update an event's questions (by question_number) in one transaction.
     
+    Written QUESTION_UPSERT_BATCH_SIZE at a time with upsert_questions();
+    returns the added/updated counts and the event's new total.
+    """
     added_count = 0
     updated_count = 0
     
-    for q in questions:
-        existing = db.query(models.Question).filter(
-            models.Question.question_number == q.question_number
-        ).first()
-        
-        if existing:
-            # Update existing question
-            existing.text = q.text
-            existing.option1_text = q.option1_text
-            existing.option1_is_correct = q.option1_is_correct
-            existing.option2_text = q.option2_text
-            existing.option2_is_correct = q.option2_is_correct
-            existing.option3_text = q.option3_text
-            existing.option3_is_correct = q.option3_is_correct
-            existing.option4_text = q.option4_text
-            existing.option4_is_correct = q.option4_is_correct
-            updated_count += 1
-        else:
-            # Create new question
-            new_question = models.Question(
-                question_number=q.question_number,
-                text=q.text,
-                option1_text=q.option1_text,
-                option1_is_correct=q.option1_is_correct,
-                option2_text=q.option2_text,
-                option2_is_correct=q.option2_is_correct,
-                option3_text=q.option3_text,
-                option3_is_correct=q.option3_is_correct,
-                option4_text=q.option4_text,
-                option4_is_correct=q.option4_is_correct
-            )
-            db.add(new_question)
-            added_count += 1
+    try:
+        for start in range(0, len(questions), QUESTION_UPSERT_BATCH_SIZE):
+            added, updated = upsert_questions(db, event_id, questions[start:start + QUESTION_UPSERT_BATCH_SIZE])
+            added_count += added
+            updated_count += updated
+    except Exception:
+        db.rollback()
+        raise
+    
+    return finish_question_upload(db, event_id, added_count, updated_count)
+
+def upsert_questions(db: Session, event_id: int, questions: list):
+    """
+    Write a batch of QuestionUpload items for an event with a single
+    INSERT ... ON CONFLICT (event_id, question_number) DO UPDATE (not committed).
+    
+    A question number repeated within the batch keeps its last version.
+    Returns (added, updated): on PostgreSQL straight from the statement
+    (RETURNING xmax = 0 marks inserted rows), elsewhere by looking up which
+    of the batch's numbers existed beforehand.
+    """
+    from sqlalchemy import func, literal_column
+    
+    rows = {
+        q.question_number: dict(
+            {field: getattr(q, field) for field in QUESTION_FIELDS},
+            event_id=event_id, question_number=q.question_number
+        )
+        for q in questions
+    }
+    if not rows:
+        return 0, 0
+    
+    # One cached statement run with the batch's parameters, which SQLAlchemy
+    # sends as multi-row VALUES ("insertmanyvalues")
+    stmt = _insert(db, models.Question.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["event_id", "question_number"],
+        set_={field: getattr(stmt.excluded, field) for field in QUESTION_FIELDS}
+    )
+    
+    if db.get_bind().dialect.name == "postgresql":
+        inserted = db.execute(stmt.returning(literal_column("xmax = 0")), list(rows.values())).scalars().all()
+        added = sum(1 for was_inserted in inserted if was_inserted)
+        return added, len(inserted) - added
+    
+    existing = db.query(func.count(models.Question.id)).filter(
+        models.Question.event_id == event_id,
+        models.Question.question_number.in_(list(rows))
+    ).scalar()
+    db.execute(stmt, list(rows.values()))
+    return len(rows) - existing, existing
+
+def finish_question_upload(db: Session, event_id: int, added: int, updated: int):
+    """
+    Commit an upload written with upsert_questions() and drop the event's
+    caches built from the questions.
+    
+    The event's questions_version is bumped in the same transaction, which
+    is how the other workers notice the upload.
+    """
+    from sqlalchemy import func
     
+    bump_questions_version(db, event_id)
     db.commit()
+    question_cache.invalidate(event_id)
+    answer_key.invalidate(event_id)
+    question_analytics.invalidate(event_id)
+    question_bank.invalidate(event_id)
     
-    total_questions = db.query(func.count(models.Question.id)).scalar()
+    total_questions = db.query(func.count(models.Question.id)).filter(models.Question.event_id == event_id).scalar()
     
     return {
-        "added": added_count,
-        "updated": updated_count,
+        "added": added,
+        "updated": updated,
         "total": total_questions
     }
 
-def refresh_leaderboard(db: Session):
-    """Recalculate and update leaderboard for all participants"""
-    from sqlalchemy import func, desc, case
+def bump_questions_version(db: Session, event_id: int):
+    """Mark the event's questions as changed for every worker's caches (not committed)"""
+    db.query(models.Event).filter(models.Event.id == event_id).update(
+        {models.Event.questions_version: models.Event.questions_version + 1}, synchronize_session=False
+    )
+
+# ============= EVENT CRUD FUNCTIONS =============
+
+def get_events(db: Session):
+    """All events, newest first"""
+    return db.query(models.Event).order_by(models.Event.id.desc()).all()
+
+def get_event(db: Session, event_id: int):
+    """Get an event by id"""
+    return db.query(models.Event).filter(models.Event.id == event_id).first()
+
+def create_event(db: Session, name: str, activate: bool = False):
+    """
+    Create an event, with its quiz_responses partition on PostgreSQL, and
+    make it the active one if `activate`.
+    """
+    try:
+        event = models.Event(name=name, is_active=False)
+        db.add(event)
+        db.flush()
+        create_response_partition(db.connection(), event.id)
+        if activate:
+            _set_active_event(db, event.id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    # Get all participants with their stats
-    participant_stats = db.query(
-        models.Participant.id,
-        func.count(models.QuizResponse.id).label('total_questions'),
-        func.sum(case((models.QuizResponse.is_correct == True, 1), else_=0)).label('total_marks'),
-        func.max(models.Leaderboard.total_time).label('total_time')  # Get the fixed total_time from leaderboard
-    ).outerjoin(
-        models.QuizResponse,
-        models.Participant.id == models.QuizResponse.participant_id
-    ).outerjoin(
-        models.Leaderboard,
-        models.Participant.id == models.Leaderboard.participant_id
-    ).group_by(models.Participant.id).all()
+    event_directory.invalidate()
+    db.refresh(event)
+    return event
+
+def activate_event(db: Session, event_id: int):
+    """Make an event the active one (the event used when a request names none)"""
+    try:
+        _set_active_event(db, event_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    # Update or create leaderboard entries
-    for stat in participant_stats:
-        leaderboard_entry = db.query(models.Leaderboard).filter(
-            models.Leaderboard.participant_id == stat.id
-        ).first()
-        
-        if leaderboard_entry:
-            leaderboard_entry.total_questions = stat.total_questions or 0
-            leaderboard_entry.total_marks = stat.total_marks or 0
-            leaderboard_entry.total_time = int(stat.total_time or 0)
-            leaderboard_entry.avg_time = int(stat.avg_time or 0)
-        else:
-            new_entry = models.Leaderboard(
-                participant_id=stat.id,
-                total_questions=stat.total_questions or 0,
-                total_marks=stat.total_marks or 0,
-                total_time=stat.total_time or 0,
-                avg_time=0
-            )
-            db.add(new_entry)
+    event_directory.invalidate()
+
+def archive_event(db: Session, event_id: int):
+    """
+    Close an event: no more registrations or submissions.
     
-    db.commit()
+    On PostgreSQL its quiz_responses partition is detached in the same
+    transaction; the rows stay in that table (whose name is returned) to
+    dump and drop whenever convenient, while every quiz_responses query
+    stops seeing them. The event's participants, scores and leaderboard
+    are kept. Returns None elsewhere, where the responses stay in place.
+    """
+    from sqlalchemy import func
     
-    # Calculate ranks by marks (higher is better, time as tiebreaker)
-    ranked_by_marks = db.query(models.Leaderboard).order_by(
-        desc(models.Leaderboard.total_marks),
-        models.Leaderboard.total_time
-    ).all()
+    try:
+        db.query(models.Event).filter(models.Event.id == event_id).update(
+            {models.Event.archived_at: func.now(), models.Event.is_active: False}, synchronize_session=False
+        )
+        archived_table = detach_response_partition(db.connection(), event_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    event_directory.invalidate()
+    question_cache.invalidate(event_id)
+    answer_key.invalidate(event_id)
+    question_analytics.invalidate(event_id)
+    question_bank.invalidate(event_id)
+    rank_index.remove_event(event_id)
+    
+    return archived_table
+
+def reset_event(db: Session, event_id: int):
+    """
+    Delete an event's participants and everything recorded for them
+    (responses, receipts, question sets, scores, leaderboard), keeping the
+    event and its questions, in one transaction. Returns the number of
+    participants deleted. Other events are untouched.
+    """
+    participant_ids = db.query(models.Participant.id).filter(models.Participant.event_id == event_id)
+    try:
+        db.query(models.QuizResponse).filter(
+            models.QuizResponse.event_id == event_id
+        ).delete(synchronize_session=False)
+        db.query(models.SubmissionReceipt).filter(
+            models.SubmissionReceipt.participant_id.in_(participant_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        for model in (models.QuestionSet, models.ParticipantScore, models.Leaderboard):
+            db.query(model).filter(model.event_id == event_id).delete(synchronize_session=False)
+        deleted = db.query(models.Participant).filter(
+            models.Participant.event_id == event_id
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    question_analytics.invalidate(event_id)
+    rank_index.remove_event(event_id)
+    leaderboard_feed.notify(event_id)
+    
+    return deleted
+
+def _set_active_event(db: Session, event_id: int):
+    """Deactivate the current event first: uq_events_active allows one active event at a time"""
+    db.query(models.Event).filter(
+        models.Event.is_active == True, models.Event.id != event_id
+    ).update({models.Event.is_active: False}, synchronize_session=False)
+    db.query(models.Event).filter(models.Event.id == event_id).update(
+        {models.Event.is_active: True}, synchronize_session=False
+    )
+
+def response_partition(event_id: int):
+    """Name of the quiz_responses partition holding an event's responses (PostgreSQL)"""
+    return f"quiz_responses_event_{int(event_id)}"
+
+def create_response_partition(conn, event_id: int):
+    """Create the event's quiz_responses partition on PostgreSQL (no-op elsewhere)"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {response_partition(event_id)} "
+            f"PARTITION OF quiz_responses FOR VALUES IN ({int(event_id)})"
+        ))
+
+def detach_response_partition(conn, event_id: int):
+    """Detach the event's quiz_responses partition on PostgreSQL and return its name (None elsewhere)"""
+    if conn.dialect.name != "postgresql":
+        return None
+    partition = response_partition(event_id)
+    conn.execute(text(f"ALTER TABLE quiz_responses DETACH PARTITION {partition}"))
+    return partition
+
+def _insert(db: Session, model):
+    """Dialect-specific INSERT so ON CONFLICT clauses work on PostgreSQL and SQLite"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+def combined_score(max_time: int):
+    """
+    Score = (marks_weight * total_marks) - (time_weight * normalized_time),
+    as a SQL expression over an event's leaderboard rows; `max_time` is the
+    event's longest total_time
+    """
+    from sqlalchemy import cast, literal, Float
     
-    for rank, entry in enumerate(ranked_by_marks, start=1):
-        entry.rank_by_marks = rank
+    Leaderboard = models.Leaderboard
+    normalized_time = cast(Leaderboard.total_time, Float) / literal(float(max_time or 1), Float) * 10
+    return 0.7 * Leaderboard.total_marks - normalized_time * 0.3
+
+def refresh_leaderboard(db: Session, event_id: int, rebuild_scores: bool = True):
+    """
+    Rebuild an event's leaderboard with set-based statements.
     
-    # Calculate ranks by time (lower is better, only for those who completed all questions)
-    total_questions_count = db.query(func.count(models.Question.id)).scalar()
-    ranked_by_time = db.query(models.Leaderboard).filter(
-        models.Leaderboard.total_questions == total_questions_count
-    ).order_by(models.Leaderboard.total_time).all()
+    One upsert copies every participant's totals from participant_scores
+    (rebuilt from quiz_responses first unless rebuild_scores is False).
+    Ranks aren't stored, so there is nothing else to recompute. Everything
+    runs inside the database in a single transaction, and only touches the
+    event's rows.
+    """
+    try:
+        participants_updated = _rebuild_leaderboard(db, event_id, rebuild_scores)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    for rank, entry in enumerate(ranked_by_time, start=1):
-        entry.rank_by_time = rank
+    db.expire_all()
     
-    # Calculate combined rank (weighted score)
-    # Score = (marks_weight * total_marks) - (time_weight * normalized_time)
-    max_time = db.query(func.max(models.Leaderboard.total_time)).scalar() or 1
+    return participants_updated
+
+def _rebuild_leaderboard(db: Session, event_id: int, rebuild_scores: bool):
+    """The statements of refresh_leaderboard (not committed); returns the rows upserted"""
+    if rebuild_scores:
+        update_participant_scores(db, event_id)
     
-    for entry in db.query(models.Leaderboard).all():
-        normalized_time = (entry.total_time / max_time) * 10 if max_time > 0 else 0
-        entry.combined_score = (0.7 * entry.total_marks) - (0.3 * normalized_time)
+    # total_time keeps the exact time reported on submission, so it is
+    # only set for new rows
+    stmt = _upsert_leaderboard(
+        db,
+        _leaderboard_totals(db, 0).filter(models.Participant.event_id == event_id),
+        ['total_questions', 'total_marks', 'avg_time']
+    )
+    return db.execute(stmt).rowcount
+
+def update_participant_leaderboard(db: Session, participant_id: int, event_id: int, total_time: int):
+    """
+    Write one participant's leaderboard row after their quiz submission,
+    from their participant_scores row (not committed).
     
-    db.commit()
+    A single upsert by participant_id: ranks are computed when read, so no
+    other row changes and the cost doesn't grow with the event. Use
+    refresh_leaderboard to rebuild every row.
+    """
+    from sqlalchemy import literal
     
-    # Rank by combined score
-    ranked_combined = db.query(models.Leaderboard).order_by(
-        desc(models.Leaderboard.combined_score)
-    ).all()
+    stmt = _upsert_leaderboard(
+        db,
+        _leaderboard_totals(db, literal(total_time)).filter(
+            models.Participant.id == participant_id,
+            models.Participant.event_id == event_id
+        ),
+        ['total_questions', 'total_marks', 'avg_time', 'total_time']
+    )
+    db.execute(stmt)
+
+def _leaderboard_totals(db: Session, total_time):
+    """Participants' leaderboard columns from participant_scores (0 for those without a row)"""
+    from sqlalchemy import func, case
     
-    for rank, entry in enumerate(ranked_combined, start=1):
-        entry.rank_combined = rank
+    ParticipantScore = models.ParticipantScore
+    answered = func.coalesce(ParticipantScore.total_questions, 0)
     
-    db.commit()
+    # Filtered by the callers, which is also the WHERE SQLite needs to parse
+    # INSERT ... SELECT ... JOIN ... ON CONFLICT
+    return db.query(
+        models.Participant.id,
+        models.Participant.event_id,
+        answered,
+        func.coalesce(ParticipantScore.total_marks, 0),
+        total_time,
+        case(
+            (answered == 0, 0),
+            else_=ParticipantScore.total_time_taken // ParticipantScore.total_questions
+        )
+    ).outerjoin(
+        ParticipantScore,
+        models.Participant.id == ParticipantScore.participant_id
+    )
+
+def _upsert_leaderboard(db: Session, totals, updated_columns: list):
+    """INSERT ... SELECT of _leaderboard_totals() rows, updating `updated_columns` of existing rows"""
+    from sqlalchemy import func
     
-    return len(participant_stats)
+    stmt = _insert(db, models.Leaderboard).from_select(
+        ['participant_id', 'event_id', 'total_questions', 'total_marks', 'total_time', 'avg_time'],
+        totals
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=['participant_id'],
+        set_=dict(
+            {column: getattr(stmt.excluded, column) for column in updated_columns},
+            updated_at=func.now()
+        )
+    )
+
+# Ranks aren't stored: the toppers are ranked in SQL with ROW_NUMBER() over
+# the same ordering the rows are read in, which the leaderboard indexes serve
 
-def get_toppers_by_marks(db: Session, limit: int = 10):
-    """Get top performers by marks"""
-    toppers = db.query(
+def _ranked_toppers(db: Session, event_id: int, limit: int, order_by: list, where=None):
+    """
+    (rank, Leaderboard, Participant) rows of an event's top `limit` entries,
+    ranked by ROW_NUMBER() over `order_by` in the same query
+    """
+    from sqlalchemy import func
+    
+    query = db.query(
+        func.row_number().over(order_by=order_by).label('rank'),
         models.Leaderboard,
         models.Participant
     ).join(
         models.Participant,
         models.Leaderboard.participant_id == models.Participant.id
     ).filter(
-        models.Leaderboard.rank_by_marks.isnot(None)
-    ).order_by(
-        models.Leaderboard.rank_by_marks
-    ).limit(limit).all()
+        models.Leaderboard.event_id == event_id
+    )
+    if where is not None:
+        query = query.filter(where)
     
-    return toppers
+    return query.order_by(*order_by).limit(limit).all()
 
-def get_toppers_by_time(db: Session, limit: int = 10):
-    """Get fastest performers (who completed all questions)"""
-    toppers = db.query(
-        models.Leaderboard,
-        models.Participant
-    ).join(
-        models.Participant,
-        models.Leaderboard.participant_id == models.Participant.id
-    ).filter(
-        models.Leaderboard.rank_by_time.isnot(None)
-    ).order_by(
-        models.Leaderboard.rank_by_time
-    ).limit(limit).all()
+def get_toppers_by_marks(db: Session, event_id: int, limit: int = 10):
+    """Get an event's top performers by marks (faster time breaks ties), with their ranks"""
+    return _ranked_toppers(db, event_id, limit, [
+        models.Leaderboard.total_marks.desc(),
+        models.Leaderboard.total_time,
+        models.Leaderboard.participant_id
+    ])
+
+def get_toppers_by_time(db: Session, event_id: int, limit: int = 10):
+    """Get an event's fastest performers (who completed all questions), with their ranks"""
+    total_questions_count = questions_per_participant(db, event_id)
     
-    return toppers
+    return _ranked_toppers(db, event_id, limit, [
+        models.Leaderboard.total_time,
+        models.Leaderboard.participant_id
+    ], where=models.Leaderboard.total_questions == total_questions_count)
 
-def get_combined_toppers(db: Session, limit: int = 10):
-    """Get top performers by combined score"""
-    toppers = db.query(
-        models.Leaderboard,
-        models.Participant
-    ).join(
-        models.Participant,
-        models.Leaderboard.participant_id == models.Participant.id
-    ).filter(
-        models.Leaderboard.rank_combined.isnot(None)
-    ).order_by(
-        models.Leaderboard.rank_combined
-    ).limit(limit).all()
+def get_combined_toppers(db: Session, event_id: int, limit: int = 10):
+    """
+    Get an event's top performers by combined score, with their ranks.
     
-    return toppers
+    The score depends on the event's max time, so it is computed here
+    rather than stored (one top-N sort over the event's rows).
+    """
+    from sqlalchemy import func
+    
+    max_time = db.query(func.max(models.Leaderboard.total_time)).filter(
+        models.Leaderboard.event_id == event_id
+    ).scalar()
+    
+    return _ranked_toppers(db, event_id, limit, [
+        combined_score(max_time).desc(),
+        models.Leaderboard.participant_id
+    ])
 
-def get_all_participants_with_scores(db: Session):
-    """Get all participants with their scores, sorted by marks (descending)"""
-    from sqlalchemy import func, desc, case
+def get_all_participants_with_scores(db: Session, event_id: int):
+    """Get all of an event's participants with their scores, sorted by marks (descending)"""
+    return participants_with_scores_query(db, event_id).all()
+
+def participants_with_scores_query(db: Session, event_id: int, after: Optional[Cursor] = None):
+    """
+    An event's participants with their scores in (total_marks desc,
+    total_time asc, id) order, starting after `after` when given.
     
-    # Query participants with their quiz statistics
-    results = db.query(
+    Participants who haven't submitted count as 0 marks in 0 seconds, so
+    every row has a position a keyset cursor can point at.
+    """
+    from sqlalchemy import func
+    
+    total_marks = func.coalesce(models.ParticipantScore.total_marks, 0)
+    total_time = func.coalesce(models.Leaderboard.total_time, 0)
+    
+    # Read from the participant_scores summary instead of aggregating responses
+    query = db.query(
         models.Participant.id,
         models.Participant.full_name,
         models.Participant.email,
         models.Participant.school_college,
         models.Participant.contact_number,
         models.Participant.application_number,
-        func.count(models.QuizResponse.id).label('total_questions'),
-        func.sum(case((models.QuizResponse.is_correct == True, 1), else_=0)).label('total_marks'),
-        func.max(models.Leaderboard.total_time).label('total_time')
+        func.coalesce(models.ParticipantScore.total_questions, 0).label('total_questions'),
+        total_marks.label('total_marks'),
+        total_time.label('total_time')
     ).outerjoin(
-        models.QuizResponse,
-        models.Participant.id == models.QuizResponse.participant_id
+        models.ParticipantScore,
+        models.Participant.id == models.ParticipantScore.participant_id
     ).outerjoin(
         models.Leaderboard,
         models.Participant.id == models.Leaderboard.participant_id
-    ).group_by(
+    ).filter(
+        models.Participant.event_id == event_id
+    )
+    
+    if after is not None:
+        query = query.filter(keyset_after(after, total_marks, total_time, models.Participant.id))
+    
+    return query.order_by(total_marks.desc(), total_time, models.Participant.id)
+
+def leaderboard_query(db: Session, event_id: int, after: Optional[Cursor] = None):
+    """
+    An event's leaderboard rows with participant details in (total_marks
+    desc, total_time asc, participant_id) order, starting after `after`
+    when given.
+    
+    Served by ix_leaderboard_event_keyset, so a page costs the same however deep
+    into the leaderboard it starts. Selects plain columns rather than ORM
+    objects since the rows are only serialized.
+    """
+    query = db.query(
+        models.Leaderboard.participant_id,
+        models.Participant.full_name,
+        models.Participant.email,
+        models.Participant.school_college,
+        models.Participant.application_number,
+        models.Leaderboard.total_marks,
+        models.Leaderboard.total_time,
+        models.Leaderboard.avg_time,
+        models.Leaderboard.total_questions
+    ).join(
+        models.Participant,
+        models.Leaderboard.participant_id == models.Participant.id
+    ).filter(
+        models.Leaderboard.event_id == event_id
+    )
+    
+    if after is not None:
+        query = query.filter(keyset_after(
+            after,
+            models.Leaderboard.total_marks,
+            models.Leaderboard.total_time,
+            models.Leaderboard.participant_id
+        ))
+    
+    return query.order_by(
+        models.Leaderboard.total_marks.desc(),  # Higher marks first
+        models.Leaderboard.total_time.asc(),    # Faster time as tiebreaker
+        models.Leaderboard.participant_id
+    )
+
+def responses_export_query(db: Session, event_id: int):
+    """
+    Every quiz response of an event with its participant's details and
+    totals, in (participant_id, question_number) order.
+    
+    That order is the unique index on quiz_responses after event_id, so the
+    database can stream rows straight off it (on PostgreSQL from the event's
+    partition alone) without sorting.
+    """
+    from sqlalchemy import func
+    
+    return db.query(
         models.Participant.id,
         models.Participant.full_name,
         models.Participant.email,
         models.Participant.school_college,
-        models.Participant.contact_number,
-        models.Participant.application_number
+        models.Participant.application_number,
+        models.QuizResponse.question_number,
+        models.QuizResponse.selected_answer,
+        models.QuizResponse.is_correct,
+        models.QuizResponse.time_taken,
+        func.coalesce(models.ParticipantScore.total_marks, 0).label('total_marks'),
+        func.coalesce(models.Leaderboard.total_time, 0).label('total_time')
+    ).join(
+        models.Participant,
+        models.QuizResponse.participant_id == models.Participant.id
+    ).outerjoin(
+        models.ParticipantScore,
+        models.QuizResponse.participant_id == models.ParticipantScore.participant_id
+    ).outerjoin(
+        models.Leaderboard,
+        models.QuizResponse.participant_id == models.Leaderboard.participant_id
+    ).filter(
+        models.QuizResponse.event_id == event_id
     ).order_by(
-        desc('total_marks'),
-        'total_time'
-    ).all()
-    
-    return results
+        models.QuizResponse.participant_id,
+        models.QuizResponse.question_number
+    )
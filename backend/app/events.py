@@ -0,0 +1,102 @@
+import threading
+import time
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.database import SessionLocal, is_replica
+from app.question_cache import QUESTION_CACHE_TTL
+
+class EventDirectory:
+    """
+    Per-worker copy of the events table: which event is active and which
+    ones are archived.
+
+    Requests name their event with event_id or fall back to the active one,
+    and resolving either needs no query once the copy is loaded. Reloaded
+    when this worker creates, activates or archives an event, when a request
+    names an event it hasn't seen yet, and after QUESTION_CACHE_TTL seconds,
+    so the other workers follow an activation within that time.
+    """
+
+    def __init__(self, ttl: float = QUESTION_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = None  # (active event_id or None, {event_id: archived}, loaded_at)
+
+    def get(self, db: Session):
+        """Return (active event_id, {event_id: archived}), loading them if the copy is empty or expired"""
+        entry = self._fresh_entry()
+        if entry is None:
+            with self._lock:
+                entry = self._fresh_entry()
+                if entry is None:
+                    entry = self._entry = self._load(db)
+        return entry[0], entry[1]
+
+    async def get_async(self, db: AsyncSession):
+        """Same as get() for the async stack (lock-free, like QuestionCache.get_async)"""
+        entry = self._fresh_entry()
+        if entry is None:
+            entry = self._entry = await db.run_sync(self._load)
+        return entry[0], entry[1]
+
+    def invalidate(self):
+        """Drop the copy so the next request reloads the events"""
+        self._entry = None
+
+    def resolve(self, db: Session, event_id: int = None, open_only: bool = False):
+        """
+        The event a request acts on: `event_id`, or the active event when
+        it is None.
+
+        Raises 404 for an unknown event (or when none is active), and 409
+        for an archived one when `open_only` (registration, submissions).
+        """
+        events = self.get(db)
+        if event_id is not None and event_id not in events[1]:
+            self.invalidate()
+            events = self.get(db)
+        return self._check(events, event_id, open_only)
+
+    async def resolve_async(self, db: AsyncSession, event_id: int = None, open_only: bool = False):
+        events = await self.get_async(db)
+        if event_id is not None and event_id not in events[1]:
+            self.invalidate()
+            events = await self.get_async(db)
+        return self._check(events, event_id, open_only)
+
+    def _check(self, events, event_id, open_only: bool):
+        active, archived = events
+        if event_id is None:
+            if active is None:
+                raise HTTPException(status_code=404, detail="No event is active")
+            event_id = active
+        if event_id not in archived:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if open_only and archived[event_id]:
+            raise HTTPException(status_code=409, detail="This event has been archived")
+        return event_id
+
+    def _fresh_entry(self):
+        entry = self._entry
+        if entry is None or time.monotonic() - entry[2] > self.ttl:
+            return None
+        return entry
+
+    def _load(self, db: Session):
+        if is_replica(db):
+            # Registration and submit trust this copy to refuse archived
+            # events, so never fill it from a replica that may lag
+            primary = SessionLocal()
+            try:
+                return self._load(primary)
+            finally:
+                primary.close()
+
+        rows = db.query(models.Event.id, models.Event.is_active, models.Event.archived_at).all()
+
+        active = next((row.id for row in rows if row.is_active), None)
+        return active, {row.id: row.archived_at is not None for row in rows}, time.monotonic()
+
+event_directory = EventDirectory()
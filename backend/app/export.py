@@ -0,0 +1,83 @@
+import csv
+import io
+import zlib
+import orjson
+from app.question_bank import MARKS_OUT_OF
+
+# Rows encoded per chunk written to the response
+EXPORT_BATCH_SIZE = 1000
+
+PARTICIPANT_COLUMNS = [
+    "rank", "participant_id", "full_name", "email", "school_college", "contact_number",
+    "application_number", "total_marks", "questions_answered", "percentage", "total_time"
+]
+
+# Same order as the columns of crud.responses_export_query
+RESPONSE_COLUMNS = [
+    "participant_id", "full_name", "email", "school_college", "application_number",
+    "question_number", "selected_answer", "is_correct", "time_taken", "total_marks", "total_time"
+]
+
+def participant_rows(results):
+    """Rows of crud.participants_with_scores_query as PARTICIPANT_COLUMNS values"""
+    for rank, result in enumerate(results, start=1):
+        total_marks = result.total_marks or 0
+        yield (
+            rank,
+            result.id,
+            result.full_name,
+            result.email,
+            result.school_college,
+            result.contact_number,
+            result.application_number,
+            total_marks,
+            result.total_questions,
+            round(total_marks / float(MARKS_OUT_OF) * 100, 2),  # Out of MARKS_OUT_OF, as on the dashboard
+            result.total_time
+        )
+
+def response_rows(results):
+    """Rows of crud.responses_export_query as RESPONSE_COLUMNS values"""
+    for result in results:
+        yield tuple(result)
+
+def encode_csv(columns: list, rows):
+    """UTF-8 CSV in chunks of EXPORT_BATCH_SIZE rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode()
+
+def encode_ndjson(columns: list, rows):
+    """One JSON object per line (encoded with orjson), in chunks of EXPORT_BATCH_SIZE rows"""
+    lines = []
+    for row in rows:
+        lines.append(orjson.dumps(dict(zip(columns, row))))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+def gzip_chunks(chunks):
+    """Compress byte chunks into a single gzip stream as they are produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+ENCODERS = {
+    "csv": (encode_csv, "text/csv"),
+    "ndjson": (encode_ndjson, "application/x-ndjson"),
+}
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import orjson
+from starlette.concurrency import run_in_threadpool
+from app import schemas
+from app.database import SessionLocal
+
+# Entries pushed per category, seconds between recomputations while
+# submissions keep arriving, and the longest a feed goes without re-reading
+# the leaderboard (picks up submissions written by other workers)
+LEADERBOARD_PUSH_SIZE = int(os.getenv("LEADERBOARD_PUSH_SIZE", "10"))
+LEADERBOARD_PUSH_INTERVAL = float(os.getenv("LEADERBOARD_PUSH_INTERVAL", "1"))
+LEADERBOARD_PUSH_MAX_INTERVAL = float(os.getenv("LEADERBOARD_PUSH_MAX_INTERVAL", "10"))
+
+# Seconds between comments sent to idle subscribers so proxies keep the connection open
+KEEPALIVE_INTERVAL = 15
+
+class LeaderboardFeed:
+    """
+    Pushes the top of one event's leaderboard to Server-Sent Events subscribers.
+
+    Submissions only mark the feed dirty; a single background task per
+    worker re-reads the toppers at most once per `interval` and, if anything
+    changed, encodes one diff event that every subscriber is woken up to
+    send. Idle subscribers are just coroutines waiting on a shared event, and
+    nothing is queried while nobody is subscribed.
+    """
+
+    def __init__(self, event_id: int, size: int = LEADERBOARD_PUSH_SIZE, interval: float = LEADERBOARD_PUSH_INTERVAL,
+                 max_interval: float = LEADERBOARD_PUSH_MAX_INTERVAL):
+        self.event_id = event_id
+        self.size = size
+        self.interval = interval
+        self.max_interval = max_interval
+        self._loop = None
+        self._task = None
+        self._dirty = None
+        self._published = None  # Set (and replaced) on every broadcast
+        self._refresh_lock = None
+        self.snapshot = None  # {"marks": [...], "combined": [...]}
+        self.version = 0
+        self._snapshot_event = None
+        self._diff_event = None
+        self.subscribers = 0
+        self.broadcasts = 0
+
+    def notify(self):
+        """Mark the leaderboard as changed; safe to call from any thread"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dirty.set)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    async def subscribe(self):
+        """
+        SSE stream for one subscriber: a snapshot event first, then a diff
+        event per change (or a fresh snapshot if it fell behind)
+        """
+        self._ensure_started()
+        self.subscribers += 1
+        try:
+            if self.snapshot is None:
+                await self._refresh()
+            version, published = self.version, self._published
+            yield self._snapshot_event
+
+            while True:
+                try:
+                    await asyncio.wait_for(published.wait(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+
+                event = self._diff_event if self.version == version + 1 else self._snapshot_event
+                version, published = self.version, self._published
+                yield event
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                # Nothing is recomputed without subscribers, so don't hand
+                # the next one a stale snapshot
+                self.snapshot = None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._loop = self._task = None
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._dirty = asyncio.Event()
+            self._published = asyncio.Event()
+            self._refresh_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), self.max_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            if self.subscribers == 0:
+                self._dirty.clear()
+                continue
+
+            # Let the rest of a burst of submissions land first
+            await asyncio.sleep(self.interval)
+            self._dirty.clear()
+            try:
+                await self._refresh()
+            except Exception as e:
+                print(f"Error refreshing leaderboard feed: {e}")
+
+    async def _refresh(self):
+        async with self._refresh_lock:
+            snapshot = await run_in_threadpool(self._load)
+            self._publish(snapshot)
+
+    def _load(self):
+        from app import crud
+
+        db = SessionLocal()
+        try:
+            # The toppers come in rank order, ranked by the query
+            return {
+                "marks": [
+                    self._entry(rank, leaderboard, participant)
+                    for rank, leaderboard, participant
+                    in crud.get_toppers_by_marks(db, self.event_id, self.size)
+                ],
+                "combined": [
+                    self._entry(rank, leaderboard, participant)
+                    for rank, leaderboard, participant
+                    in crud.get_combined_toppers(db, self.event_id, self.size)
+                ]
+            }
+        finally:
+            db.close()
+
+    def _publish(self, snapshot: dict):
+        """Broadcast what changed since the last snapshot, if anything"""
+        diff = {}
+        previous = self.snapshot or {}
+        for category, entries in snapshot.items():
+            old = previous.get(category, [])
+            changed = [
+                entry for position, entry in enumerate(entries)
+                if position >= len(old) or old[position] != entry
+            ]
+            if changed or len(entries) != len(old):
+                diff[category] = {"size": len(entries), "changed": changed}
+
+        if self.snapshot is not None and not diff:
+            return
+
+        self.snapshot = snapshot
+        self._snapshot_event = self._event("snapshot", snapshot)
+        self._diff_event = self._event("diff", diff)
+        self.version += 1
+        self.broadcasts += 1
+
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    def _entry(self, rank: int, leaderboard, participant):
+        return schemas.TopperEntry(
+            rank=rank,
+            participant_id=participant.id,
+            full_name=participant.full_name,
+            email=participant.email,
+            school_college=participant.school_college,
+            application_number=participant.application_number,
+            total_marks=leaderboard.total_marks,
+            total_time=float(leaderboard.total_time),
+            avg_time=float(leaderboard.avg_time),
+            total_questions=leaderboard.total_questions
+        ).model_dump()
+
+    def _event(self, name: str, data: dict):
+        return f"event: {name}\nid: {self.version + 1}\ndata: ".encode() + orjson.dumps(data) + b"\n\n"
+
+class LeaderboardFeeds:
+    """A LeaderboardFeed per event, started by the event's first subscriber"""
+
+    def __init__(self):
+        self._feeds = {}  # event_id -> LeaderboardFeed
+
+    def notify(self, event_id: int = None):
+        """Mark the event's leaderboard (every event's without one) as changed; safe to call from any thread"""
+        feeds = list(self._feeds.values()) if event_id is None else [self._feeds.get(event_id)]
+        for feed in feeds:
+            if feed is not None:
+                feed.notify()
+
+    def subscribe(self, event_id: int):
+        """SSE stream of the event's leaderboard (see LeaderboardFeed.subscribe)"""
+        feed = self._feeds.get(event_id)
+        if feed is None:
+            feed = self._feeds[event_id] = LeaderboardFeed(event_id)
+        return feed.subscribe()
+
+    async def stop(self):
+        for feed in list(self._feeds.values()):
+            await feed.stop()
+
+leaderboard_feed = LeaderboardFeeds()
@@ -1,19 +1,54 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import participants, quiz, results, admin
-from app.database import engine, Base
+from fastapi.responses import JSONResponse
+from anyio import to_thread
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.routers import participants, quiz, results, admin, async_routes
+from app.database import engine, async_engine, DB_STACK, DB_THREAD_LIMIT, SessionLocal, pool_capacity
+from app.migrations import MIGRATE_ON_STARTUP, check_schema_version, migrate
+from app.rank_index import rank_index
+from app.leaderboard_feed import leaderboard_feed
+from app.metrics import MetricsMiddleware, pool_stats, render as render_metrics
+from app.query_profiler import QUERY_PROFILE, QueryProfilerMiddleware
+from app.submission_buffer import SUBMIT_MODE, submission_buffer
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema changes are applied once per deploy by `python migrate.py`; each
+# worker only checks the recorded version (one query) before serving
+if MIGRATE_ON_STARTUP:
+    migrate(engine)
+else:
+    check_schema_version(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    thread_limit = int(DB_THREAD_LIMIT) if DB_THREAD_LIMIT is not None else pool_capacity(engine)
+    if thread_limit:
+        to_thread.current_default_thread_limiter().total_tokens = thread_limit
+
+    db = SessionLocal()
+    try:
+        rank_index.load(db)
+    finally:
+        db.close()
+    if SUBMIT_MODE == "buffered":
+        submission_buffer.start()
+    yield
+    # Write out any queued submissions before the worker exits
+    submission_buffer.stop()
+    await leaderboard_feed.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 app = FastAPI(
     title="Indira BrainSpark Quiz API",
     description="Backend API for the Indira University quiz application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -30,12 +65,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if QUERY_PROFILE != "off":
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Outermost, so latency includes CORS handling
+app.add_middleware(MetricsMiddleware)
+
 print("=" * 50)
 print("CORS Configuration:")
 print("Allowed Origins:", allowed_origins)
 print("=" * 50)
 
 # Include routers
+if DB_STACK == "async":
+    # Registered first so the async handlers win for the hot endpoints
+    app.include_router(async_routes.router)
 app.include_router(participants.router)
 app.include_router(quiz.router)
 app.include_router(results.router)
@@ -49,6 +93,26 @@ def root():
         "docs": "/docs"
     }
 
+# Health and metrics are async so they answer without waiting for a thread
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, database pool and submit-path metrics for Prometheus (this worker only)"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/pool", include_in_schema=False)
+async def metrics_pool():
+    """Connection pool usage of this worker as JSON"""
+    return pool_stats()
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """No connection freed up within DB_POOL_TIMEOUT: ask the client to retry instead of failing with a 500"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
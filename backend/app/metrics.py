@@ -0,0 +1,263 @@
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Per-worker request, database and submit-path metrics in the Prometheus text
+# format, served at /metrics. Each uvicorn worker keeps its own numbers.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.extend(self._render_sample(label_values, value))
+        return lines
+
+    def _render_sample(self, label_values, value):
+        return [f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+class Gauge(_Metric):
+    """Gauge set directly, or read from `collect` (returning {label_values: value}) at scrape time"""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self):
+        if self.collect is not None:
+            with self._lock:
+                self._values = dict(self.collect())
+        return super().render()
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    def _render_sample(self, label_values, state):
+        counts, count, total = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labels, label_values, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labels, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status code", ["method", "route", "status"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route", ["method", "route"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request", "SQL statements executed per HTTP request", ["route"], COUNT_BUCKETS
+)
+REQUEST_SQL_TIME = Histogram("db_statement_seconds_per_request", "Time spent executing SQL per HTTP request", ["route"])
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["pool"], WAIT_BUCKETS
+)
+POOL_ERRORS = Counter("db_pool_checkout_errors_total", "Checkouts that failed (pool_timeout reached or connect error)", ["pool"])
+POOL_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout", ["pool"])
+READ_SESSIONS = Counter("db_read_sessions_total", "Sessions opened for read-only endpoints, by database", ["target"])
+REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replication lag of the read replica at the last check")
+REPLICA_UP = Gauge("db_replica_up", "1 if reads are routed to the replica, 0 if they fall back to the primary")
+SUBMIT_PHASE = Histogram("quiz_submit_phase_seconds", "Time spent in each phase of a quiz submission", ["phase"])
+SUBMISSIONS = Counter("quiz_submissions_total", "Quiz submissions by result", ["result"])
+
+_engines = {}  # pool label -> Engine, for the connection gauges
+
+def _pool_stats(read):
+    def collect():
+        stats = {}
+        for label, engine in _engines.items():
+            try:
+                stats[(label,)] = read(engine.pool)
+            except AttributeError:
+                pass  # Pool class without this statistic (e.g. NullPool)
+        return stats
+    return collect
+
+Gauge("db_pool_size", "Connections kept open by the pool", ["pool"], _pool_stats(lambda pool: pool.size()))
+Gauge("db_pool_max_overflow", "Connections the pool may open beyond pool_size", ["pool"],
+      _pool_stats(lambda pool: pool._max_overflow))
+Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"], _pool_stats(lambda pool: pool.checkedout()))
+Gauge("db_pool_checked_in", "Idle connections in the pool", ["pool"], _pool_stats(lambda pool: pool.checkedin()))
+# QueuePool counts overflow from -pool_size until the pool has filled up
+Gauge("db_pool_overflow", "Connections open beyond pool_size", ["pool"], _pool_stats(lambda pool: max(0, pool.overflow())))
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection"""
+    pool_label = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception as e:
+            POOL_ERRORS.inc(self.pool_label)
+            if isinstance(e, PoolTimeoutError):
+                POOL_TIMEOUTS.inc(self.pool_label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, self.pool_label)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pool_label = "sync"
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pool_label = "async"
+
+class TimedReadQueuePool(TimedQueuePool):
+    pool_label = "read"
+
+def pool_stats():
+    """
+    Per-pool connection usage and checkout waits for this worker, as a dict
+    (the same numbers /metrics exposes, for dashboards and health checks)
+    """
+    stats = {}
+    for label, engine in _engines.items():
+        pool = engine.pool
+        entry = {"pool_class": type(pool).__name__}
+        if hasattr(pool, "checkedout"):
+            entry.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+                timeout=pool.timeout(),
+            )
+        with POOL_CHECKOUT_WAIT._lock:
+            _, checkouts, waited = POOL_CHECKOUT_WAIT._values.get((label,), (None, 0, 0.0))
+        entry.update(
+            checkouts=checkouts,
+            checkout_wait_seconds=round(waited, 6),
+            errors=POOL_ERRORS._values.get((label,), 0),
+            timeouts=POOL_TIMEOUTS._values.get((label,), 0),
+        )
+        stats[label] = entry
+    return stats
+
+def instrument_engine(engine, label: str):
+    """Expose `engine`'s pool in the connection gauges (statements are counted by app.database)"""
+    _engines[label] = engine
+
+@contextmanager
+def submit_phase(phase: str):
+    """Time one phase of the submit path (grading, responses, leaderboard)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SUBMIT_PHASE.observe(time.perf_counter() - started, phase)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, in-flight requests and SQL work per route"""
+
+    def __init__(self, app):
+        # Imported here: app.database imports this module for its pool classes
+        from app.database import count_queries
+
+        self.app = app
+        self.count_queries = count_queries
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            with self.count_queries() as sql:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+
+            # Label by route template (/api/quiz/rank/{participant_id}), not raw path
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            REQUESTS.inc(scope["method"], route, str(status[0]))
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route)
+            REQUEST_STATEMENTS.observe(len(sql), route)
+            REQUEST_SQL_TIME.observe(sql.duration, route)
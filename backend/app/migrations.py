@@ -0,0 +1,352 @@
+import os
+from sqlalchemy import Column, Integer, MetaData, String, Table, TIMESTAMP, func, insert, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import visitors
+from sqlalchemy.types import Float
+from app.database import Base
+from app import models  # noqa: F401 - registers the tables on Base.metadata
+
+# "1" makes each worker apply pending migrations itself (under the lock)
+# instead of only checking the version; handy for local development
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "0") == "1"
+
+# Key of the PostgreSQL advisory lock held while migrating, so concurrent
+# runs (e.g. several containers starting at once) apply each migration once
+MIGRATION_LOCK_ID = 740_019_001
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", TIMESTAMP, server_default=func.now())
+)
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+class DuplicateParticipants(RuntimeError):
+    """Existing participants that the unique registration indexes would reject"""
+
+# Migrations. Each one receives a connection inside the migration transaction.
+#
+# Version 1 creates any missing table from the current models, so on a fresh
+# database the later steps find their change already in place: every step
+# must check before changing anything, as the ones below do. Indexes are
+# built from the current models too, so one whose columns a later step adds
+# is skipped until that step (see _create_index).
+
+def create_tables(conn):
+    Base.metadata.create_all(bind=conn)
+
+def add_application_number(conn):
+    """Ported from add_column_migration.py"""
+    if not _has_column(conn, "participants", "application_number"):
+        conn.execute(text("ALTER TABLE participants ADD COLUMN application_number VARCHAR(255) DEFAULT ''"))
+
+def add_combined_score(conn):
+    """Ported from migrate_leaderboard.py"""
+    if not _has_column(conn, "leaderboard", "combined_score"):
+        column_type = Float().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE leaderboard ADD COLUMN combined_score {column_type}"))
+
+def create_model_indexes(conn):
+    """
+    Ported from migrate_indexes.py: keep only the first answer per question
+    so the unique index can be built, then create every index declared on
+    the models that doesn't exist yet
+    """
+    result = conn.execute(text("""
+        DELETE FROM quiz_responses
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM quiz_responses GROUP BY participant_id, question_number
+        )
+    """))
+    if result.rowcount:
+        print(f"✓ Removed {result.rowcount} duplicate quiz responses (refresh the leaderboard afterwards)")
+    if _has_column(conn, "participants", "event_id"):
+        _check_duplicate_participants(conn)
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            _create_index(conn, index)
+
+def backfill_participant_scores(conn):
+    """Build participant_scores for databases that already had responses before it existed"""
+    from app import crud
+
+    if not _has_column(conn, "quiz_responses", "event_id"):
+        return  # Scores are per event: add_events backfills them once the column exists
+    if conn.execute(select(func.count()).select_from(models.ParticipantScore)).scalar():
+        return
+    db = Session(bind=conn)
+    try:
+        for (event_id,) in db.query(models.Event.id).all():
+            crud.update_participant_scores(db, event_id)
+    finally:
+        db.close()
+
+def create_question_analytics_index(conn):
+    """Covering index for GET /api/admin/questions/analytics (blocks response writes while it builds)"""
+    _create_index(conn, _model_index(models.QuizResponse.__table__, "ix_quiz_responses_event_question_analytics"))
+
+# Tables whose rows belong to an event
+EVENT_SCOPED_TABLES = ["participants", "questions", "quiz_responses", "participant_scores", "leaderboard"]
+
+# Indexes and constraints replaced by event-scoped ones, which lead with event_id
+SUPERSEDED_INDEXES = [
+    "ix_participants_email", "uq_participants_email_lower", "uq_participants_application_number",
+    "ix_questions_question_number",
+    "uq_quiz_responses_participant_question", "ix_quiz_responses_question_analytics",
+    "ix_leaderboard_total_time", "ix_leaderboard_rank_by_marks", "ix_leaderboard_rank_by_time",
+    "ix_leaderboard_rank_combined", "ix_leaderboard_combined_score",
+    "ix_leaderboard_marks_time", "ix_leaderboard_keyset",
+]
+SUPERSEDED_CONSTRAINTS = [("participants", "participants_email_key"), ("questions", "questions_question_number_key")]
+
+def add_events(conn):
+    """
+    Scope participants, questions, responses, scores and the leaderboard by
+    event. Existing rows go into a first event, made active; on PostgreSQL
+    quiz_responses is rebuilt as a table partitioned by event (copying its
+    rows once, under an exclusive lock).
+    """
+    models.Event.__table__.create(bind=conn, checkfirst=True)
+    first_event = conn.execute(select(models.Event.id).order_by(models.Event.id).limit(1)).scalar()
+    if first_event is None:
+        first_event = conn.execute(
+            insert(models.Event).values(name="Default event", is_active=True).returning(models.Event.id)
+        ).scalar_one()
+
+    postgresql = conn.dialect.name == "postgresql"
+    for table in EVENT_SCOPED_TABLES:
+        if _has_column(conn, table, "event_id"):
+            continue
+        # SQLite can't add a REFERENCES column with a non-NULL default
+        references = " REFERENCES events (id)" if postgresql else ""
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN event_id INTEGER NOT NULL DEFAULT {int(first_event)}{references}"
+        ))
+        if postgresql:
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN event_id DROP DEFAULT"))
+
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if postgresql:
+        for table, name in SUPERSEDED_CONSTRAINTS:
+            conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}"))
+        if not _is_partitioned(conn, "quiz_responses"):
+            _partition_quiz_responses(conn)
+
+    _check_duplicate_participants(conn)
+    for table in EVENT_SCOPED_TABLES:
+        for index in sorted(Base.metadata.tables[table].indexes, key=lambda i: i.name):
+            _create_index(conn, index)
+
+    backfill_participant_scores(conn)
+
+# Leaderboard columns and indexes of the ranks the submit path used to shift
+STORED_RANK_COLUMNS = ["rank_by_marks", "rank_by_time", "rank_combined", "combined_score"]
+STORED_RANK_INDEXES = [
+    "ix_leaderboard_event_marks_time", "ix_leaderboard_event_rank_by_marks", "ix_leaderboard_event_rank_by_time",
+    "ix_leaderboard_event_rank_combined", "ix_leaderboard_event_combined_score",
+]
+
+def drop_stored_ranks(conn):
+    """Ranks are computed when the leaderboard is read, so drop the stored ones (indexes first, SQLite requires it)"""
+    for name in STORED_RANK_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for column in STORED_RANK_COLUMNS:
+        if _has_column(conn, "leaderboard", column):
+            conn.execute(text(f"ALTER TABLE leaderboard DROP COLUMN {column}"))
+
+def add_questions_version(conn):
+    """Version the per-worker question caches check on each read"""
+    if not _has_column(conn, "events", "questions_version"):
+        conn.execute(text("ALTER TABLE events ADD COLUMN questions_version INTEGER NOT NULL DEFAULT 0"))
+
+def add_question_sets(conn):
+    """Store each participant's question-bank draw when it is first served"""
+    models.QuestionSet.__table__.create(bind=conn, checkfirst=True)
+
+MIGRATIONS = [
+    (1, "Create missing tables", create_tables),
+    (2, "Add participants.application_number", add_application_number),
+    (3, "Add leaderboard.combined_score", add_combined_score),
+    (4, "Remove duplicate responses and create model indexes", create_model_indexes),
+    (5, "Backfill participant_scores", backfill_participant_scores),
+    (6, "Create quiz_responses question analytics index", create_question_analytics_index),
+    (7, "Add events and scope data by event", add_events),
+    (8, "Drop stored leaderboard ranks", drop_stored_ranks),
+    (9, "Add events.questions_version", add_questions_version),
+    (10, "Add question_sets", add_question_sets),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn):
+    """Highest applied migration, or 0 for a database that has never been migrated"""
+    try:
+        with conn.begin_nested():
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except DBAPIError:
+        return 0
+
+def migrate(engine):
+    """
+    Apply pending migrations in one transaction and return the ones applied.
+
+    The transaction first takes a lock (a PostgreSQL advisory lock, or
+    SQLite's write lock), so concurrent runs wait for each other and the
+    later ones find nothing left to do.
+    """
+    applied = []
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        elif conn.dialect.name == "sqlite":
+            # pysqlite would only BEGIN at the first write, after the version was read
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+        schema_version.create(bind=conn, checkfirst=True)
+        version = current_version(conn)
+
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            apply(conn)
+            conn.execute(schema_version.insert().values(version=number, description=description))
+            applied.append((number, description))
+    return applied
+
+def check_schema_version(engine):
+    """
+    Worker startup check: one query instead of reflecting the schema.
+
+    Raises SchemaOutOfDate if migrations are pending (run `python migrate.py`),
+    or if the database was migrated by a newer release than this one.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    if version != LATEST_VERSION:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version}, this release expects {LATEST_VERSION}. "
+            "Run `python migrate.py` before starting the workers."
+        )
+
+def _partition_quiz_responses(conn):
+    """
+    Replace quiz_responses with a table partitioned by LIST (event_id), one
+    partition per event (crud.create_response_partition adds the later ones).
+    Ids keep coming from the same sequence; the primary key becomes
+    (event_id, id) since a partitioned table's keys must include event_id.
+    """
+    from app import crud
+
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('quiz_responses', 'id')")).scalar()
+    primary_key = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = 'quiz_responses'::regclass AND contype = 'p'"
+    )).scalar()
+
+    # Index names are schema-wide, so free them for the new table's indexes
+    conn.execute(text("ALTER TABLE quiz_responses RENAME TO quiz_responses_unpartitioned"))
+    if primary_key:
+        conn.execute(text(f'ALTER TABLE quiz_responses_unpartitioned DROP CONSTRAINT "{primary_key}"'))
+    for index in models.QuizResponse.__table__.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+    conn.execute(text(f"""
+        CREATE TABLE quiz_responses (
+            id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+            event_id INTEGER NOT NULL REFERENCES events (id),
+            participant_id INTEGER NOT NULL REFERENCES participants (id) ON DELETE CASCADE,
+            question_number INTEGER NOT NULL,
+            selected_answer VARCHAR(1),
+            time_taken INTEGER,
+            is_correct BOOLEAN,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+            PRIMARY KEY (event_id, id)
+        ) PARTITION BY LIST (event_id)
+    """))
+    for event_id in conn.execute(select(models.Event.id)).scalars():
+        crud.create_response_partition(conn, event_id)
+
+    columns = "id, event_id, participant_id, question_number, selected_answer, time_taken, is_correct, created_at"
+    conn.execute(text(f"INSERT INTO quiz_responses ({columns}) SELECT {columns} FROM quiz_responses_unpartitioned"))
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY quiz_responses.id"))
+    conn.execute(text("DROP TABLE quiz_responses_unpartitioned"))
+
+# Registration's unique keys within an event, as SQL over participants:
+# (label, key expression, rows it applies to)
+PARTICIPANT_UNIQUE_KEYS = [
+    ("email (ignoring case)", "lower(email)", "1 = 1"),
+    ("application number", "application_number", "application_number != ''"),
+]
+
+def _check_duplicate_participants(conn):
+    """
+    Refuse to migrate while two participants of an event share an email
+    (in any case) or a non-empty application number, which the unique
+    registration indexes would reject halfway through with an
+    IntegrityError. Which copy to keep is a decision for an admin, so the
+    error lists every conflicting row and nothing is changed.
+    """
+    conflicts = []
+    for label, key, applies in PARTICIPANT_UNIQUE_KEYS:
+        rows = conn.execute(text(f"""
+            SELECT event_id, {key} AS conflict_key, id, full_name, email, application_number
+            FROM participants
+            WHERE {applies} AND (event_id, {key}) IN (
+                SELECT event_id, {key} FROM participants
+                WHERE {applies}
+                GROUP BY event_id, {key}
+                HAVING COUNT(*) > 1
+            )
+            ORDER BY event_id, conflict_key, id
+        """)).all()
+        groups = {}
+        for row in rows:
+            groups.setdefault((row.event_id, row.conflict_key), []).append(row)
+        for (event_id, value), participants in groups.items():
+            conflicts.append(f"  event {event_id}, {label} {value!r}:")
+            conflicts.extend(
+                f"    participant {p.id}: {p.full_name} <{p.email}> application number {p.application_number!r}"
+                for p in participants
+            )
+
+    if conflicts:
+        raise DuplicateParticipants(
+            "These participants share an email or application number within their event, so the unique "
+            "registration indexes can't be created:\n" + "\n".join(conflicts) + "\n"
+            "Delete or correct the extra rows (e.g. from the admin export), then run `python migrate.py` again. "
+            "Nothing was migrated."
+        )
+
+def _is_partitioned(conn, table: str):
+    return conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)"), {"table": table}
+    ).scalar()
+
+def _model_index(table, name: str):
+    return next(index for index in table.indexes if index.name == name)
+
+def _create_index(conn, index):
+    """
+    Create a model index unless it exists (IF NOT EXISTS rather than
+    checkfirst: reflection skips expression indexes), or one of its columns
+    doesn't yet because a later migration adds it and then the index
+    """
+    columns = {
+        element.name
+        for expression in index.expressions
+        for element in visitors.iterate(expression)
+        if isinstance(element, Column)
+    }
+    existing = {c["name"] for c in inspect(conn).get_columns(index.table.name)}
+    if columns <= existing:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+def _has_column(conn, table: str, column: str):
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
@@ -1,23 +1,50 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, TIMESTAMP, Float
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, TIMESTAMP, Float, Index, JSON
 from sqlalchemy.sql import func
 from app.database import Base
 
+class Event(Base):
+    """One run of the quiz; participants, questions, responses and the leaderboard all belong to one"""
+    __tablename__ = "events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    is_active = Column(Boolean, nullable=False, default=False)  # Event used when a request names none
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    archived_at = Column(TIMESTAMP, nullable=True)  # Closed; on PostgreSQL its responses are detached
+    questions_version = Column(Integer, nullable=False, default=0)  # Bumped by every upload of its questions
+
+    __table_args__ = (
+        # At most one active event
+        Index("uq_events_active", "is_active", unique=True, postgresql_where=is_active, sqlite_where=is_active),
+    )
+
 class Participant(Base):
     __tablename__ = "participants"
     
     id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     full_name = Column(String(255), nullable=False)
     contact_number = Column(String(15), nullable=False)
-    email = Column(String(255), nullable=False, unique=True, index=True)
+    email = Column(String(255), nullable=False)
     school_college = Column(String(255), nullable=False)
     application_number = Column(String(255), nullable=True, default='')
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (
+        # Registration relies on these to reject duplicates within an event in a single INSERT
+        Index("uq_participants_event_email_lower", "event_id", func.lower(email), unique=True),
+        Index(
+            "uq_participants_event_application_number", "event_id", "application_number", unique=True,
+            postgresql_where=application_number != '', sqlite_where=application_number != ''
+        ),
+    )
+
 class Question(Base):
     __tablename__ = "questions"
     
     id = Column(Integer, primary_key=True, index=True)
-    question_number = Column(Integer, nullable=False, unique=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    question_number = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
     option1_text = Column(String(500), nullable=False)
     option1_is_correct = Column(Boolean, nullable=False)
@@ -29,10 +56,23 @@ class Question(Base):
     option4_is_correct = Column(Boolean, nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (
+        # Upserts on upload conflict on this; also serves an event's question lookups
+        Index("uq_questions_event_question_number", "event_id", "question_number", unique=True),
+    )
+
 class QuizResponse(Base):
+    """
+    On PostgreSQL, migration 7 turns this into a table partitioned by
+    LIST (event_id) with PRIMARY KEY (event_id, id) and one partition per
+    event, so each event's queries only read its own partition and a closed
+    event's responses can be detached. SQLAlchemy only needs id to tell rows
+    apart, so the model keeps the single-column key SQLite requires.
+    """
     __tablename__ = "quiz_responses"
     
     id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False)
     question_number = Column(Integer, nullable=False)
     selected_answer = Column(String(1), nullable=True)  # 'A', 'B', 'C', 'D', or NULL
@@ -40,17 +80,71 @@ class QuizResponse(Base):
     is_correct = Column(Boolean, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    __table_args__ = (
+        # One answer per question per participant; also serves participant_id lookups.
+        # Unique indexes on a partitioned table must include the partition key.
+        Index("uq_quiz_responses_event_participant_question", "event_id", "participant_id", "question_number", unique=True),
+        # Covers the per-question analytics GROUP BY (index-only, already sorted)
+        Index(
+            "ix_quiz_responses_event_question_analytics",
+            "event_id", "question_number", "selected_answer", "is_correct", "time_taken"
+        ),
+    )
+
+class SubmissionReceipt(Base):
+    __tablename__ = "submission_receipts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    idempotency_key = Column(String(255), nullable=True, unique=True)  # Idempotency-Key header, if sent
+    score = Column(Integer, nullable=False)
+    total_questions = Column(Integer, nullable=False)
+    correct_answers = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+class QuestionSet(Base):
+    """A participant's draw from the question bank (QUIZ_MODE=bank), stored when first served and graded against"""
+    __tablename__ = "question_sets"
+    
+    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    question_numbers = Column(JSON, nullable=False)  # Bank question numbers, in the order served
+    option_orders = Column(JSON, nullable=False)  # Per question, the original option index shown as A, B, C and D
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+class ParticipantScore(Base):
+    """Per-participant totals over quiz_responses, kept current by the submit path"""
+    __tablename__ = "participant_scores"
+    
+    participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+    total_questions = Column(Integer, nullable=False, default=0)  # Questions answered
+    total_marks = Column(Integer, nullable=False, default=0)  # Correct answers
+    total_time_taken = Column(Integer, nullable=False, default=0)  # Sum of per-question times
+    avg_time = Column(Float, nullable=False, default=0)  # Average time per question
+    completed = Column(Boolean, nullable=False, default=False)  # Answered every question
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
 class Leaderboard(Base):
     __tablename__ = "leaderboard"
     
     id = Column(Integer, primary_key=True, index=True)
     participant_id = Column(Integer, ForeignKey("participants.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     total_questions = Column(Integer, nullable=False, default=0)
     total_marks = Column(Integer, nullable=False, default=0)
     total_time = Column(Integer, nullable=False, default=0)  # Sum of all response times
     avg_time = Column(Integer, nullable=False, default=0)  # Average time per question
-    rank_by_marks = Column(Integer, nullable=True, index=True)
-    rank_by_time = Column(Integer, nullable=True, index=True)
-    rank_combined = Column(Integer, nullable=True, index=True)
-    combined_score = Column(Float, nullable=True)  # Weighted score for combined ranking
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    # Ranks aren't stored: they are positions in the orderings below, computed
+    # when read (see crud.get_toppers_by_marks and the rank index), so a
+    # submission only ever writes its own row
+
+    __table_args__ = (
+        # Every leaderboard query is for one event, so each index leads with event_id.
+        # Ranking by marks (toppers, rank index) and keyset pagination of the admin listing
+        Index("ix_leaderboard_event_keyset", "event_id", total_marks.desc(), total_time, participant_id),
+        # Ranking by time, and the event's max total_time for the combined score
+        Index("ix_leaderboard_event_total_time", "event_id", "total_time"),
+    )
@@ -0,0 +1,47 @@
+import base64
+import json
+from collections import namedtuple
+from sqlalchemy import and_, or_
+
+# Position of the last row of a page in the (total_marks desc, total_time asc,
+# participant_id asc) ordering shared by the admin listings, plus its rank so
+# the next page can continue numbering where this one stopped
+Cursor = namedtuple("Cursor", ["total_marks", "total_time", "participant_id", "rank"])
+
+def encode_cursor(total_marks: int, total_time: int, participant_id: int, rank: int):
+    """Opaque, URL-safe cursor for the row a page ended on"""
+    raw = json.dumps([total_marks, total_time, participant_id, rank], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Parse a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != 4 or not all(
+        isinstance(value, int) and not isinstance(value, bool) for value in values
+    ):
+        raise ValueError("Invalid cursor")
+    return Cursor(*values)
+
+def keyset_after(cursor: Cursor, total_marks, total_time, participant_id):
+    """
+    Filter for the rows after `cursor` in (total_marks desc, total_time asc,
+    participant_id asc) order.
+
+    Spelled out rather than as a row-value comparison because the marks
+    column sorts the other way round.
+    """
+    return or_(
+        total_marks < cursor.total_marks,
+        and_(
+            total_marks == cursor.total_marks,
+            or_(
+                total_time > cursor.total_time,
+                and_(total_time == cursor.total_time, participant_id > cursor.participant_id)
+            )
+        )
+    )
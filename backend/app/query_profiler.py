@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+# "log" profiles every request and prints the ones that repeat a statement
+# QUERY_PROFILE_REPEAT_THRESHOLD times or more (likely N+1 loops) or run more
+# than QUERY_PROFILE_BUDGET statements; "strict" also raises
+# QueryBudgetExceeded for them once the response is sent, which fails the
+# calling test under TestClient. "off" (default) adds no middleware, so no
+# call sites are looked up unless profile_queries() is used directly.
+# Statements are recorded by app.database's count_queries(), like the
+# per-request metrics.
+QUERY_PROFILE = os.getenv("QUERY_PROFILE", "off")
+QUERY_PROFILE_REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILE_REPEAT_THRESHOLD", "5"))
+QUERY_PROFILE_BUDGET = int(os.getenv("QUERY_PROFILE_BUDGET", "50"))
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIPPED_FILES = {os.path.join(APP_DIR, name) for name in ("query_profiler.py", "database.py", "metrics.py")}
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PLACEHOLDER_LIST = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")*\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement: str):
+    """SQL text with literals and placeholder lists collapsed, so repeats of one query compare equal"""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?)", statement)
+    return _VALUES_LIST.sub(r"\1", statement)
+
+def _call_site():
+    """file:line (function) of the innermost app frame that issued the statement"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in _SKIPPED_FILES:
+            return f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return "unknown"
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryProfile:
+    """Statements executed while a profile is active, read from its count_queries() log"""
+
+    def __init__(self, log):
+        self.log = log
+
+    @property
+    def statements(self):
+        """(normalized SQL, seconds, call site) of each statement so far"""
+        return [(normalize_statement(statement), seconds, site) for statement, seconds, site in self.log.statements]
+
+    @property
+    def count(self):
+        return len(self.log)
+
+    @property
+    def duration(self):
+        return self.log.duration
+
+    def repeated(self, threshold: int = QUERY_PROFILE_REPEAT_THRESHOLD):
+        """Statements run `threshold` times or more, most repeated first, with their call sites"""
+        statements = self.statements
+        counts = Counter(statement for statement, _, _ in statements)
+        return [
+            (statement, count, sorted({site for s, _, site in statements if s == statement}))
+            for statement, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, threshold: int = QUERY_PROFILE_REPEAT_THRESHOLD):
+        lines = [f"{self.count} statements in {self.duration * 1000:.1f} ms"]
+        for statement, count, sites in self.repeated(threshold):
+            lines.append(f"  {count}x {statement[:200]}")
+            lines.extend(f"     at {site}" for site in sites)
+        return "\n".join(lines)
+
+    def assert_budget(self, max_statements: int, repeat_threshold: int = None):
+        """Raise QueryBudgetExceeded if over budget, or if any statement repeats `repeat_threshold` times"""
+        if self.count > max_statements:
+            raise QueryBudgetExceeded(f"Query budget of {max_statements} exceeded: {self.report()}")
+        if repeat_threshold is not None and self.repeated(repeat_threshold):
+            raise QueryBudgetExceeded(f"Repeated statements (possible N+1): {self.report(repeat_threshold)}")
+
+@contextmanager
+def profile_queries():
+    """Record every statement executed in this context (a request, a test) with its call site"""
+    from app.database import count_queries
+
+    with count_queries(call_site=_call_site) as log:
+        yield QueryProfile(log)
+
+@contextmanager
+def query_budget(max_statements: int, repeat_threshold: int = None):
+    """
+    Fail with QueryBudgetExceeded when the block runs more than
+    `max_statements` statements (or repeats one `repeat_threshold` times):
+
+        with query_budget(6, repeat_threshold=3):
+            crud.save_quiz_submissions(db, submissions)
+
+    Only sees statements run in the current context; requests made through
+    TestClient are served from another thread, so use QUERY_PROFILE=strict
+    (or the X-Query-Count header) for those.
+    """
+    with profile_queries() as profile:
+        yield profile
+    profile.assert_budget(max_statements, repeat_threshold)
+
+class QueryProfilerMiddleware:
+    """Profiles each request and reports those over budget or with repeated statements"""
+
+    def __init__(self, app, threshold: int = QUERY_PROFILE_REPEAT_THRESHOLD, budget: int = QUERY_PROFILE_BUDGET,
+                 strict: bool = QUERY_PROFILE == "strict"):
+        self.app = app
+        self.threshold = threshold
+        self.budget = budget
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                # Statements run before the response started (all of them, unless streamed)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-query-count", str(profile.count).encode())]
+            await send(message)
+
+        with profile_queries() as profile:
+            await self.app(scope, receive, send_with_count)
+
+        if profile.count > self.budget or profile.repeated(self.threshold):
+            print(f"[query profile] {scope['method']} {scope['path']}: {profile.report(self.threshold)}")
+            if self.strict:
+                profile.assert_budget(self.budget, self.threshold)
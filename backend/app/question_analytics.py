@@ -0,0 +1,134 @@
+import math
+import os
+import threading
+import time
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app import models, schemas
+
+# Seconds a worker serves its cached analytics before recomputing them.
+# Submissions and uploads invalidate the cache in the worker that handled
+# them; the TTL bounds how stale the other workers' copies can get.
+QUESTION_ANALYTICS_TTL = float(os.getenv("QUESTION_ANALYTICS_TTL", "30"))
+
+PERCENTILES = (50, 90, 95, 99)
+OPTIONS = ("A", "B", "C", "D")
+
+class QuestionAnalytics:
+    """
+    Per-worker cache of the serialized GET /api/admin/questions/analytics
+    response, per event.
+
+    Computed from a single GROUP BY over the event's quiz_responses on
+    (question_number, selected_answer, is_correct, time_taken), which
+    yields at most a few hundred rows per question however many responses
+    there are: time_taken is a whole number of seconds between 0 and 10,
+    so its percentiles come from the per-second counts.
+    """
+
+    def __init__(self, ttl: float = QUESTION_ANALYTICS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # event_id -> (body, loaded_at)
+        self._generation = 0
+
+    def get(self, db: Session, event_id: int):
+        """Return the event's JSON body, recomputing it if the cache is empty or expired"""
+        body = self._fresh_body(event_id)
+        if body is None:
+            with self._lock:
+                body = self._fresh_body(event_id)
+                if body is None:
+                    generation = self._generation
+                    body = self._load(db, event_id)
+                    # Don't keep a result an invalidate() raced with
+                    if generation == self._generation:
+                        self._entries[event_id] = body, time.monotonic()
+        return body
+
+    def invalidate(self, event_id: int = None):
+        """Drop the event's cached analytics (every event's without one) so the next request recomputes them"""
+        self._generation += 1
+        if event_id is None:
+            self._entries = {}
+        else:
+            self._entries.pop(event_id, None)
+
+    def _fresh_body(self, event_id: int):
+        entry = self._entries.get(event_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def _load(self, db: Session, event_id: int):
+        QuizResponse = models.QuizResponse
+        rows = db.query(
+            QuizResponse.question_number,
+            QuizResponse.selected_answer,
+            QuizResponse.is_correct,
+            QuizResponse.time_taken,
+            func.count()
+        ).filter(
+            QuizResponse.event_id == event_id
+        ).group_by(
+            QuizResponse.question_number,
+            QuizResponse.selected_answer,
+            QuizResponse.is_correct,
+            QuizResponse.time_taken
+        ).all()
+
+        # Every current question appears, answered or not. Read from this
+        # session rather than the answer key, which a replica session must
+        # not fill: submissions are graded against it.
+        numbers = db.query(models.Question.question_number).filter(models.Question.event_id == event_id).all()
+        stats = {number: _empty_stats() for (number,) in numbers}
+        for question_number, selected_answer, is_correct, time_taken, count in rows:
+            entry = stats.setdefault(question_number, _empty_stats())
+            entry["responses"] += count
+            if is_correct:
+                entry["correct"] += count
+            entry["distribution"][selected_answer if selected_answer in OPTIONS else "blank"] += count
+            if time_taken is not None:
+                entry["times"][time_taken] = entry["times"].get(time_taken, 0) + count
+
+        questions = [_entry(number, stats[number]) for number in sorted(stats)]
+        return schemas.QuestionAnalyticsResponse(
+            questions=questions,
+            total_responses=sum(entry.responses for entry in questions)
+        ).model_dump_json().encode()
+
+def _empty_stats():
+    return {"responses": 0, "correct": 0, "distribution": dict.fromkeys(OPTIONS + ("blank",), 0), "times": {}}
+
+def _entry(question_number: int, stats: dict):
+    responses = stats["responses"]
+    return schemas.QuestionAnalyticsEntry(
+        question_number=question_number,
+        responses=responses,
+        correct=stats["correct"],
+        percent_correct=round(stats["correct"] / responses * 100, 2) if responses else 0.0,
+        distribution=schemas.AnswerDistribution(**stats["distribution"]),
+        time_taken=_time_percentiles(stats["times"])
+    )
+
+def _time_percentiles(times: dict):
+    """Nearest-rank percentiles and mean of a {seconds: count} histogram"""
+    timed = sum(times.values())
+    if not timed:
+        return schemas.TimeTakenPercentiles()
+
+    values = sorted(times.items())
+    percentiles = {}
+    for p in PERCENTILES:
+        needed = math.ceil(p / 100 * timed)
+        seen = 0
+        for seconds, count in values:
+            seen += count
+            if seen >= needed:
+                percentiles[f"p{p}"] = seconds
+                break
+
+    average = sum(seconds * count for seconds, count in values) / timed
+    return schemas.TimeTakenPercentiles(avg=round(average, 2), **percentiles)
+
+question_analytics = QuestionAnalytics()
@@ -0,0 +1,211 @@
+import hashlib
+import itertools
+import os
+import random
+import threading
+import orjson
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.question_cache import questions_version, questions_version_async
+
+# "fixed" asks everyone every question in order; "bank" gives each
+# participant QUESTION_SET_SIZE questions drawn from the whole question
+# table, with the options shuffled. The draw is derived from the
+# participant_id and QUESTION_SET_SEED, and stored in question_sets the
+# first time the participant's questions are served, so they are graded on
+# exactly the set they saw, whichever worker serves them and whatever
+# uploads happen in between.
+QUIZ_MODE = os.getenv("QUIZ_MODE", "fixed")
+QUESTION_SET_SIZE = int(os.getenv("QUESTION_SET_SIZE", "10"))
+QUESTION_SET_SEED = os.getenv("QUESTION_SET_SEED", "indira-brainspark")
+
+# Marks are reported out of this many questions
+MARKS_OUT_OF = QUESTION_SET_SIZE if QUIZ_MODE == "bank" else 10
+
+OPTIONS = ("A", "B", "C", "D")
+# Every order the four options can be shown in; a draw picks one per question
+OPTION_ORDERS = list(itertools.permutations(range(4)))
+
+class QuestionBank:
+    """
+    Per-worker snapshot of each event's question bank for question-bank mode.
+
+    A participant's set is served as questions 1..QUESTION_SET_SIZE with
+    options A-D in their shuffled order; unshuffle() maps submitted answers
+    back through the stored set to the bank's question numbers and original
+    option letters, which the answer key then grades. Snapshots are tagged
+    with the event's questions_version and reloaded when it changes, like
+    the answer key. Serving a stored set reads the version and the set;
+    grading reads nothing, as submit_quiz fetches the set with the
+    participant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # event_id -> (numbers, questions, questions_version)
+
+    def get(self, db: Session, event_id: int, version: int = None):
+        """
+        Return the event's (numbers, questions) for questions_version
+        `version` (read from the database when not given), loading the bank
+        if the snapshot is empty or stale
+        """
+        if version is None:
+            version = questions_version(db, event_id)
+        entry = self._current_entry(event_id, version)
+        if entry is None:
+            with self._lock:
+                entry = self._current_entry(event_id, version)
+                if entry is None:
+                    entry = self._entries[event_id] = self._load(db, event_id, version)
+        return entry[0], entry[1]
+
+    async def get_async(self, db: AsyncSession, event_id: int, version: int = None):
+        """Same as get() for the async stack (lock-free, like QuestionCache.get_async)"""
+        if version is None:
+            version = await questions_version_async(db, event_id)
+        entry = self._current_entry(event_id, version)
+        if entry is None:
+            entry = self._entries[event_id] = await db.run_sync(self._load, event_id, version)
+        return entry[0], entry[1]
+
+    def invalidate(self, event_id: int = None):
+        """Drop the event's snapshot (every event's without one) so the next request reloads the bank"""
+        if event_id is None:
+            self._entries = {}
+        else:
+            self._entries.pop(event_id, None)
+
+    def questions_body(self, db: Session, event_id: int, participant_id: int):
+        """The participant's questions as a GET /api/quiz/questions JSON body"""
+        bank = self.get(db, event_id)
+        return self._questions_body(bank, self.served_set(db, event_id, participant_id, bank[0]))
+
+    async def questions_body_async(self, db: AsyncSession, event_id: int, participant_id: int):
+        bank = await self.get_async(db, event_id)
+        return self._questions_body(bank, await db.run_sync(self.served_set, event_id, participant_id, bank[0]))
+
+    def served_set(self, db: Session, event_id: int, participant_id: int, numbers: list):
+        """
+        The participant's (question numbers, option orders): the stored set,
+        or a new draw from `numbers` stored now. 404 unless the participant
+        belongs to the event.
+        """
+        found = db.query(models.Participant.event_id, models.QuestionSet).outerjoin(
+            models.QuestionSet,
+            models.Participant.id == models.QuestionSet.participant_id
+        ).filter(models.Participant.id == participant_id).first()
+
+        if found is None or found[0] != event_id:
+            raise HTTPException(status_code=404, detail="Participant not found")
+        if found[1] is not None:
+            return found[1].question_numbers, found[1].option_orders
+
+        chosen, orders = self.selection(numbers, participant_id)
+        if not chosen:
+            return chosen, orders  # Nothing uploaded yet: don't pin an empty set
+        db.add(models.QuestionSet(
+            participant_id=participant_id,
+            event_id=event_id,
+            question_numbers=chosen,
+            option_orders=[list(order) for order in orders]
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request stored the participant's set first
+            db.rollback()
+            stored = db.get(models.QuestionSet, participant_id)
+            return stored.question_numbers, stored.option_orders
+        return chosen, orders
+
+    def unshuffle(self, db: Session, event_id: int, participant_id: int, answers: list,
+                  question_set: models.QuestionSet = None, version: int = None):
+        """
+        Answers given by position (question_number 1..n) and displayed
+        letter, as answers to the bank's question numbers with the
+        original letters. Positions outside the participant's set are dropped.
+
+        `question_set` is the participant's stored set. Without one (their
+        questions were never served) the set is drawn from the current bank
+        for questions_version `version`.
+        """
+        if question_set is None:
+            return self._unshuffle(self.selection(self.get(db, event_id, version)[0], participant_id), answers)
+        return self._unshuffle((question_set.question_numbers, question_set.option_orders), answers)
+
+    async def unshuffle_async(self, db: AsyncSession, event_id: int, participant_id: int, answers: list,
+                              question_set: models.QuestionSet = None, version: int = None):
+        if question_set is None:
+            numbers = (await self.get_async(db, event_id, version))[0]
+            return self._unshuffle(self.selection(numbers, participant_id), answers)
+        return self._unshuffle((question_set.question_numbers, question_set.option_orders), answers)
+
+    def selection(self, numbers: list, participant_id: int):
+        """
+        The participant's draw: bank question numbers in the order served,
+        and for each the original option index shown as A, B, C and D
+        """
+        seed = int.from_bytes(hashlib.sha256(f"{QUESTION_SET_SEED}:{participant_id}".encode()).digest()[:8], "big")
+        rng = random.Random(seed)
+        chosen = rng.sample(numbers, min(QUESTION_SET_SIZE, len(numbers)))
+        return chosen, [OPTION_ORDERS[rng.randrange(len(OPTION_ORDERS))] for _ in chosen]
+
+    def _questions_body(self, bank, question_set):
+        questions = bank[1]
+        chosen, orders = question_set
+        # A question deleted since the set was stored is left out, keeping
+        # the other positions as served
+        return orjson.dumps({"questions": [
+            {
+                "question_number": position,
+                "text": questions[number][0],
+                "options": {letter: questions[number][1][index] for letter, index in zip(OPTIONS, order)}
+            }
+            for position, (number, order) in enumerate(zip(chosen, orders), start=1)
+            if number in questions
+        ]})
+
+    def _unshuffle(self, question_set, answers: list):
+        chosen, orders = question_set
+        mapped = []
+        for answer in answers:
+            position = answer.question_number - 1
+            if not 0 <= position < len(chosen):
+                continue
+            selected = answer.selected_answer
+            if selected is not None:
+                selected = OPTIONS[orders[position][OPTIONS.index(selected)]]
+            mapped.append(answer.model_copy(update={
+                "question_number": chosen[position],
+                "selected_answer": selected
+            }))
+        return mapped
+
+    def _current_entry(self, event_id: int, version: int):
+        entry = self._entries.get(event_id)
+        if entry is None or entry[2] != version:
+            return None
+        return entry
+
+    def _load(self, db: Session, event_id: int, version: int):
+        rows = db.query(
+            models.Question.question_number,
+            models.Question.text,
+            models.Question.option1_text,
+            models.Question.option2_text,
+            models.Question.option3_text,
+            models.Question.option4_text
+        ).filter(models.Question.event_id == event_id).order_by(models.Question.question_number).all()
+
+        numbers = [row.question_number for row in rows]
+        questions = {
+            row.question_number: (row.text, (row.option1_text, row.option2_text, row.option3_text, row.option4_text))
+            for row in rows
+        }
+        return numbers, questions, version
+
+question_bank = QuestionBank()
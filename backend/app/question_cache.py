@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+
+# Seconds a worker serves its cached questions (and its copy of the event
+# directory) before checking them against the database again. Changes
+# invalidate them immediately in the worker that handled them; the TTL
+# bounds how long the other workers can serve the old copy.
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", "30"))
+
+def questions_version(db: Session, event_id: int):
+    """
+    The event's questions_version, which every upload bumps in its own
+    transaction: a copy built from an older version is stale, whichever
+    worker handled the upload. One primary-key lookup.
+    """
+    return db.query(models.Event.questions_version).filter(models.Event.id == event_id).scalar()
+
+async def questions_version_async(db: AsyncSession, event_id: int):
+    result = await db.execute(select(models.Event.questions_version).where(models.Event.id == event_id))
+    return result.scalar()
+
+class QuestionCache:
+    """
+    Per-worker cache of the serialized GET /api/quiz/questions response.
+
+    Stores the JSON bytes once per event, together with an ETag derived
+    from the content, so repeated requests don't rebuild the pydantic
+    models. Within `ttl` seconds of loading or checking a copy, requests
+    are served from it without touching the database. After that the next
+    request reads the event's questions_version and reloads the questions
+    only if it changed. An upload invalidates this worker's copy at once
+    and reaches the other workers within `ttl`.
+    """
+
+    def __init__(self, ttl: float = QUESTION_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # event_id -> (etag, body, questions_version, checked_at)
+
+    def get(self, db: Session, event_id: int):
+        """Return (etag, body) for the event, loading its questions if the cache is empty or stale"""
+        entry = self._fresh_entry(event_id)
+        if entry is None:
+            with self._lock:
+                entry = self._fresh_entry(event_id)
+                if entry is None:
+                    version = questions_version(db, event_id)
+                    entry = self._checked_entry(event_id, version) or self._load(db, event_id, version)
+                    self._entries[event_id] = entry
+        return entry[0], entry[1]
+
+    async def get_async(self, db: AsyncSession, event_id: int):
+        """
+        Same as get() for the async stack. No lock here: holding a thread lock
+        across an await would block the event loop, and a duplicate load on a
+        cold cache is harmless.
+        """
+        entry = self._fresh_entry(event_id)
+        if entry is None:
+            version = await questions_version_async(db, event_id)
+            entry = self._checked_entry(event_id, version)
+            if entry is None:
+                entry = await db.run_sync(self._load, event_id, version)
+            self._entries[event_id] = entry
+        return entry[0], entry[1]
+
+    def invalidate(self, event_id: int = None):
+        """Drop the event's cached response (every event's without one) so the next request reloads it"""
+        if event_id is None:
+            self._entries = {}
+        else:
+            self._entries.pop(event_id, None)
+
+    def _fresh_entry(self, event_id: int):
+        entry = self._entries.get(event_id)
+        if entry is None or time.monotonic() - entry[3] >= self.ttl:
+            return None
+        return entry
+
+    def _checked_entry(self, event_id: int, version: int):
+        """The cached copy restamped as checked now if it is still `version`, else None"""
+        entry = self._entries.get(event_id)
+        if entry is None or entry[2] != version:
+            return None
+        return entry[:3] + (time.monotonic(),)
+
+    def _load(self, db: Session, event_id: int, version: int):
+        # Read after `version`, so at worst these are newer questions under
+        # an older version, which the next request replaces
+        questions = db.query(models.Question).filter(
+            models.Question.event_id == event_id
+        ).order_by(models.Question.question_number).all()
+
+        body = schemas.QuestionsListResponse(questions=[
+            schemas.QuestionResponse(
+                question_number=q.question_number,
+                text=q.text,
+                options=schemas.QuestionOption(
+                    A=q.option1_text,
+                    B=q.option2_text,
+                    C=q.option3_text,
+                    D=q.option4_text
+                )
+            )
+            for q in questions
+        ]).model_dump_json().encode()
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return etag, body, version, time.monotonic()
+
+question_cache = QuestionCache()
@@ -0,0 +1,78 @@
+import csv
+import json
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from app import schemas
+
+# Question banks uploaded as a streamed body instead of one JSON document:
+#   application/x-ndjson  one QuestionUpload object per line
+#   text/csv              a header row with the QuestionUpload field names,
+#                         then one question per row (booleans as true/false)
+# Rows are parsed and validated as they arrive, so a large bank never has
+# to be held as a single list.
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+
+async def body_lines(request):
+    """Decoded lines of the request body (newline kept), read as the chunks arrive"""
+    pending = b""
+    first = True
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield _decode(line + b"\n", first)
+            first = False
+    if pending:
+        yield _decode(pending, first)
+
+async def ndjson_questions(lines):
+    """QuestionUpload per non-empty NDJSON line"""
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise _invalid(number, [{"type": "json_invalid", "loc": (), "msg": f"Invalid JSON: {e}", "input": line}])
+        yield _validate(number, row)
+
+async def csv_questions(lines):
+    """QuestionUpload per CSV record; quoted fields may span lines"""
+    header = None
+    number = 0
+    record = ""
+    async for line in lines:
+        record += line
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            continue
+        number += 1
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield _validate(number, dict(zip(header, values)))
+    if record.strip():
+        raise _invalid(number + 1, [{"type": "value_error", "loc": (), "msg": "Unterminated quoted field", "input": record}])
+
+def _decode(line: bytes, first: bool):
+    return line.decode("utf-8-sig" if first else "utf-8")
+
+def _validate(number: int, row):
+    try:
+        return schemas.QuestionUpload.model_validate(row)
+    except ValidationError as e:
+        raise _invalid(number, e.errors(include_url=False))
+
+def _invalid(number: int, errors: list):
+    """422 in FastAPI's usual shape, located by line number in the body"""
+    return RequestValidationError([
+        dict(error, loc=("body", number) + tuple(error.get("loc", ()))) for error in errors
+    ])
@@ -0,0 +1,317 @@
+import os
+import random
+import threading
+import time
+from sqlalchemy.orm import Session
+from app import models
+from app.database import SessionLocal
+
+# Seconds before a worker reloads its rank index from the leaderboard table.
+# Each worker updates its own index on the submissions it writes; the reload
+# picks up submissions written by the other workers.
+RANK_INDEX_TTL = float(os.getenv("RANK_INDEX_TTL", "30"))
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels: int, tail=None):
+        self.key = key
+        self.next = [tail] * levels
+        self.width = [1] * levels  # Positions skipped by following next[level]
+
+class SkipList:
+    """
+    Indexable skip list: a sorted sequence of distinct keys with O(log n)
+    insert, remove, rank (position of a key) and select (key at a position).
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self._tail = _Node(None, 0)
+        self._head = _Node(None, self.MAX_LEVELS, self._tail)
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls, keys):
+        """Build from keys already in ascending order in O(n)"""
+        skip_list = cls()
+        last = [skip_list._head] * cls.MAX_LEVELS
+        last_position = [0] * cls.MAX_LEVELS
+
+        for position, key in enumerate(keys, start=1):
+            node = _Node(key, cls._random_levels(), skip_list._tail)
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+            skip_list.size = position
+
+        for level in range(cls.MAX_LEVELS):
+            last[level].width[level] = skip_list.size + 1 - last_position[level]
+        return skip_list
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self._tail and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        new_node = _Node(key, self._random_levels(), self._tail)
+        steps = 0
+        for level in range(len(new_node.next)):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(len(new_node.next), self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self._tail and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._tail or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            chain[level].width[level] += target.width[level] - 1
+            chain[level].next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index(self, key):
+        """0-based position of `key`; raises KeyError if it isn't present"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self._tail and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+
+        if node.next[0] is self._tail or node.next[0].key != key:
+            raise KeyError(key)
+        return position
+
+    def __getitem__(self, position: int):
+        """Key at 0-based `position`"""
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+
+        remaining = position + 1
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+
+    @classmethod
+    def _random_levels(cls):
+        levels = 1
+        while levels < cls.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+
+class RankIndex:
+    """
+    Per-worker ranked copy of the leaderboard, one ranking per event,
+    ordered like the marks ranking (total_marks desc, total_time asc,
+    participant_id).
+
+    Answers "what is my rank" and top-k in O(log n) without touching the
+    database. Loaded from the leaderboard rows of events that aren't
+    archived at startup, updated by crud.save_quiz_submissions as
+    submissions are written, and reloaded after RANK_INDEX_TTL seconds to
+    catch up with the other workers. Reloads run in a background thread
+    while requests keep reading the current copy; the new one replaces it
+    in one step, with the updates made during the reload applied to it.
+    """
+
+    def __init__(self, ttl: float = RANK_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # Held by the one load in progress
+        self._ranked = {}  # event_id -> SkipList of the event's keys
+        self._keys = {}  # participant_id -> (event_id, key in its event's SkipList)
+        self._loaded = False
+        self._loaded_at = None
+        self._changes = None  # Changes made while a load runs, to apply to its result
+        self._reload_thread = None
+
+    def load(self, db: Session):
+        """Rebuild the index from the leaderboard table"""
+        with self._load_lock:
+            self._record_changes()
+            self._load(db)
+
+    def invalidate(self):
+        """Reload in the background on the next lookup (after a full leaderboard rebuild)"""
+        self._loaded_at = None
+
+    def remove_event(self, event_id: int):
+        """Drop an archived event's ranking at once (a reload would leave it out too)"""
+        with self._lock:
+            self._remove_event(self._ranked, self._keys, event_id)
+            if self._changes is not None:
+                self._changes.append((self._remove_event, event_id))
+
+    def update(self, participant_id: int, event_id: int, total_marks: int, total_time: int):
+        """Insert or move one participant after their submission is committed"""
+        entry = event_id, self._key(participant_id, total_marks, total_time)
+        with self._lock:
+            self._update(self._ranked, self._keys, participant_id, entry)
+            if self._changes is not None:
+                self._changes.append((self._update, participant_id, entry))
+
+    def position(self, db: Session, participant_id: int, neighbours: int = 2):
+        """
+        Rank within the participant's event, percentile and the participants
+        ranked just above and below.
+
+        Returns None if the participant isn't on the leaderboard. Percentile
+        is the share of the event's participants ranked at or below this one.
+        """
+        self._ensure_fresh(db)
+        with self._lock:
+            entry = self._keys.get(participant_id)
+            if entry is None:
+                return None
+
+            event_id, key = entry
+            ranked = self._ranked[event_id]
+            index = ranked.index(key)
+            total = len(ranked)
+            nearby = range(max(0, index - neighbours), min(total, index + neighbours + 1))
+            return {
+                "participant_id": participant_id,
+                "event_id": event_id,
+                "rank": index + 1,
+                "total_participants": total,
+                "percentile": round((total - index) / total * 100, 2),
+                "total_marks": -key[0],
+                "total_time": key[1],
+                "neighbours": [self._entry(i, ranked[i]) for i in nearby if i != index]
+            }
+
+    def top(self, db: Session, event_id: int, k: int):
+        """The event's first k entries, best first"""
+        self._ensure_fresh(db)
+        with self._lock:
+            ranked = self._ranked.get(event_id, SkipList())
+            return [self._entry(i, ranked[i]) for i in range(min(k, len(ranked)))]
+
+    def _ensure_fresh(self, db: Session):
+        if not self._loaded:
+            # Nothing to serve meanwhile (the startup load failed): load in this request
+            self.load(db)
+            return
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            self._reload_in_background()
+
+    def _reload_in_background(self):
+        if not self._load_lock.acquire(blocking=False):
+            return  # Already loading
+        self._record_changes()
+
+        def reload():
+            db = SessionLocal()
+            try:
+                self._load(db)
+            except Exception as e:
+                print(f"Error reloading the rank index, retrying on the next lookup: {e}")
+            finally:
+                db.close()
+                self._load_lock.release()
+
+        self._reload_thread = threading.Thread(target=reload, name="rank-index-reload", daemon=True)
+        self._reload_thread.start()
+
+    def _record_changes(self):
+        """Keep the updates made from here on, which the rows being loaded may miss"""
+        with self._lock:
+            self._changes = []
+
+    def _load(self, db: Session):
+        """
+        Build a new index from the leaderboard rows and swap it in (caller
+        holds _load_lock and has called _record_changes)
+        """
+        try:
+            keys = {row.participant_id: (row.event_id, self._key(*row[:3])) for row in self._rows(db)}
+            by_event = {}
+            for event_id, key in keys.values():
+                by_event.setdefault(event_id, []).append(key)
+            ranked = {event_id: SkipList.from_sorted(sorted(event_keys)) for event_id, event_keys in by_event.items()}
+
+            with self._lock:
+                # The rows may predate submissions written since the load began
+                for apply, *args in self._changes:
+                    apply(ranked, keys, *args)
+                self._ranked, self._keys = ranked, keys
+                self._loaded = True
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._changes = None
+
+    def _rows(self, db: Session):
+        return db.query(
+            models.Leaderboard.participant_id,
+            models.Leaderboard.total_marks,
+            models.Leaderboard.total_time,
+            models.Leaderboard.event_id
+        ).join(
+            models.Event,
+            models.Leaderboard.event_id == models.Event.id
+        ).filter(
+            models.Event.archived_at.is_(None)
+        ).all()
+
+    @staticmethod
+    def _update(ranked: dict, keys: dict, participant_id: int, entry: tuple):
+        old_entry = keys.get(participant_id)
+        if old_entry == entry:
+            return
+        if old_entry is not None:
+            ranked[old_entry[0]].remove(old_entry[1])
+        ranked.setdefault(entry[0], SkipList()).insert(entry[1])
+        keys[participant_id] = entry
+
+    @staticmethod
+    def _remove_event(ranked: dict, keys: dict, event_id: int):
+        removed = ranked.pop(event_id, None)
+        if removed is not None:
+            for participant_id in [pid for pid, entry in keys.items() if entry[0] == event_id]:
+                del keys[participant_id]
+
+    def _key(self, participant_id: int, total_marks: int, total_time: int):
+        return (-total_marks, total_time, participant_id)
+
+    def _entry(self, index: int, key: tuple):
+        return {
+            "rank": index + 1,
+            "participant_id": key[2],
+            "total_marks": -key[0],
+            "total_time": key[1]
+        }
+
+rank_index = RankIndex()
@@ -1,26 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app import crud, schemas
-from app.database import get_db
-from typing import List
+from app import crud, export, question_import, schemas
+from app.database import get_db, get_read_db, read_session
+from app.events import event_directory
+from app.leaderboard_feed import leaderboard_feed
+from app.question_analytics import question_analytics
+from app.question_bank import MARKS_OUT_OF
+from app.rank_index import rank_index
+from app.pagination import decode_cursor, encode_cursor
+from app.submission_buffer import SUBMIT_MODE, submission_buffer
+from typing import List, Optional
+import orjson
+
+# Rows fetched per round trip (and written per chunk) when streaming a listing
+STREAM_BATCH_SIZE = 500
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
-@router.post("/questions/upload", response_model=schemas.QuestionUploadResponse)
-def upload_questions(
-    question_data: schemas.BulkQuestionUpload,
-    db: Session = Depends(get_db)
-):
+@router.post(
+    "/questions/upload",
+    response_model=schemas.QuestionUploadResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {
+            "type": "object",
+            "properties": {"questions": {"type": "array", "items": schemas.QuestionUpload.model_json_schema()}},
+            "required": ["questions"]
+        }},
+        "application/x-ndjson": {"schema": {"type": "string", "description": "One question object per line"}},
+        "text/csv": {"schema": {"type": "string", "description": "Header row with the question fields, then one question per row"}}
+    }}}
+)
+async def upload_questions(request: Request, event_id: Optional[int] = None, db: Session = Depends(get_db)):
     """
     Bulk upload or update quiz questions.
     
-    - Accepts array of questions
-    - Updates existing questions (by question_number)
+    - Accepts {"questions": [...]} as JSON, or a streamed body with one
+      question per line (application/x-ndjson) or per row (text/csv, with
+      a header row of field names)
+    - Uploads to event_id, or to the active event when it is omitted
+    - Updates existing questions (by question_number within the event)
     - Creates new questions if they don't exist
+    - Written QUESTION_UPSERT_BATCH_SIZE at a time with INSERT ... ON
+      CONFLICT, all in one transaction (nothing is saved if a row is invalid)
     - Returns count of added/updated questions
     """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    
     try:
-        result = crud.bulk_create_questions(db, question_data.questions)
+        event_id = await run_in_threadpool(event_directory.resolve, db, event_id, open_only=True)
+        if content_type in question_import.NDJSON_TYPES + question_import.CSV_TYPES:
+            parse = question_import.ndjson_questions if content_type in question_import.NDJSON_TYPES else question_import.csv_questions
+            result = await upload_question_stream(db, event_id, parse(question_import.body_lines(request)))
+        else:
+            try:
+                question_data = schemas.BulkQuestionUpload.model_validate_json(await request.body())
+            except ValidationError as e:
+                raise RequestValidationError(
+                    [dict(error, loc=("body",) + tuple(error["loc"])) for error in e.errors(include_url=False)]
+                )
+            result = await run_in_threadpool(crud.bulk_create_questions, db, event_id, question_data.questions)
         
         return schemas.QuestionUploadResponse(
             message="Questions uploaded successfully",
@@ -28,20 +70,62 @@ def upload_questions(
             questions_updated=result["updated"],
             total_questions=result["total"]
         )
+    except (HTTPException, RequestValidationError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading questions: {str(e)}")
 
+async def upload_question_stream(db: Session, event_id: int, questions):
+    """Upsert parsed questions a batch at a time as they arrive, then commit them together"""
+    added = updated = 0
+    batch = []
+    try:
+        async for question in questions:
+            batch.append(question)
+            if len(batch) == crud.QUESTION_UPSERT_BATCH_SIZE:
+                counts = await run_in_threadpool(crud.upsert_questions, db, event_id, batch)
+                added, updated, batch = added + counts[0], updated + counts[1], []
+        if batch:
+            counts = await run_in_threadpool(crud.upsert_questions, db, event_id, batch)
+            added, updated = added + counts[0], updated + counts[1]
+    except BaseException:
+        await run_in_threadpool(db.rollback)
+        raise
+    return await run_in_threadpool(crud.finish_question_upload, db, event_id, added, updated)
+
+@router.get("/questions/analytics", response_model=schemas.QuestionAnalyticsResponse)
+def get_question_analytics(event_id: Optional[int] = None, db: Session = Depends(get_read_db)):
+    """
+    How each question of event_id (default: the active event) performed.
+    
+    - Per question: responses, correct answers and % correct, the A/B/C/D
+      and blank answer distribution, and time_taken percentiles (p50, p90,
+      p95, p99 in whole seconds) with the average
+    - Computed in one GROUP BY over quiz_responses and cached until the next
+      submission batch or question upload (or QUESTION_ANALYTICS_TTL seconds)
+    - Read from the replica when READ_DATABASE_URL is set
+    """
+    event_id = event_directory.resolve(db, event_id)
+    return Response(content=question_analytics.get(db, event_id), media_type="application/json")
+
 @router.post("/leaderboard/refresh", response_model=schemas.LeaderboardRefreshResponse)
-def refresh_leaderboard(db: Session = Depends(get_db)):
+def refresh_leaderboard(event_id: Optional[int] = None, db: Session = Depends(get_db)):
     """
-    Recalculate and update the leaderboard for all participants.
+    Recalculate and update the leaderboard for all participants of
+    event_id (default: the active event).
     
     - Calculates total marks and total time for each participant
-    - Updates ranks by marks, time, and combined score
-    - Should be called after quiz submissions or question updates
+    - Ranks follow from these totals when the leaderboard is read
+    - Only reads and writes the event's rows
+    - Use to repair totals after question updates or manual data changes
+    - 409 once the event is archived: its results are final, and on
+      PostgreSQL its responses are detached, so a rebuild would zero them
     """
+    event_id = event_directory.resolve(db, event_id, open_only=True)
     try:
-        participants_updated = crud.refresh_leaderboard(db)
+        participants_updated = crud.refresh_leaderboard(db, event_id)
+        rank_index.invalidate()
+        leaderboard_feed.notify(event_id)
         
         return schemas.LeaderboardRefreshResponse(
             message="Leaderboard refreshed successfully",
@@ -50,90 +134,353 @@ def refresh_leaderboard(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error refreshing leaderboard: {str(e)}")
 
+@router.get("/submissions/buffer", response_model=schemas.SubmissionBufferStatus)
+def get_submission_buffer_status():
+    """
+    Get the state of this worker's write-behind submission buffer.
+    
+    - depth: graded submissions queued but not yet written
+    - Only used when SUBMIT_MODE=buffered
+    """
+    return schemas.SubmissionBufferStatus(
+        mode=SUBMIT_MODE,
+        running=submission_buffer.running,
+        depth=submission_buffer.depth,
+        capacity=submission_buffer.capacity,
+        flushed_batches=submission_buffer.flushed_batches,
+        flushed_submissions=submission_buffer.flushed_submissions,
+        failed_submissions=submission_buffer.failed_submissions,
+        duplicate_submissions=submission_buffer.duplicate_submissions
+    )
+
 @router.get("/leaderboard", response_model=schemas.ToppersResponse)
 def get_leaderboard(
     limit: int = Query(default=100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    event_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get the complete leaderboard of all participants.
+    Get the complete leaderboard of all participants of event_id
+    (default: the active event).
     
     Ranking criteria:
     1. Highest total marks (more correct answers = better rank)
     2. Fastest total response time (tiebreaker - faster = better rank)
     
     Returns all participants sorted with toppers at the top.
+    
+    - Paged: pass next_cursor back as ?cursor= for the following page
+    - stream=true ignores limit and streams every remaining row
+      from a server-side cursor
+    - Read from the replica when READ_DATABASE_URL is set
     """
-    # Get all participants from leaderboard, ordered by performance
-    toppers_data = db.query(
-        crud.models.Leaderboard,
-        crud.models.Participant
-    ).join(
-        crud.models.Participant,
-        crud.models.Leaderboard.participant_id == crud.models.Participant.id
-    ).order_by(
-        crud.models.Leaderboard.total_marks.desc(),  # Higher marks first
-        crud.models.Leaderboard.total_time.asc()      # Faster time as tiebreaker
-    ).limit(limit).all()
-    
-    toppers = []
-    for rank, (leaderboard, participant) in enumerate(toppers_data, start=1):
-        toppers.append(
-            schemas.TopperEntry(
-                rank=rank,
-                participant_id=participant.id,
-                full_name=participant.full_name,
-                email=participant.email,
-                school_college=participant.school_college,
-                application_number=participant.application_number,
-                total_marks=leaderboard.total_marks,
-                total_time=float(leaderboard.total_time),
-                avg_time=float(leaderboard.avg_time),
-                total_questions=leaderboard.total_questions
-            )
+    after = parse_cursor(cursor)
+    event_id = event_directory.resolve(db, event_id)
+    
+    if stream:
+        return stream_listing(
+            "toppers", {"category": "leaderboard"},
+            lambda stream_db: crud.leaderboard_query(stream_db, event_id, after),
+            topper_entry, after
         )
     
-    return schemas.ToppersResponse(
-        category="leaderboard",
-        total_participants=len(toppers),
-        toppers=toppers
+    toppers_data = crud.leaderboard_query(db, event_id, after).limit(limit).all()
+    
+    start = after.rank if after else 0
+    toppers = [
+        topper_entry(rank, row)
+        for rank, row in enumerate(toppers_data, start=start + 1)
+    ]
+    
+    # Same shape as schemas.ToppersResponse, encoded without the models
+    return json_response({
+        "category": "leaderboard",
+        "total_participants": len(toppers),
+        "toppers": toppers,
+        "next_cursor": next_cursor(toppers, limit)
+    })
+
+@router.get("/leaderboard/stream")
+async def stream_leaderboard(event_id: Optional[int] = None):
+    """
+    Live top of the leaderboard of event_id (default: the active event)
+    as Server-Sent Events.
+    
+    - First event is a "snapshot": {"marks": [...], "combined": [...]}
+      with the top LEADERBOARD_PUSH_SIZE entries of each ranking
+    - Then a "diff" event whenever they change, per changed category:
+      {"size": n, "changed": [entries whose position changed]}
+      (apply by rank, then truncate to size); a subscriber that falls
+      behind gets a fresh "snapshot" instead
+    - Bursts of submissions are coalesced into at most one update per
+      LEADERBOARD_PUSH_INTERVAL seconds
+    """
+    event_id = await run_in_threadpool(resolve_event, event_id)
+    return StreamingResponse(
+        leaderboard_feed.subscribe(event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/participants/scores", response_model=schemas.ParticipantsScoresResponse)
-def get_participants_with_scores(db: Session = Depends(get_db)):
+def get_participants_with_scores(
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    event_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
     """
-    Get all participants with their scores, sorted by marks (toppers first).
+    Get all participants of event_id (default: the active event) with
+    their scores, sorted by marks (toppers first).
     
     - Returns all participants with their quiz performance
-    - Sorted by total_marks (descending), then avg_time (ascending)
+    - Sorted by total_marks (descending), then total_time (ascending)
     - Includes rank, marks, percentage, and contact info
     - Used for admin dashboard and PDF export
+    - Without limit the whole list is streamed from a server-side cursor;
+      with limit one page is returned, continued with ?cursor=next_cursor
+    - Read from the replica when READ_DATABASE_URL is set
     """
-    results = crud.get_all_participants_with_scores(db)
+    after = parse_cursor(cursor)
+    event_id = event_directory.resolve(db, event_id)
     
-    participants = []
-    for rank, result in enumerate(results, start=1):
-        # Calculate percentage strictly out of 10
-        total_m = result.total_marks or 0
-        percentage = (total_m / 10.0 * 100)
-        
-        participants.append(
-            schemas.ParticipantScoreEntry(
-                rank=rank,
-                participant_id=result.id,
-                full_name=result.full_name,
-                email=result.email,
-                school_college=result.school_college,
-                contact_number=result.contact_number,
-                application_number=result.application_number,
-                total_marks=total_m,
-                total_questions=10,  # Strictly out of 10
-                percentage=round(percentage, 2),
-                total_time=round(result.total_time or 0.0, 2)
-            )
+    if limit is None:
+        return stream_listing(
+            "participants", {},
+            lambda stream_db: crud.participants_with_scores_query(stream_db, event_id, after),
+            participant_score_entry, after
         )
     
-    return schemas.ParticipantsScoresResponse(
-        participants=participants,
-        total_participants=len(participants)
+    results = crud.participants_with_scores_query(db, event_id, after).limit(limit).all()
+    
+    start = after.rank if after else 0
+    participants = [
+        participant_score_entry(rank, result)
+        for rank, result in enumerate(results, start=start + 1)
+    ]
+    
+    # Same shape as schemas.ParticipantsScoresResponse, encoded without the models
+    return json_response({
+        "participants": participants,
+        "total_participants": len(participants),
+        "next_cursor": next_cursor(participants, limit)
+    })
+
+@router.get("/export")
+def export_results(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    rows: str = Query(default="participants", pattern="^(participants|responses)$"),
+    gzip: bool = False,
+    event_id: Optional[int] = None
+):
+    """
+    Download results as CSV or NDJSON, streamed from a server-side cursor.
+    
+    - Exports event_id, or the active event when it is omitted
+    - rows=participants: one row per participant with rank and scores
+      (same order and numbers as /participants/scores)
+    - rows=responses: one row per answered question, with the
+      participant's details and totals
+    - gzip=true compresses the stream (served as a .gz file)
+    - Memory use is constant however many rows are exported
+    - Read from the replica when READ_DATABASE_URL is set
+    """
+    event_id = resolve_event(event_id)
+    encode, media_type = export.ENCODERS[format]
+    if rows == "participants":
+        columns, make_query, to_values = export.PARTICIPANT_COLUMNS, crud.participants_with_scores_query, export.participant_rows
+    else:
+        columns, make_query, to_values = export.RESPONSE_COLUMNS, crud.responses_export_query, export.response_rows
+    
+    def generate():
+        db = read_session()
+        try:
+            chunks = encode(columns, to_values(make_query(db, event_id).yield_per(export.EXPORT_BATCH_SIZE)))
+            yield from export.gzip_chunks(chunks) if gzip else chunks
+        finally:
+            db.close()
+    
+    filename = f"quiz-event-{event_id}-{rows}.{format}"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
+
+@router.get("/events", response_model=schemas.EventListResponse)
+def list_events(db: Session = Depends(get_read_db)):
+    """
+    List every event, newest first.
+    
+    - is_active marks the event used when a request doesn't pass event_id
+    - archived_at is set once an event has been closed
+    """
+    return schemas.EventListResponse(events=crud.get_events(db))
+
+@router.post("/events", response_model=schemas.EventResponse)
+def create_event(event: schemas.EventCreate, db: Session = Depends(get_db)):
+    """
+    Create an event: a new run of the quiz with its own participants,
+    questions, responses and leaderboard.
+    
+    - Earlier events keep their data; nothing has to be cleared
+    - activate=true makes it the event used when a request doesn't pass
+      event_id (the other workers follow within QUESTION_CACHE_TTL seconds)
+    - On PostgreSQL also creates its quiz_responses partition
+    - Add its questions with POST /api/admin/questions/upload?event_id=
+    """
+    try:
+        return crud.create_event(db, event.name, event.activate)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating event: {str(e)}")
+
+@router.post("/events/{event_id}/activate", response_model=schemas.EventResponse)
+def activate_event(event_id: int, db: Session = Depends(get_db)):
+    """
+    Make an event the active one, used when a request doesn't pass event_id
+    (registration, questions, admin listings).
+    
+    - Archived events can't be activated
+    """
+    open_event(db, event_id)
+    crud.activate_event(db, event_id)
+    return crud.get_event(db, event_id)
+
+@router.post("/events/{event_id}/archive", response_model=schemas.EventArchiveResponse)
+def archive_event(event_id: int, db: Session = Depends(get_db)):
+    """
+    Close an event: no more registrations or submissions.
+    
+    - The active event can't be archived; activate the next one first
+    - On PostgreSQL its quiz_responses partition is detached, which only
+      locks quiz_responses briefly and copies no rows; it is returned as
+      archived_table, a standalone table to pg_dump and DROP when done
+    - Its participants, scores and leaderboard stay readable with ?event_id=
+    """
+    event = open_event(db, event_id)
+    if event.is_active:
+        raise HTTPException(status_code=409, detail="Activate another event before archiving the active one")
+    
+    try:
+        archived_table = crud.archive_event(db, event_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error archiving event: {str(e)}")
+    
+    return schemas.EventArchiveResponse(
+        message="Event archived successfully",
+        event_id=event_id,
+        archived_table=archived_table
+    )
+
+# The admin listings can run to tens of thousands of rows, so entries are
+# built as plain dicts with the fields of schemas.TopperEntry and
+# schemas.ParticipantScoreEntry and encoded with orjson, instead of
+# constructing a model per row and having FastAPI validate it again
+
+def topper_entry(rank: int, row):
+    return {
+        "rank": rank,
+        "participant_id": row.participant_id,
+        "full_name": row.full_name,
+        "email": row.email,
+        "school_college": row.school_college,
+        "application_number": row.application_number,
+        "total_marks": row.total_marks,
+        "total_time": float(row.total_time),
+        "avg_time": float(row.avg_time),
+        "total_questions": row.total_questions
+    }
+
+def participant_score_entry(rank: int, result):
+    # Calculate percentage strictly out of 10 (the set size in question-bank mode)
+    total_m = result.total_marks or 0
+    percentage = (total_m / float(MARKS_OUT_OF) * 100)
+    
+    return {
+        "rank": rank,
+        "participant_id": result.id,
+        "full_name": result.full_name,
+        "email": result.email,
+        "school_college": result.school_college,
+        "contact_number": result.contact_number,
+        "application_number": result.application_number,
+        "total_marks": total_m,
+        "total_questions": MARKS_OUT_OF,  # Strictly out of 10 (or the set size)
+        "percentage": float(round(percentage, 2)),
+        "total_time": float(round(result.total_time or 0.0, 2))
+    }
+
+def json_response(payload: dict):
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
+def open_event(db: Session, event_id: int):
+    """The event, read from the primary; 404 if it doesn't exist, 409 if it is archived"""
+    event = crud.get_event(db, event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.archived_at is not None:
+        raise HTTPException(status_code=409, detail="This event has been archived")
+    return event
+
+def resolve_event(event_id: Optional[int]):
+    """event_directory.resolve() for streaming routes, which have no request session"""
+    db = read_session()
+    try:
+        return event_directory.resolve(db, event_id)
+    finally:
+        db.close()
+
+def parse_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def next_cursor(entries: list, limit: int):
+    """Cursor for the page after `entries`, or None when this was the last one"""
+    if len(entries) < limit:
+        return None
+    last = entries[-1]
+    return encode_cursor(last["total_marks"], int(last["total_time"]), last["participant_id"], last["rank"])
+
+def stream_listing(key: str, fields: dict, make_query, make_entry, after):
+    """
+    Stream {**fields, key: [...], "total_participants": n} as JSON.
+    
+    Rows are fetched STREAM_BATCH_SIZE at a time from a server-side cursor
+    and written out as they arrive, so memory stays flat however many
+    participants there are. Uses its own session because the request's
+    one is closed before the body is sent.
+    """
+    def generate():
+        db = read_session()
+        try:
+            head = orjson.dumps(fields)[1:-1]
+            yield b"{" + head + (b"," if head else b"") + orjson.dumps(key) + b":["
+            
+            start = after.rank if after else 0
+            count = 0
+            batch = []
+            separator = b""
+            for row in make_query(db).yield_per(STREAM_BATCH_SIZE):
+                count += 1
+                batch.append(orjson.dumps(make_entry(start + count, row)))
+                if len(batch) == STREAM_BATCH_SIZE:
+                    yield separator + b",".join(batch)
+                    batch, separator = [], b","
+            if batch:
+                yield separator + b",".join(batch)
+            
+            yield b'],"total_participants":' + orjson.dumps(count) + b"}"
+        finally:
+            db.close()
+    
+    return StreamingResponse(generate(), media_type="application/json")
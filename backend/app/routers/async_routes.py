@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import async_crud, schemas
+from app.database import get_async_db, count_queries
+from app.events import event_directory
+from app.metrics import submit_phase
+from app.answer_key import answer_key
+from app.question_cache import question_cache
+from app.question_bank import QUIZ_MODE, question_bank
+from app.routers.participants import registration_conflict
+from app.routers.quiz import (
+    questions_response, require_participant, unique_answers, build_submission, buffer_submission,
+    replay_submission, submission_conflict, submission_failed, submission_result
+)
+from typing import Optional
+
+# Async versions of the hot endpoints, mounted ahead of the sync routers
+# when DB_STACK=async so they take over the same paths
+router = APIRouter(prefix="/api", tags=["async"])
+
+@router.post("/participants", response_model=schemas.ParticipantResponse)
+async def register_participant(participant: schemas.ParticipantCreate, db: AsyncSession = Depends(get_async_db)):
+    """Register a new participant for the quiz (async stack)"""
+    event_id = await event_directory.resolve_async(db, participant.event_id, open_only=True)
+    try:
+        participant_id = await async_crud.create_participant(db, event_id, participant)
+    except IntegrityError as e:
+        raise registration_conflict(e)
+    except PoolTimeoutError:
+        raise  # Answered with 503 + Retry-After by the app's handler
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+    
+    return schemas.ParticipantResponse(
+        participant_id=participant_id,
+        event_id=event_id,
+        message="Registration successful"
+    )
+
+@router.get("/quiz/questions", response_model=schemas.QuestionsListResponse)
+async def get_questions(
+    request: Request,
+    participant_id: Optional[int] = None,
+    event_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the event's quiz questions from the question cache, or the participant's draw in bank mode (async stack)"""
+    event_id = await event_directory.resolve_async(db, event_id)
+    if QUIZ_MODE == "bank":
+        return Response(
+            content=await question_bank.questions_body_async(db, event_id, require_participant(participant_id)),
+            media_type="application/json",
+            headers={"Cache-Control": "private, no-cache"}
+        )
+    
+    etag, body = await question_cache.get_async(db, event_id)
+    return questions_response(request, etag, body)
+
+@router.post("/quiz/submit", response_model=schemas.QuizSubmitResponse)
+async def submit_quiz(
+    quiz_data: schemas.QuizSubmit,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Submit quiz responses and calculate score (async stack)"""
+    found = await async_crud.get_participant_with_receipt(db, quiz_data.participant_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Participant not found")
+    
+    if found[1]:
+        return replay_submission(found[1], idempotency_key, response)
+    
+    event_id = await event_directory.resolve_async(db, found[0].event_id, open_only=True)
+    
+    answers = unique_answers(quiz_data.responses)
+    with submit_phase("grading"), count_queries() as grading_queries:
+        if QUIZ_MODE == "bank":
+            answers = await question_bank.unshuffle_async(
+                db, event_id, quiz_data.participant_id, answers, found[3], found[2]
+            )
+        graded = await answer_key.grade_async(db, event_id, answers, found[2])
+    response.headers["X-Grading-Queries"] = str(len(grading_queries))
+    
+    submission = build_submission(quiz_data, event_id, answers, graded, idempotency_key)
+    
+    buffered = buffer_submission(submission, idempotency_key, response)
+    if buffered is not None:
+        return buffered
+    
+    try:
+        await async_crud.save_quiz_submissions(db, [submission])
+    except IntegrityError:
+        receipt = await async_crud.get_submission_receipt(db, quiz_data.participant_id)
+        if receipt:
+            return replay_submission(receipt, idempotency_key, response)
+        raise submission_conflict()
+    except Exception as e:
+        print(f"Error saving quiz submission for participant {quiz_data.participant_id}: {e}")
+        raise submission_failed()
+    
+    return submission_result(submission)
@@ -1,49 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, TimeoutError as PoolTimeoutError
 from app import crud, schemas
 from app.database import get_db
+from app.events import event_directory
 
 router = APIRouter(prefix="/api/participants", tags=["participants"])
 
+EMAIL_TAKEN = "Email already registered. Please use a different email address."
+APPLICATION_NUMBER_TAKEN = "Application ID already registered. Please use a different Application ID."
+
 @router.post("", response_model=schemas.ParticipantResponse)
 def register_participant(participant: schemas.ParticipantCreate, db: Session = Depends(get_db)):
     """
     Register a new participant for the quiz.
     
     - Validates all required fields
-    - Checks email uniqueness
-    - Returns participant_id on success
+    - Registers for event_id, or for the active event when it is omitted
+      (409 if the event has been archived)
+    - Rejects duplicate emails (case-insensitive) and application numbers
+      within the event via unique indexes, in a single INSERT
+    - Returns participant_id and event_id on success
     """
-    # Check if email already exists
-    existing_participant = crud.get_participant_by_email(db, participant.email)
-    if existing_participant:
-        raise HTTPException(
-            status_code=400,
-            detail="Email already registered. Please use a different email address."
-        )
-    
-    # Check if application number already exists
-    if participant.application_number:
-        existing_app_no = crud.get_participant_by_application_number(db, participant.application_number)
-        if existing_app_no:
-            raise HTTPException(
-                status_code=400,
-                detail="Application ID already registered. Please use a different Application ID."
-            )
-    
+    event_id = event_directory.resolve(db, participant.event_id, open_only=True)
     try:
-        db_participant = crud.create_participant(db, participant)
-        return schemas.ParticipantResponse(
-            participant_id=db_participant.id,
-            message="Registration successful"
-        )
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=400,
-            detail="Email already registered. Please use a different email address."
-        )
+        participant_id = crud.create_participant(db, event_id, participant)
+    except IntegrityError as e:
+        raise registration_conflict(e)
+    except PoolTimeoutError:
+        raise  # Answered with 503 + Retry-After by the app's handler
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+    
+    return schemas.ParticipantResponse(
+        participant_id=participant_id,
+        event_id=event_id,
+        message="Registration successful"
+    )
+
+def registration_conflict(error: IntegrityError):
+    """400 naming the duplicate field; shared with the async registration route"""
+    if crud.get_conflicting_field(error) == "application_number":
+        return HTTPException(status_code=400, detail=APPLICATION_NUMBER_TAKEN)
+    return HTTPException(status_code=400, detail=EMAIL_TAKEN)
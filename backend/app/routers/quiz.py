@@ -1,126 +1,247 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from app import crud, schemas, models
-from app.database import get_db
-from typing import List
+from app.database import get_db, count_queries
+from app.events import event_directory
+from app.metrics import SUBMISSIONS, submit_phase
+from app.answer_key import answer_key
+from app.submission_buffer import SUBMIT_MODE, submission_buffer
+from app.question_cache import question_cache
+from app.question_bank import QUIZ_MODE, question_bank
+from app.rank_index import rank_index
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/quiz", tags=["quiz"])
 
 @router.get("/questions", response_model=schemas.QuestionsListResponse)
-def get_questions(db: Session = Depends(get_db)):
+def get_questions(
+    request: Request,
+    participant_id: Optional[int] = None,
+    event_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
     """
     Get all 10 quiz questions with their options.
     
+    - Returns the questions of event_id (the participant's event, as
+      returned on registration), or of the active event when it is omitted
     - Returns questions in order (1-10)
     - Does NOT reveal which option is correct
+    - Served from the per-worker question cache with an ETag;
+      a matching If-None-Match gets 304 Not Modified. Served without
+      queries; an upload applies at once on the worker that handled it
+      and within QUESTION_CACHE_TTL seconds on the others
+    - With QUIZ_MODE=bank, returns the participant's own draw from the
+      question bank (participant_id required), numbered 1..QUESTION_SET_SIZE
+      with shuffled options, built from the in-memory bank snapshot; the
+      draw is stored when first served and graded against on submit
     """
-    questions = crud.get_all_questions(db)
-    
-    if not questions:
-        return schemas.QuestionsListResponse(questions=[])
-    
-    questions_response = []
-    for q in questions:
-        questions_response.append(
-            schemas.QuestionResponse(
-                question_number=q.question_number,
-                text=q.text,
-                options=schemas.QuestionOption(
-                    A=q.option1_text,
-                    B=q.option2_text,
-                    C=q.option3_text,
-                    D=q.option4_text
-                )
-            )
+    event_id = event_directory.resolve(db, event_id)
+    if QUIZ_MODE == "bank":
+        return Response(
+            content=question_bank.questions_body(db, event_id, require_participant(participant_id)),
+            media_type="application/json",
+            headers={"Cache-Control": "private, no-cache"}
         )
     
-    return schemas.QuestionsListResponse(questions=questions_response)
+    etag, body = question_cache.get(db, event_id)
+    return questions_response(request, etag, body)
 
 @router.post("/submit", response_model=schemas.QuizSubmitResponse)
-def submit_quiz(quiz_data: schemas.QuizSubmit, db: Session = Depends(get_db)):
+def submit_quiz(
+    quiz_data: schemas.QuizSubmit,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db)
+):
     """
     Submit quiz responses and calculate score.
     
     - Accepts participant_id and array of responses
-    - Calculates correctness for each answer
-    - Stores all responses in database
-    - Automatically refreshes leaderboard
+    - Idempotent: a retry (optionally carrying the same Idempotency-Key
+      header) returns the original result without re-grading or touching
+      the leaderboard; a different key for the same participant gets 409
+    - Grades answers against the cached answer key of the participant's
+      event, checked against the questions_version read with the
+      participant (no grading queries once the key is loaded; the
+      X-Grading-Queries header reports the SQL statements grading needed);
+      409 once the event is archived
+    - Stores all responses and the leaderboard update in one transaction
+      (all or nothing); with SUBMIT_MODE=buffered the write is queued and
+      group-committed in the background, and a retry while it waits gets
+      the queued result (or 409 for a different Idempotency-Key)
     - Returns total score
     """
-    # Verify participant exists
-    participant = db.query(models.Participant).filter(
-        models.Participant.id == quiz_data.participant_id
-    ).first()
+    # Verify participant exists and hasn't already submitted
+    found = crud.get_participant_with_receipt(db, quiz_data.participant_id)
     
-    if not participant:
+    if not found:
         raise HTTPException(status_code=404, detail="Participant not found")
     
-    correct_count = 0
-    total_questions = len(quiz_data.responses)
-    
-    # Process each response
-    for response in quiz_data.responses:
-        # Get the question to check correct answer
-        question = crud.get_question_by_number(db, response.question_number)
-        
-        if not question:
-            continue
-        
-        # Determine if answer is correct
-        is_correct = False
-        if response.selected_answer:
-            option_map = {
-                'A': question.option1_is_correct,
-                'B': question.option2_is_correct,
-                'C': question.option3_is_correct,
-                'D': question.option4_is_correct
-            }
-            is_correct = option_map.get(response.selected_answer, False)
-            if is_correct:
-                correct_count += 1
-        
-        # Save response to database
-        try:
-            crud.create_quiz_response(
-                db=db,
-                participant_id=quiz_data.participant_id,
-                question_number=response.question_number,
-                selected_answer=response.selected_answer,
-                time_taken=response.time_taken,
-                is_correct=is_correct
-            )
-        except Exception as e:
-            # Continue even if one response fails
-            print(f"Error saving response for question {response.question_number}: {e}")
-            continue
-    
-    # Update or create leaderboard entry with the exact total_time_taken
+    if found[1]:
+        return replay_submission(found[1], idempotency_key, response)
+    
+    event_id = event_directory.resolve(db, found[0].event_id, open_only=True)
+    
+    # Grade every answer in memory against the cached answer key (in
+    # question-bank mode after mapping them back to the bank's questions)
+    answers = unique_answers(quiz_data.responses)
+    with submit_phase("grading"), count_queries() as grading_queries:
+        if QUIZ_MODE == "bank":
+            answers = question_bank.unshuffle(db, event_id, quiz_data.participant_id, answers, found[3], found[2])
+        graded = answer_key.grade(db, event_id, answers, found[2])
+    response.headers["X-Grading-Queries"] = str(len(grading_queries))
+    
+    # Store all responses and the leaderboard update in one transaction
+    submission = build_submission(quiz_data, event_id, answers, graded, idempotency_key)
+    
+    # In buffered mode the flusher writes it later; fall back to a direct
+    # write when the buffer is full or not running
+    buffered = buffer_submission(submission, idempotency_key, response)
+    if buffered is not None:
+        return buffered
+    
     try:
-        leaderboard_entry = db.query(models.Leaderboard).filter(
-            models.Leaderboard.participant_id == quiz_data.participant_id
-        ).first()
-        if leaderboard_entry:
-            leaderboard_entry.total_time = quiz_data.total_time
-        else:
-            new_entry = models.Leaderboard(
-                participant_id=quiz_data.participant_id,
-                total_time=quiz_data.total_time
-            )
-            db.add(new_entry)
-        db.commit()
+        crud.save_quiz_submissions(db, [submission])
+    except IntegrityError:
+        # Lost the race against a concurrent copy of this submission
+        receipt = crud.get_submission_receipt(db, quiz_data.participant_id)
+        if receipt:
+            return replay_submission(receipt, idempotency_key, response)
+        raise submission_conflict()
     except Exception as e:
-        print(f"Error setting total_time on leaderboard: {e}")
+        print(f"Error saving quiz submission for participant {quiz_data.participant_id}: {e}")
+        raise submission_failed()
+    
+    return submission_result(submission)
 
-    # Automatically refresh leaderboard after quiz submission
-    try:
-        crud.refresh_leaderboard(db)
-    except Exception as e:
-        # Log error but don't fail the submission
-        print(f"Error refreshing leaderboard: {e}")
+@router.get("/rank/{participant_id}", response_model=schemas.ParticipantRankResponse)
+def get_participant_rank(
+    participant_id: int,
+    neighbours: int = Query(default=2, ge=0, le=10),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a participant's current rank on their event's leaderboard.
+    
+    - Ranked by total marks, then total time (same order as the admin leaderboard)
+    - Not available once the event is archived
+    - Returns rank, percentile and the participants ranked just above and below
+    - Served from the worker's in-memory rank index in O(log n); the
+      database is only read by the index's background reloads
+    """
+    position = rank_index.position(db, participant_id, neighbours)
+    
+    if position is None:
+        raise HTTPException(status_code=404, detail="Participant not on the leaderboard yet")
+    
+    return schemas.ParticipantRankResponse(**position)
+
+# Shared with the async versions of these routes in app/routers/async_routes.py
+
+def questions_response(request: Request, etag: str, body: bytes):
+    """Serve the cached questions body, or 304 when the client already has it"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
     
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def require_participant(participant_id: Optional[int]):
+    if participant_id is None:
+        raise HTTPException(status_code=400, detail="participant_id is required to get this participant's questions")
+    return participant_id
+
+def unique_answers(responses: list):
+    """Drop repeated answers to the same question, keeping the first"""
+    seen = set()
+    answers = []
+    for answer in responses:
+        if answer.question_number not in seen:
+            seen.add(answer.question_number)
+            answers.append(answer)
+    return answers
+
+def build_submission(
+    quiz_data: schemas.QuizSubmit, event_id: int, answers: list, graded: list, idempotency_key: Optional[str]
+):
+    """Graded submission as stored by crud.save_quiz_submissions, skipping unknown questions"""
+    correct_count = sum(1 for is_correct in graded if is_correct)
+    return {
+        "event_id": event_id,
+        "participant_id": quiz_data.participant_id,
+        "total_time": quiz_data.total_time,
+        "answers": [
+            {
+                "question_number": answer.question_number,
+                "selected_answer": answer.selected_answer,
+                "time_taken": answer.time_taken,
+                "is_correct": is_correct
+            }
+            for answer, is_correct in zip(answers, graded)
+            if is_correct is not None
+        ],
+        "receipt": {
+            "idempotency_key": idempotency_key,
+            "score": correct_count,
+            "total_questions": len(answers),
+            "correct_answers": correct_count
+        }
+    }
+
+def buffer_submission(submission: dict, idempotency_key: Optional[str], response: Response):
+    """
+    Queue the submission when SUBMIT_MODE=buffered and return its result,
+    or the replayed result of an earlier copy still waiting in the buffer.
+    None when the caller has to write it itself.
+    """
+    if SUBMIT_MODE != "buffered":
+        return None
+    queued = submission_buffer.submit(submission)
+    if queued is None:
+        return None
+    if queued is not submission:
+        return replay_submission(models.SubmissionReceipt(**queued["receipt"]), idempotency_key, response)
+    return submission_result(submission)
+
+def replay_submission(receipt: models.SubmissionReceipt, idempotency_key: Optional[str], response: Response):
+    """Return the stored result of an earlier submission instead of processing it again"""
+    if idempotency_key and receipt.idempotency_key and idempotency_key != receipt.idempotency_key:
+        raise submission_conflict()
+    SUBMISSIONS.inc("replayed")
+    response.headers["Idempotent-Replayed"] = "true"
+    return schemas.QuizSubmitResponse(
+        message="Quiz submitted successfully",
+        score=receipt.score,
+        total_questions=receipt.total_questions,
+        correct_answers=receipt.correct_answers
+    )
+
+def submission_conflict():
+    SUBMISSIONS.inc("conflict")
+    return HTTPException(
+        status_code=409,
+        detail="Quiz already submitted for this participant, or the Idempotency-Key was already used."
+    )
+
+def submission_failed():
+    SUBMISSIONS.inc("failed")
+    return HTTPException(
+        status_code=500,
+        detail="Quiz submission could not be saved and no answers were recorded. Please submit again."
+    )
+
+def submission_result(submission: dict):
+    SUBMISSIONS.inc("accepted")
+    receipt = submission["receipt"]
     return schemas.QuizSubmitResponse(
         message="Quiz submitted successfully",
-        score=correct_count,
-        total_questions=total_questions,
-        correct_answers=correct_count
+        score=receipt["score"],
+        total_questions=receipt["total_questions"],
+        correct_answers=receipt["correct_answers"]
     )
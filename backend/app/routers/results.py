@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app import crud, schemas
-from app.database import get_db
+from app.database import get_read_db
+from app.events import event_directory
+from typing import Optional
 
 router = APIRouter(prefix="/api/results", tags=["results"])
 
 @router.get("/statistics", response_model=schemas.StatisticsListResponse)
-def get_all_statistics(db: Session = Depends(get_db)):
+def get_all_statistics(event_id: Optional[int] = None, db: Session = Depends(get_read_db)):
     """
-    Get statistics for all participants.
+    Get statistics for all participants of event_id (default: the active event).
     
     Returns:
     - participant_id: Unique participant identifier
@@ -18,8 +20,10 @@ def get_all_statistics(db: Session = Depends(get_db)):
     - total_questions: Number of questions answered
     - total_marks: Total correct answers (marks scored)
     - avg_time: Average time taken per question in seconds
+    
+    Read from the replica when READ_DATABASE_URL is set.
     """
-    results = crud.get_all_participant_statistics(db)
+    results = crud.get_all_participant_statistics(db, event_directory.resolve(db, event_id))
     
     statistics = []
     for row in results:
@@ -1,5 +1,29 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
+from datetime import datetime
+
+# Event Schemas
+class EventCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    activate: bool = False  # Make it the event used when a request names none
+
+class EventResponse(BaseModel):
+    id: int
+    name: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class EventListResponse(BaseModel):
+    events: List[EventResponse]
+
+class EventArchiveResponse(BaseModel):
+    message: str
+    event_id: int
+    archived_table: Optional[str] = None  # Detached quiz_responses partition (PostgreSQL)
 
 # Participant Schemas
 class ParticipantCreate(BaseModel):
@@ -8,9 +32,11 @@ class ParticipantCreate(BaseModel):
     email: EmailStr
     school_college: str = Field(..., min_length=1, max_length=255)
     application_number: str = Field(..., min_length=1, max_length=255)
+    event_id: Optional[int] = None  # Defaults to the active event
 
 class ParticipantResponse(BaseModel):
     participant_id: int
+    event_id: int
     message: str
 
 # Question Schemas
@@ -103,11 +129,39 @@ class ToppersResponse(BaseModel):
     category: str  # "marks", "time", or "combined"
     total_participants: int
     toppers: List[TopperEntry]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
+class RankNeighbour(BaseModel):
+    rank: int
+    participant_id: int
+    total_marks: int
+    total_time: float
+
+class ParticipantRankResponse(BaseModel):
+    participant_id: int
+    event_id: int
+    rank: int  # Within the participant's event
+    total_participants: int
+    percentile: float  # Share of participants ranked at or below this one
+    total_marks: int
+    total_time: float
+    neighbours: List[RankNeighbour]  # Participants ranked just above and below
 
 class LeaderboardRefreshResponse(BaseModel):
     message: str
     participants_updated: int
 
+# Admin - Submission Buffer Schemas
+class SubmissionBufferStatus(BaseModel):
+    mode: str  # "sync" or "buffered"
+    running: bool
+    depth: int  # Submissions waiting to be written
+    capacity: int
+    flushed_batches: int
+    flushed_submissions: int
+    failed_submissions: int
+    duplicate_submissions: int
+
 # Admin - Participant Scores Schemas
 class ParticipantScoreEntry(BaseModel):
     rank: int
@@ -128,3 +182,31 @@ class ParticipantScoreEntry(BaseModel):
 class ParticipantsScoresResponse(BaseModel):
     participants: List[ParticipantScoreEntry]
     total_participants: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
+# Admin - Question Analytics Schemas
+class AnswerDistribution(BaseModel):
+    A: int
+    B: int
+    C: int
+    D: int
+    blank: int  # Answered without selecting an option (timed out)
+
+class TimeTakenPercentiles(BaseModel):
+    p50: Optional[int] = None  # Seconds; None when no response recorded a time
+    p90: Optional[int] = None
+    p95: Optional[int] = None
+    p99: Optional[int] = None
+    avg: Optional[float] = None
+
+class QuestionAnalyticsEntry(BaseModel):
+    question_number: int
+    responses: int
+    correct: int
+    percent_correct: float
+    distribution: AnswerDistribution
+    time_taken: TimeTakenPercentiles
+
+class QuestionAnalyticsResponse(BaseModel):
+    questions: List[QuestionAnalyticsEntry]
+    total_responses: int
@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+import orjson
+from sqlalchemy.exc import IntegrityError
+from app import crud
+from app.database import SessionLocal
+
+# "sync" writes each submission in its request, "buffered" queues graded
+# submissions and writes them in batches from a background thread
+SUBMIT_MODE = os.getenv("SUBMIT_MODE", "sync")
+SUBMIT_BUFFER_SIZE = int(os.getenv("SUBMIT_BUFFER_SIZE", "10000"))
+SUBMIT_BATCH_SIZE = int(os.getenv("SUBMIT_BATCH_SIZE", "200"))
+SUBMIT_LINGER_MS = int(os.getenv("SUBMIT_LINGER_MS", "50"))
+# Submissions that can't be written even on their own are logged with their
+# payload and, when this is set, appended to this file as NDJSON so they can
+# be replayed
+SUBMIT_SPOOL_PATH = os.getenv("SUBMIT_SPOOL_PATH")
+
+_STOP = object()
+
+class SubmissionBuffer:
+    """
+    Bounded write-behind queue for graded quiz submissions.
+
+    A background flusher collects up to `batch_size` submissions, waiting at
+    most `linger` seconds after the first one, and writes each batch in a
+    single transaction (group commit). A failed batch is retried one
+    submission at a time so one bad row doesn't drop the others; retried
+    copies of an already stored submission are counted and dropped, and
+    submissions that still fail are logged and spooled.
+
+    Holds at most one submission per participant until it is written: a
+    retry arriving meanwhile gets the queued copy back instead of being
+    queued again, so the route can replay its result (or refuse a
+    different Idempotency-Key) and a batch never holds two copies.
+    """
+
+    def __init__(self, max_size: int = SUBMIT_BUFFER_SIZE, batch_size: int = SUBMIT_BATCH_SIZE,
+                 linger: float = SUBMIT_LINGER_MS / 1000):
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._pending_lock = threading.Lock()
+        self._pending = {}  # participant_id -> submission queued or being written
+        self.flushed_batches = 0
+        self.flushed_submissions = 0
+        self.failed_submissions = 0
+        self.duplicate_submissions = 0
+
+    @property
+    def capacity(self):
+        return self._queue.maxsize
+
+    @property
+    def depth(self):
+        """Submissions waiting to be written"""
+        return self._queue.qsize()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, name="submission-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Flush everything still queued and stop the flusher"""
+        if self.running:
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def submit(self, submission: dict):
+        """
+        Queue a graded submission. Returns the submission now held for the
+        participant: `submission` itself, or an earlier copy that hasn't
+        been written yet. Returns None when the buffer is full or not
+        running, leaving the write to the caller.
+        """
+        if not self.running:
+            return None
+        participant_id = submission["participant_id"]
+        with self._pending_lock:
+            queued = self._pending.get(participant_id)
+            if queued is not None:
+                return queued
+            try:
+                self._queue.put_nowait(submission)
+            except queue.Full:
+                return None
+            self._pending[participant_id] = submission
+        return submission
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+        # Drain whatever arrived after the stop request
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._flush(batch[start:start + self.batch_size])
+
+    def _flush(self, batch: list):
+        db = SessionLocal()
+        try:
+            try:
+                crud.save_quiz_submissions(db, batch)
+                self.flushed_submissions += len(batch)
+            except Exception as e:
+                print(f"Error flushing batch of {len(batch)} submissions, retrying individually: {e}")
+                for submission in batch:
+                    try:
+                        crud.save_quiz_submissions(db, [submission])
+                        self.flushed_submissions += 1
+                    except IntegrityError:
+                        # Already stored by an earlier copy of the same submission
+                        self.duplicate_submissions += 1
+                    except Exception as e:
+                        self.failed_submissions += 1
+                        self._drop(submission, e)
+            self.flushed_batches += 1
+        finally:
+            db.close()
+            with self._pending_lock:
+                for submission in batch:
+                    if self._pending.get(submission["participant_id"]) is submission:
+                        del self._pending[submission["participant_id"]]
+
+    def _drop(self, submission: dict, error: Exception):
+        """Keep a record of a submission that couldn't be written; the client was already told it was saved"""
+        payload = orjson.dumps(submission)
+        print(f"Dropped quiz submission for participant {submission['participant_id']} ({error}): {payload.decode()}")
+        if SUBMIT_SPOOL_PATH:
+            try:
+                with open(SUBMIT_SPOOL_PATH, "ab") as spool:
+                    spool.write(payload + b"\n")
+            except OSError as e:
+                print(f"Error spooling quiz submission to {SUBMIT_SPOOL_PATH}: {e}")
+
+submission_buffer = SubmissionBuffer()
@@ -0,0 +1,234 @@
+"""
+Benchmark the set-based leaderboard rebuild, the window-ranked toppers and
+the incremental update on submission.
+
+Usage:
+    python benchmark_leaderboard.py                      # 10k participants in benchmark_leaderboard.db
+    python benchmark_leaderboard.py --participants 10000 100000 1000000
+    python benchmark_leaderboard.py --database-url postgresql://localhost/leaderboard_bench --participants 10000
+
+The benchmark drops and recreates every table of the database it runs on,
+so it only runs on its own SQLite file unless --database-url names another
+one (DATABASE_URL is ignored), and refuses any database that has been
+migrated or holds events. The tables are dropped again when it finishes.
+
+Each size gets fresh tables filled with synthetic participants and 10
+responses each. The columns are:
+- rebuild: crud.refresh_leaderboard's set-based upsert
+- legacy: the previous per-participant lookups and writes, skipped above
+  --legacy-limit participants because it takes far too long at that scale
+- marks/combined: reading the top 10 ranked by ROW_NUMBER() in SQL
+  (median of --reads)
+- submit: median time to store one more participant's submission with the
+  incremental leaderboard update (--submits of them), which should stay
+  flat as the event grows
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+SCRATCH_DATABASE_URL = "sqlite:///benchmark_leaderboard.db"
+# Keep the app's own engine off whatever database the environment points at
+os.environ["DATABASE_URL"] = SCRATCH_DATABASE_URL
+
+from sqlalchemy import create_engine, insert, inspect, func, case
+from sqlalchemy.orm import sessionmaker
+from app import crud, models
+from app.database import Base
+
+QUESTIONS_PER_PARTICIPANT = 10
+BATCH_SIZE = 10000
+EVENT_ID = 1
+
+
+def legacy_refresh_leaderboard(db):
+    """The previous refresh_leaderboard's per-participant lookups and writes, without its ranking passes"""
+    participant_stats = db.query(
+        models.Participant.id,
+        func.count(models.QuizResponse.id).label('total_questions'),
+        func.sum(case((models.QuizResponse.is_correct == True, 1), else_=0)).label('total_marks'),
+        func.avg(models.QuizResponse.time_taken).label('avg_time'),
+        func.max(models.Leaderboard.total_time).label('total_time')
+    ).outerjoin(
+        models.QuizResponse,
+        models.Participant.id == models.QuizResponse.participant_id
+    ).outerjoin(
+        models.Leaderboard,
+        models.Participant.id == models.Leaderboard.participant_id
+    ).group_by(models.Participant.id).all()
+
+    for stat in participant_stats:
+        entry = db.query(models.Leaderboard).filter(
+            models.Leaderboard.participant_id == stat.id
+        ).first()
+        if not entry:
+            entry = models.Leaderboard(participant_id=stat.id, event_id=EVENT_ID, total_time=0)
+            db.add(entry)
+        entry.total_questions = stat.total_questions or 0
+        entry.total_marks = stat.total_marks or 0
+        entry.avg_time = int(stat.avg_time or 0)
+    db.commit()
+
+    return len(participant_stats)
+
+
+def check_scratch(engine):
+    """Refuse to drop the tables of a database that looks like a real one"""
+    tables = inspect(engine).get_table_names()
+    if "schema_version" in tables:
+        raise SystemExit(f"{engine.url!r} has been migrated (it has a schema_version table); "
+                         "run the benchmark on a scratch database")
+    if models.Event.__tablename__ in tables:
+        with engine.connect() as conn:
+            if conn.execute(func.count().select().select_from(models.Event.__table__)).scalar():
+                raise SystemExit(f"{engine.url!r} holds events; run the benchmark on a scratch database "
+                                 "(or drop the tables a previous interrupted run left behind)")
+
+
+def populate(engine, participants: int):
+    """Create a fresh schema with synthetic participants, responses and leaderboard times"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.Event), [{"id": EVENT_ID, "name": "Benchmark event", "is_active": True}])
+        conn.execute(insert(models.Question), [
+            {
+                "event_id": EVENT_ID,
+                "question_number": n,
+                "text": f"Benchmark question {n}",
+                "option1_text": "A", "option1_is_correct": True,
+                "option2_text": "B", "option2_is_correct": False,
+                "option3_text": "C", "option3_is_correct": False,
+                "option4_text": "D", "option4_is_correct": False,
+            }
+            for n in range(1, QUESTIONS_PER_PARTICIPANT + 1)
+        ])
+
+    for start in range(1, participants + 1, BATCH_SIZE):
+        ids = range(start, min(start + BATCH_SIZE, participants + 1))
+        with engine.begin() as conn:
+            conn.execute(insert(models.Participant), [
+                {
+                    "id": pid,
+                    "event_id": EVENT_ID,
+                    "full_name": f"Participant {pid}",
+                    "contact_number": "9999999999",
+                    "email": f"participant{pid}@example.com",
+                    "school_college": "Benchmark School",
+                    "application_number": f"APP{pid}",
+                }
+                for pid in ids
+            ])
+            conn.execute(insert(models.QuizResponse), [
+                {
+                    "event_id": EVENT_ID,
+                    "participant_id": pid,
+                    "question_number": n,
+                    "selected_answer": rng.choice("ABCD"),
+                    "time_taken": rng.randint(0, 10),
+                    "is_correct": rng.random() < 0.5,
+                }
+                for pid in ids
+                for n in range(1, QUESTIONS_PER_PARTICIPANT + 1)
+            ])
+            conn.execute(insert(models.Leaderboard), [
+                {"participant_id": pid, "event_id": EVENT_ID, "total_time": rng.randint(10, 100)}
+                for pid in ids
+            ])
+
+
+def timed(engine, run, repeat: int = 1):
+    """Median seconds of `repeat` runs of `run(db)` in a fresh session"""
+    db = sessionmaker(bind=engine)()
+    try:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run(db)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+    finally:
+        db.close()
+
+
+def submit_latency(engine, participants: int, submits: int):
+    """Median seconds for crud.save_quiz_submissions to store one new participant's submission"""
+    rng = random.Random(7)
+    ids = range(participants + 1, participants + submits + 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Participant), [
+            {
+                "id": pid,
+                "event_id": EVENT_ID,
+                "full_name": f"Participant {pid}",
+                "contact_number": "9999999999",
+                "email": f"participant{pid}@example.com",
+                "school_college": "Benchmark School",
+                "application_number": f"APP{pid}",
+            }
+            for pid in ids
+        ])
+
+    timings = []
+    db = sessionmaker(bind=engine)()
+    try:
+        for pid in ids:
+            answers = [
+                {"question_number": n, "selected_answer": "A", "time_taken": rng.randint(0, 10), "is_correct": rng.random() < 0.5}
+                for n in range(1, QUESTIONS_PER_PARTICIPANT + 1)
+            ]
+            score = sum(answer["is_correct"] for answer in answers)
+            started = time.perf_counter()
+            crud.save_quiz_submissions(db, [{
+                "event_id": EVENT_ID,
+                "participant_id": pid,
+                "total_time": rng.randint(10, 100),
+                "answers": answers,
+                "receipt": {"idempotency_key": None, "score": score, "total_questions": len(answers), "correct_answers": score}
+            }])
+            timings.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=SCRATCH_DATABASE_URL,
+                        help="a scratch database; its tables are dropped")
+    parser.add_argument("--participants", type=int, nargs="+", default=[10000])
+    parser.add_argument("--legacy-limit", type=int, default=100000)
+    parser.add_argument("--reads", type=int, default=20)
+    parser.add_argument("--submits", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    check_scratch(engine)
+    print(f"{'participants':>12}  {'rebuild':>10}  {'legacy':>10}  {'marks ms':>10}  {'combined ms':>11}  {'submit ms':>10}")
+
+    try:
+        for participants in args.participants:
+            populate(engine, participants)
+            rebuild = timed(engine, lambda db: crud.refresh_leaderboard(db, EVENT_ID))
+            legacy = "skipped"
+            if participants <= args.legacy_limit:
+                legacy = f"{timed(engine, legacy_refresh_leaderboard):9.2f}s"
+            marks = timed(engine, lambda db: crud.get_toppers_by_marks(db, EVENT_ID), args.reads)
+            combined = timed(engine, lambda db: crud.get_combined_toppers(db, EVENT_ID), args.reads)
+            submit = submit_latency(engine, participants, args.submits)
+            print(f"{participants:>12}  {rebuild:9.2f}s  {legacy:>10}  {marks * 1000:>10.2f}  "
+                  f"{combined * 1000:>11.2f}  {submit * 1000:>10.2f}")
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
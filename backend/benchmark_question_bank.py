@@ -0,0 +1,178 @@
+"""
+Benchmark question-bank mode: serving each participant's question set and
+grading their submission against it.
+
+Usage:
+    python benchmark_question_bank.py                           # 10k-question bank in benchmark_question_bank.db
+    python benchmark_question_bank.py --bank-size 1000 10000 100000 --participants 20000
+    python benchmark_question_bank.py --database-url postgresql://localhost/quiz_bench
+
+The database is benchmark_question_bank.db unless --database-url names
+another one (DATABASE_URL is ignored); it is migrated first. Each bank
+size runs in a throwaway event of its own, deleted with everything in it
+afterwards, so no other event is touched.
+
+Serving builds the GET /api/quiz/questions body for every participant:
+the first time draws their set from the in-memory snapshot and stores it
+in question_sets, later times read the stored set. Grading maps a full
+submission back through the stored set (read with the participant, as
+submit_quiz does) and grades it against the answer key, which is checked
+to award every correct answer; it must run without queries.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import orjson
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCRATCH_DATABASE_URL = "sqlite:///benchmark_question_bank.db"
+
+
+def populate(db, event_id: int, bank_size: int, rng: random.Random):
+    """Fill the event with a synthetic bank; returns question_number -> correct option letter"""
+    from app import crud, schemas
+
+    correct = {}
+    questions = []
+    for number in range(1, bank_size + 1):
+        right = rng.randint(1, 4)
+        correct[number] = "ABCD"[right - 1]
+        questions.append(schemas.QuestionUpload(
+            question_number=number,
+            text=f"Benchmark question {number}",
+            **{f"option{i}_text": f"{number}:{'ABCD'[i - 1]}" for i in range(1, 5)},
+            **{f"option{i}_is_correct": i == right for i in range(1, 5)}
+        ))
+    crud.bulk_create_questions(db, event_id, questions)
+    return correct
+
+
+def add_participants(db, event_id: int, participants: int):
+    """Add `participants` new participants to the event; returns their ids"""
+    from sqlalchemy import insert
+    from app import models
+
+    db.execute(insert(models.Participant), [
+        {
+            "event_id": event_id,
+            "full_name": f"Participant {n}",
+            "contact_number": "9999999999",
+            "email": f"participant{n}@example.com",
+            "school_college": "Benchmark School",
+            "application_number": f"APP{n}",
+        }
+        for n in range(participants)
+    ])
+    db.commit()
+    return [pid for (pid,) in db.query(models.Participant.id).filter(models.Participant.event_id == event_id)]
+
+
+def drop_event(db, event_id: int):
+    """Delete the benchmark event with its participants, results, questions and (on PostgreSQL) partition"""
+    from sqlalchemy import text
+    from app import crud, models
+
+    crud.reset_event(db, event_id)
+    db.query(models.Question).filter(models.Question.event_id == event_id).delete()
+    db.query(models.Event).filter(models.Event.id == event_id).delete()
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"DROP TABLE IF EXISTS {crud.response_partition(event_id)}"))
+    db.commit()
+
+
+def correct_submission(body: bytes, correct: dict):
+    """Answers picking the displayed letter of each question's correct option"""
+    from app import schemas
+
+    answers = []
+    for question in orjson.loads(body)["questions"]:
+        number = int(question["text"].rsplit(" ", 1)[1])
+        right = f"{number}:{correct[number]}"
+        letter = next(letter for letter, text in question["options"].items() if text == right)
+        answers.append(schemas.QuizAnswerSubmit(
+            question_number=question["question_number"], selected_answer=letter, time_taken=5
+        ))
+    return answers
+
+
+def percentile(timings: list, p: float):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bank-size", type=int, nargs="+", default=[10000])
+    parser.add_argument("--participants", type=int, default=10000)
+    parser.add_argument("--database-url", default=SCRATCH_DATABASE_URL)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["QUIZ_MODE"] = "bank"
+    from app import crud
+    from app.answer_key import answer_key
+    from app.database import SessionLocal, count_queries, engine
+    from app.migrations import migrate
+    from app.question_bank import question_bank
+
+    migrate(engine)
+    rng = random.Random(42)
+    print(f"{'bank':>8} {'load ms':>8} {'first/s':>8} {'serve/s':>8} {'p99 us':>8} "
+          f"{'grade/s':>8} {'p99 us':>8} {'queries':>8}")
+
+    for bank_size in args.bank_size:
+        db = SessionLocal()
+        event_id = crud.create_event(db, f"Question bank benchmark ({bank_size} questions)").id
+        try:
+            correct = populate(db, event_id, bank_size, rng)
+            participants = add_participants(db, event_id, args.participants)
+
+            started = time.perf_counter()
+            question_bank.get(db, event_id)
+            answer_key.get(db, event_id)
+            load = time.perf_counter() - started
+
+            first_timings, serve_timings, grade_timings = [], [], []
+            for participant_id in participants:
+                started = time.perf_counter()
+                question_bank.questions_body(db, event_id, participant_id)
+                first_timings.append(time.perf_counter() - started)
+
+            bodies = {}
+            for participant_id in participants:
+                started = time.perf_counter()
+                bodies[participant_id] = question_bank.questions_body(db, event_id, participant_id)
+                serve_timings.append(time.perf_counter() - started)
+
+            submissions = {pid: correct_submission(bodies[pid], correct) for pid in participants}
+            found = {pid: crud.get_participant_with_receipt(db, pid) for pid in participants}
+
+            with count_queries() as statements:
+                for participant_id in participants:
+                    _, _, version, question_set = found[participant_id]
+                    started = time.perf_counter()
+                    answers = question_bank.unshuffle(
+                        db, event_id, participant_id, submissions[participant_id], question_set, version
+                    )
+                    graded = answer_key.grade(db, event_id, answers, version)
+                    grade_timings.append(time.perf_counter() - started)
+                    if not all(graded) or len(graded) != len(submissions[participant_id]):
+                        raise SystemExit(f"participant {participant_id}: correct answers not all awarded")
+        finally:
+            db.rollback()
+            drop_event(db, event_id)
+            db.close()
+
+        print(f"{bank_size:>8} {load * 1000:>8.1f} {len(first_timings) / sum(first_timings):>8.0f} "
+              f"{len(serve_timings) / sum(serve_timings):>8.0f} {percentile(serve_timings, 99) * 1e6:>8.1f} "
+              f"{len(grade_timings) / sum(grade_timings):>8.0f} {percentile(grade_timings, 99) * 1e6:>8.1f} "
+              f"{len(statements):>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark serializing the admin listings: per-row pydantic models validated
+again through response_model (the previous path) against plain dicts encoded
+with orjson (the path the admin router uses now).
+
+Usage:
+    python benchmark_serialization.py                   # 10k and 100k rows
+    python benchmark_serialization.py --rows 10000 100000 500000 --repeat 5
+
+Both paths serve the same synthetic rows through a FastAPI app in-process,
+so the timings include the framework's own validation and encoding but no
+database work. The responses are checked to be identical.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark_serialization.db")
+
+from app import schemas
+from app.routers.admin import json_response, participant_score_entry, topper_entry
+
+ScoreRow = namedtuple("ScoreRow", [
+    "id", "full_name", "email", "school_college", "contact_number",
+    "application_number", "total_questions", "total_marks", "total_time"
+])
+LeaderboardRow = namedtuple("LeaderboardRow", [
+    "participant_id", "full_name", "email", "school_college", "application_number",
+    "total_marks", "total_time", "avg_time", "total_questions"
+])
+
+
+def make_rows(count: int):
+    scores, leaderboard = [], []
+    for i in range(1, count + 1):
+        marks = 10 - i * 10 // (count + 1)
+        scores.append(ScoreRow(
+            i, f"Participant {i}", f"participant{i}@example.com", "Benchmark School",
+            "9999999999", f"APP-{i}", 10, marks, 30 + i % 70
+        ))
+        leaderboard.append(LeaderboardRow(
+            i, f"Participant {i}", f"participant{i}@example.com", "Benchmark School",
+            f"APP-{i}", marks, 30 + i % 70, 3, 10
+        ))
+    return scores, leaderboard
+
+
+def legacy_participant_scores(results):
+    """The previous GET /api/admin/participants/scores body: one model per row"""
+    participants = []
+    for rank, result in enumerate(results, start=1):
+        total_m = result.total_marks or 0
+        participants.append(
+            schemas.ParticipantScoreEntry(
+                rank=rank,
+                participant_id=result.id,
+                full_name=result.full_name,
+                email=result.email,
+                school_college=result.school_college,
+                contact_number=result.contact_number,
+                application_number=result.application_number,
+                total_marks=total_m,
+                total_questions=10,
+                percentage=round(total_m / 10.0 * 100, 2),
+                total_time=round(result.total_time or 0.0, 2)
+            )
+        )
+    return schemas.ParticipantsScoresResponse(participants=participants, total_participants=len(participants))
+
+
+def legacy_leaderboard(rows):
+    """The previous GET /api/admin/leaderboard body: one model per row"""
+    toppers = [
+        schemas.TopperEntry(
+            rank=rank,
+            participant_id=row.participant_id,
+            full_name=row.full_name,
+            email=row.email,
+            school_college=row.school_college,
+            application_number=row.application_number,
+            total_marks=row.total_marks,
+            total_time=float(row.total_time),
+            avg_time=float(row.avg_time),
+            total_questions=row.total_questions
+        )
+        for rank, row in enumerate(rows, start=1)
+    ]
+    return schemas.ToppersResponse(category="leaderboard", total_participants=len(toppers), toppers=toppers)
+
+
+def build_app(scores, leaderboard):
+    app = FastAPI()
+
+    @app.get("/legacy/scores", response_model=schemas.ParticipantsScoresResponse)
+    def legacy_scores_route():
+        return legacy_participant_scores(scores)
+
+    @app.get("/fast/scores", response_model=schemas.ParticipantsScoresResponse)
+    def fast_scores_route():
+        participants = [participant_score_entry(rank, row) for rank, row in enumerate(scores, start=1)]
+        return json_response({"participants": participants, "total_participants": len(participants), "next_cursor": None})
+
+    @app.get("/legacy/leaderboard", response_model=schemas.ToppersResponse)
+    def legacy_leaderboard_route():
+        return legacy_leaderboard(leaderboard)
+
+    @app.get("/fast/leaderboard", response_model=schemas.ToppersResponse)
+    def fast_leaderboard_route():
+        toppers = [topper_entry(rank, row) for rank, row in enumerate(leaderboard, start=1)]
+        return json_response({
+            "category": "leaderboard", "total_participants": len(toppers), "toppers": toppers, "next_cursor": None
+        })
+
+    return app
+
+
+def best_of(client: TestClient, url: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+    return min(timings), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'listing':<12} {'legacy ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for count in args.rows:
+        client = TestClient(build_app(*make_rows(count)))
+        for listing in ("scores", "leaderboard"):
+            legacy_time, legacy = best_of(client, f"/legacy/{listing}", args.repeat)
+            fast_time, fast = best_of(client, f"/fast/{listing}", args.repeat)
+
+            if fast.json() != legacy.json():
+                raise SystemExit(f"{listing}: fast path response differs from the legacy one")
+
+            print(f"{count:>8} {listing:<12} {legacy_time * 1000:>10.1f} {fast_time * 1000:>10.1f} "
+                  f"{legacy_time / fast_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Apply pending schema migrations (app/migrations.py) to DATABASE_URL.
+
+Run once per deploy, before starting the workers:
+    python migrate.py && uvicorn app.main:app --workers 4
+
+    python migrate.py --status    # show the applied version without changing anything
+
+Safe to run from several containers at once: on PostgreSQL the migrations
+run under an advisory lock, and each one is recorded in schema_version.
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import engine
+from app.migrations import LATEST_VERSION, MIGRATIONS, DuplicateParticipants, current_version, migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="print the schema version and pending migrations")
+    args = parser.parse_args()
+
+    if args.status:
+        with engine.connect() as conn:
+            version = current_version(conn)
+        print(f"Schema version {version} (latest {LATEST_VERSION})")
+        for number, description, _ in MIGRATIONS:
+            if number > version:
+                print(f"  pending {number}: {description}")
+        return
+
+    print("Starting schema migration...")
+    try:
+        applied = migrate(engine)
+    except DuplicateParticipants as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    for number, description in applied:
+        print(f"✓ Applied {number}: {description}")
+    if not applied:
+        print(f"✓ Schema already at version {LATEST_VERSION}")
+    print("Migration completed!")
+
+
+if __name__ == "__main__":
+    main()
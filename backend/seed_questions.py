@@ -1,12 +1,14 @@
 """
 Seed script to populate the questions table with all 10 quiz questions.
 Run this script after creating the database to populate questions.
+Questions are added to the active event.
 """
 from app.database import SessionLocal, engine
-from app.models import Base, Question
+from app.migrations import migrate
+from app.models import Event, Question
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+# Create or upgrade the schema before seeding
+migrate(engine)
 
 # Quiz questions with correct answers (based on research)
 QUESTIONS = [
@@ -117,23 +119,30 @@ def seed_questions():
     db = SessionLocal()
     
     try:
+        event = db.query(Event).filter(Event.is_active == True).first()
+        if not event:
+            print("❌ No event is active. Create or activate one first.")
+            return
+        
         # Check if questions already exist
-        existing_count = db.query(Question).count()
+        questions = db.query(Question).filter(Question.event_id == event.id)
+        existing_count = questions.count()
         if existing_count > 0:
-            print(f"Database already contains {existing_count} questions.")
+            print(f"Event '{event.name}' already contains {existing_count} questions.")
             response = input("Do you want to delete and re-seed? (yes/no): ")
             if response.lower() != 'yes':
                 print("Seeding cancelled.")
                 return
             
             # Delete existing questions
-            db.query(Question).delete()
+            questions.delete()
             db.commit()
             print("Existing questions deleted.")
         
         # Insert all questions
         for q_data in QUESTIONS:
             question = Question(
+                event_id=event.id,
                 question_number=q_data["question_number"],
                 text=q_data["text"],
                 option1_text=q_data["options"][0][0],
@@ -147,12 +156,14 @@ def seed_questions():
             )
             db.add(question)
         
+        # Make every running worker reload its cached questions
+        event.questions_version += 1
         db.commit()
-        print(f"✅ Successfully seeded {len(QUESTIONS)} questions into the database!")
+        print(f"✅ Successfully seeded {len(QUESTIONS)} questions into event '{event.name}'!")
         
         # Verify
-        total = db.query(Question).count()
-        print(f"Total questions in database: {total}")
+        total = questions.count()
+        print(f"Total questions in event: {total}")
         
     except Exception as e:
         db.rollback()
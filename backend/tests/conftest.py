@@ -0,0 +1,87 @@
+"""
+Test fixtures: the app runs against a fresh SQLite database in a temporary
+directory, migrated on startup. Each test creates its own event, so tests
+don't see each other's participants or leaderboards.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configure the database before app.database creates its engines
+_tmpdir = tempfile.mkdtemp(prefix="brainspark-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "test.db")
+os.environ["MIGRATE_ON_STARTUP"] = "1"
+# Profile every request: responses carry X-Query-Count for the budget tests,
+# and a request repeating a statement (a likely N+1 loop) fails its test
+os.environ["QUERY_PROFILE"] = "strict"
+os.environ.pop("READ_DATABASE_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+
+QUESTIONS = 10
+_names = itertools.count(1)
+
+def questions(correct: str = "A"):
+    """An upload body of QUESTIONS questions whose correct option is `correct`"""
+    return {"questions": [
+        {
+            "question_number": n,
+            "text": f"Test question number {n}",
+            **{f"option{i}_text": f"Option {letter}" for i, letter in enumerate("ABCD", start=1)},
+            **{f"option{i}_is_correct": letter == correct for i, letter in enumerate("ABCD", start=1)},
+        }
+        for n in range(1, QUESTIONS + 1)
+    ]}
+
+def answers(letter: str):
+    """A submission's responses answering every question with `letter`"""
+    return [{"question_number": n, "selected_answer": letter, "time_taken": 3} for n in range(1, QUESTIONS + 1)]
+
+@pytest.fixture(autouse=True)
+def fixed_mode(monkeypatch):
+    """Ask every question in order whatever QUIZ_MODE says (test_question_bank's bank_mode switches to bank)"""
+    from app import crud
+    from app.routers import async_routes, quiz
+
+    for module in (crud, quiz, async_routes):
+        monkeypatch.setattr(module, "QUIZ_MODE", "fixed")
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def event_id(client):
+    """A new event with questions whose answers are all A"""
+    response = client.post("/api/admin/events", json={"name": f"Test event {next(_names)}"})
+    assert response.status_code == 200, response.text
+    event_id = response.json()["id"]
+    response = client.post("/api/admin/questions/upload", params={"event_id": event_id}, json=questions("A"))
+    assert response.status_code == 200, response.text
+    return event_id
+
+@pytest.fixture
+def register(client):
+    """register(event_id) -> new participant_id, registering a unique participant"""
+    def register(event_id: int, **fields):
+        n = next(_names)
+        body = {
+            "full_name": f"Participant {n}",
+            "contact_number": "9999999999",
+            "email": f"participant{n}@example.com",
+            "school_college": "Test School",
+            "application_number": f"APP{n}",
+            "event_id": event_id,
+            **fields,
+        }
+        response = client.post("/api/participants", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()["participant_id"]
+    return register
@@ -0,0 +1,45 @@
+from app import crud, models
+from app.database import SessionLocal
+from tests.conftest import answers, questions
+
+def submit(client, participant_id: int):
+    response = client.post("/api/quiz/submit", json={"participant_id": participant_id, "total_time": 30, "responses": answers("A")})
+    assert response.status_code == 200, response.text
+
+def leaderboard(client, event_id: int):
+    response = client.get("/api/admin/leaderboard", params={"event_id": event_id})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_archived_event_leaderboard_is_not_rebuilt(client, event_id, register):
+    for _ in range(3):
+        submit(client, register(event_id))
+    assert client.post("/api/admin/leaderboard/refresh", params={"event_id": event_id}).status_code == 200
+    before = leaderboard(client, event_id)
+
+    assert client.post(f"/api/admin/events/{event_id}/archive").status_code == 200
+    assert client.post("/api/admin/leaderboard/refresh", params={"event_id": event_id}).status_code == 409
+    assert leaderboard(client, event_id) == before
+
+def test_reset_event_keeps_other_events(client, event_id, register):
+    other = client.post("/api/admin/events", json={"name": f"Kept alongside {event_id}"}).json()["id"]
+    assert client.post("/api/admin/questions/upload", params={"event_id": other}, json=questions("A")).status_code == 200
+    for target in (event_id, other):
+        for _ in range(2):
+            submit(client, register(target))
+    kept = leaderboard(client, other)
+
+    db = SessionLocal()
+    try:
+        assert crud.reset_event(db, event_id) == 2
+        for model in (models.Participant, models.QuizResponse, models.ParticipantScore, models.Leaderboard):
+            assert db.query(model).filter(model.event_id == event_id).count() == 0
+            assert db.query(model).filter(model.event_id == other).count() > 0
+        assert db.query(models.Question).filter(models.Question.event_id == event_id).count() == 10
+    finally:
+        db.close()
+
+    assert leaderboard(client, other) == kept
+    assert leaderboard(client, event_id)["total_participants"] == 0
+    # The event takes new registrations again
+    submit(client, register(event_id))
@@ -0,0 +1,68 @@
+import csv
+import gzip
+import io
+import orjson
+from app import export
+from tests.conftest import answers
+
+def submit(client, participant_id: int, letter: str, total_time: int):
+    response = client.post("/api/quiz/submit", json={
+        "participant_id": participant_id, "total_time": total_time, "responses": answers(letter)
+    })
+    assert response.status_code == 200, response.text
+
+def download(client, event_id: int, **params):
+    response = client.get("/api/admin/export", params={"event_id": event_id, **params})
+    assert response.status_code == 200, response.text
+    return response
+
+def test_participants_csv_matches_the_score_listing(client, event_id, register):
+    for letter, total_time in (("B", 20), ("A", 40), ("A", 30)):
+        submit(client, register(event_id), letter, total_time)
+    register(event_id, full_name="Zoë, \"Quoted\" Name")
+
+    response = download(client, event_id)
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f'filename="quiz-event-{event_id}-participants.csv"' in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+    listing = client.get("/api/admin/participants/scores", params={"event_id": event_id, "limit": 1000}).json()
+    assert [int(row["participant_id"]) for row in rows] == [p["participant_id"] for p in listing["participants"]]
+    assert [int(row["rank"]) for row in rows] == [1, 2, 3, 4]
+    assert [(row["total_marks"], row["percentage"]) for row in rows[:2]] == [("10", "100.0"), ("10", "100.0")]
+    assert rows[2]["full_name"] == "Zoë, \"Quoted\" Name"
+
+def test_responses_ndjson_has_one_line_per_answer(client, event_id, register):
+    first, second = register(event_id), register(event_id)
+    submit(client, first, "A", 30)
+    submit(client, second, "C", 50)
+
+    response = download(client, event_id, format="ndjson", rows="responses")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [orjson.loads(line) for line in response.content.splitlines()]
+    assert len(lines) == 20
+    assert list(lines[0]) == export.RESPONSE_COLUMNS
+    assert [(line["participant_id"], line["question_number"]) for line in lines] == [
+        (participant_id, n) for participant_id in (first, second) for n in range(1, 11)
+    ]
+    assert {(line["participant_id"], line["is_correct"], line["total_marks"]) for line in lines} == {
+        (first, True, 10), (second, False, 0)
+    }
+
+def test_gzip_export_spans_several_chunks(client, event_id, register, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    for n in range(5):
+        submit(client, register(event_id), "A", 10 + n)
+
+    plain = download(client, event_id, format="ndjson").content
+    response = download(client, event_id, format="ndjson", gzip=True)
+    assert response.headers["content-type"] == "application/gzip"
+    assert f'filename="quiz-event-{event_id}-participants.ndjson.gz"' in response.headers["content-disposition"]
+    assert gzip.decompress(response.content) == plain
+    assert [orjson.loads(line)["rank"] for line in plain.splitlines()] == [1, 2, 3, 4, 5]
+
+    csv_rows = gzip.decompress(download(client, event_id, gzip=True).content).decode().splitlines()
+    assert len(csv_rows) == 6
+
+def test_unknown_format_is_rejected(client, event_id):
+    assert client.get("/api/admin/export", params={"event_id": event_id, "format": "xml"}).status_code == 422
@@ -0,0 +1,40 @@
+from app.answer_key import answer_key
+from tests.conftest import answers, questions
+
+def submit(client, participant_id: int, letter: str = "A"):
+    return client.post("/api/quiz/submit", json={
+        "participant_id": participant_id,
+        "total_time": 30,
+        "responses": answers(letter),
+    })
+
+def test_submit_grades_without_queries(client, event_id, register):
+    # The first submission loads the event's answer key
+    first = submit(client, register(event_id))
+    assert first.status_code == 200, first.text
+    assert first.json()["score"] == 10
+
+    response = submit(client, register(event_id), "B")
+    assert response.status_code == 200, response.text
+    assert response.json()["score"] == 0
+    assert response.headers["X-Grading-Queries"] == "0"
+
+def test_upload_elsewhere_reaches_the_answer_key(client, event_id, register):
+    assert submit(client, register(event_id)).json()["score"] == 10
+
+    # Another worker handles the upload: this one's key is left in place
+    # and only the stored questions_version tells it to reload
+    invalidate = answer_key.invalidate
+    answer_key.invalidate = lambda event_id=None: None
+    try:
+        response = client.post("/api/admin/questions/upload", params={"event_id": event_id}, json=questions("B"))
+        assert response.status_code == 200, response.text
+    finally:
+        answer_key.invalidate = invalidate
+
+    response = submit(client, register(event_id), "B")
+    assert response.json()["score"] == 10
+    assert response.headers["X-Grading-Queries"] == "1"
+
+    response = submit(client, register(event_id), "B")
+    assert response.headers["X-Grading-Queries"] == "0"
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from app import models
+from app.database import SessionLocal
+from tests.conftest import answers
+
+def submit(client, participant_id: int, key: str = None, letter: str = "A"):
+    return client.post(
+        "/api/quiz/submit",
+        json={"participant_id": participant_id, "total_time": 30, "responses": answers(letter)},
+        headers={"Idempotency-Key": key} if key else {}
+    )
+
+def stored_answers(participant_id: int):
+    db = SessionLocal()
+    try:
+        return sorted(
+            (r.question_number, r.selected_answer)
+            for r in db.query(models.QuizResponse).filter(models.QuizResponse.participant_id == participant_id)
+        )
+    finally:
+        db.close()
+
+def test_retry_with_the_same_key_replays_the_first_result(client, event_id, register):
+    participant_id = register(event_id)
+    first = submit(client, participant_id, f"attempt-1-{participant_id}")
+    assert first.status_code == 200, first.text
+    assert "Idempotent-Replayed" not in first.headers
+
+    # Different answers in the retry are ignored: the stored result is returned
+    retry = submit(client, participant_id, f"attempt-1-{participant_id}", "B")
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert stored_answers(participant_id) == [(n, "A") for n in range(1, 11)]
+
+    # A retry without a key replays too
+    assert submit(client, participant_id).headers["Idempotent-Replayed"] == "true"
+
+def test_a_key_is_not_reused_across_participants(client, event_id, register):
+    first, second = register(event_id), register(event_id)
+    assert submit(client, first, f"shared-{first}").status_code == 200
+    assert submit(client, second, f"shared-{first}").status_code == 409
+    assert stored_answers(second) == []
+
+def test_another_key_for_the_same_participant_conflicts(client, event_id, register):
+    participant_id = register(event_id)
+    assert submit(client, participant_id, f"attempt-1-{participant_id}").status_code == 200
+
+    conflict = submit(client, participant_id, f"attempt-2-{participant_id}", "B")
+    assert conflict.status_code == 409
+    assert stored_answers(participant_id) == [(n, "A") for n in range(1, 11)]
+
+def test_concurrent_copies_are_stored_once(client, event_id, register):
+    participant_id = register(event_id)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(lambda _: submit(client, participant_id, f"attempt-1-{participant_id}"), range(6)))
+
+    assert [r.status_code for r in responses] == [200] * 6
+    assert {r.json()["score"] for r in responses} == {10}
+    assert sum("Idempotent-Replayed" not in r.headers for r in responses) == 1
+    assert stored_answers(participant_id) == [(n, "A") for n in range(1, 11)]
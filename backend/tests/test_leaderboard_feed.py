@@ -0,0 +1,82 @@
+import asyncio
+import orjson
+from app.leaderboard_feed import LeaderboardFeed, leaderboard_feed
+from tests.conftest import answers
+
+def submit(client, participant_id: int, letter: str, total_time: int):
+    response = client.post("/api/quiz/submit", json={
+        "participant_id": participant_id, "total_time": total_time, "responses": answers(letter)
+    })
+    assert response.status_code == 200, response.text
+
+def parse(event: bytes):
+    """(name, id, data) of one Server-Sent Event"""
+    fields = dict(line.split(": ", 1) for line in event.decode().strip().split("\n"))
+    return fields["event"], int(fields["id"]), orjson.loads(fields["data"])
+
+def follow(event_id: int, steps):
+    """
+    Subscribe to the event's feed (with a short push interval) and run
+    `steps(next_event, feed)`, where next_event() waits for the next event.
+    Submissions reach the feed through leaderboard_feed.notify(), as in the app.
+    """
+    async def run():
+        feed = leaderboard_feed._feeds[event_id] = LeaderboardFeed(event_id, size=3, interval=0.05)
+        stream = feed.subscribe()
+
+        async def next_event():
+            return parse(await asyncio.wait_for(stream.__anext__(), 5))
+
+        try:
+            await steps(next_event, feed)
+        finally:
+            await stream.aclose()
+            await feed.stop()
+            del leaderboard_feed._feeds[event_id]
+
+    asyncio.run(run())
+
+def test_snapshot_then_diff_of_the_changed_ranks(client, event_id, register):
+    first, second = register(event_id), register(event_id)
+    submit(client, first, "A", 30)
+    submit(client, second, "B", 20)
+
+    async def steps(next_event, feed):
+        name, version, snapshot = await next_event()
+        assert name == "snapshot"
+        assert [(e["rank"], e["participant_id"]) for e in snapshot["marks"]] == [(1, first), (2, second)]
+
+        # A new leader pushes everyone else down a place
+        leader = register(event_id)
+        submit(client, leader, "A", 10)
+        name, next_version, diff = await next_event()
+        assert (name, next_version) == ("diff", version + 1)
+        assert diff["marks"]["size"] == 3
+        assert [(e["rank"], e["participant_id"]) for e in diff["marks"]["changed"]] == [
+            (1, leader), (2, first), (3, second)
+        ]
+        assert feed.snapshot["marks"][0]["participant_id"] == leader
+
+    follow(event_id, steps)
+
+def test_burst_of_submissions_is_pushed_once_and_truncated(client, event_id, register):
+    submit(client, register(event_id), "B", 50)
+
+    async def steps(next_event, feed):
+        await next_event()
+        broadcasts = feed.broadcasts
+
+        late = [register(event_id) for _ in range(4)]
+        for n, participant_id in enumerate(late):
+            submit(client, participant_id, "A", 10 + n)
+        name, _, diff = await next_event()
+
+        assert name == "diff" and feed.broadcasts == broadcasts + 1
+        # Only the top `size` entries are pushed
+        assert diff["marks"]["size"] == 3
+        assert [e["participant_id"] for e in diff["marks"]["changed"]] == late[:3]
+
+    follow(event_id, steps)
+
+def test_stream_of_an_unknown_event_is_404(client):
+    assert client.get("/api/admin/leaderboard/stream", params={"event_id": 999999}).status_code == 404
@@ -0,0 +1,71 @@
+import re
+from tests.conftest import answers
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+def scrape(client):
+    """{(name, frozenset of label pairs): value} of every sample at /metrics"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        pairs = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels or ""))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+def sample(samples, name: str, **labels):
+    return samples.get((name, frozenset(labels.items())), 0.0)
+
+def submit(client, participant_id: int):
+    return client.post("/api/quiz/submit", json={"participant_id": participant_id, "total_time": 30, "responses": answers("A")})
+
+def test_requests_are_counted_by_route_template_and_status(client, event_id, register):
+    participant_id = register(event_id)
+    assert submit(client, participant_id).status_code == 200
+    before = scrape(client)
+
+    assert submit(client, participant_id).status_code == 200
+    assert client.get(f"/api/quiz/rank/{participant_id}").status_code == 200
+    assert client.get("/api/quiz/rank/999999").status_code == 404
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("http_requests_total", method="POST", route="/api/quiz/submit", status="200") == 1
+    assert delta("http_requests_total", method="GET", route="/api/quiz/rank/{participant_id}", status="200") == 1
+    assert delta("http_requests_total", method="GET", route="/api/quiz/rank/{participant_id}", status="404") == 1
+    assert delta("http_request_duration_seconds_count", method="GET", route="/api/quiz/rank/{participant_id}") == 2
+    assert delta("quiz_submissions_total", result="replayed") == 1
+    # The scrape itself is in flight while it renders
+    assert sample(after, "http_requests_in_flight") >= 1
+
+def test_statements_per_request_match_the_query_profile(client, event_id, register):
+    participant_id = register(event_id)
+    before = scrape(client)
+    response = submit(client, participant_id)
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("db_statements_per_request_count", route="/api/quiz/submit") == 1
+    # Metrics and the profiler read the same per-request statement log
+    assert delta("db_statements_per_request_sum", route="/api/quiz/submit") == int(response.headers["X-Query-Count"])
+    assert delta("db_statement_seconds_per_request_sum", route="/api/quiz/submit") > 0
+    for phase in ("grading", "responses"):
+        assert delta("quiz_submit_phase_seconds_count", phase=phase) == 1
+    assert delta("quiz_submissions_total", result="accepted") == 1
+
+def test_pool_gauges_and_json(client):
+    samples = scrape(client)
+    assert sample(samples, "db_pool_size", pool="sync") >= 1
+    assert sample(samples, "db_pool_checkout_wait_seconds_count", pool="sync") >= 1
+
+    pools = client.get("/metrics/pool").json()
+    assert pools["sync"]["pool_class"] == "TimedQueuePool"
+    assert pools["sync"]["checkouts"] >= 1 and pools["sync"]["timeouts"] == 0
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine, insert, text
+from app import models
+from app.database import Base
+from app.migrations import DuplicateParticipants, create_model_indexes
+
+PARTICIPANT_UNIQUE_INDEXES = ["uq_participants_event_email_lower", "uq_participants_event_application_number"]
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A database whose participants table predates the unique registration indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in PARTICIPANT_UNIQUE_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(insert(models.Event), [{"id": 1, "name": "Legacy event", "is_active": True}])
+    yield engine
+    engine.dispose()
+
+def add_participants(engine, *participants):
+    with engine.begin() as conn:
+        conn.execute(insert(models.Participant), [
+            {
+                "event_id": 1,
+                "full_name": f"Participant {email}",
+                "contact_number": "9999999999",
+                "school_college": "Legacy School",
+                "email": email,
+                "application_number": application_number,
+            }
+            for email, application_number in participants
+        ])
+
+def index_names(engine):
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+def test_duplicate_participants_abort_with_a_report(legacy_engine):
+    add_participants(
+        legacy_engine,
+        ("Ana@example.com", "APP1"), ("ana@example.com", "APP2"),
+        ("bo@example.com", "APP3"), ("cy@example.com", "APP3"),
+        ("dee@example.com", ""), ("eve@example.com", ""),
+    )
+
+    with pytest.raises(DuplicateParticipants) as error, legacy_engine.begin() as conn:
+        create_model_indexes(conn)
+
+    report = str(error.value)
+    assert "email (ignoring case) 'ana@example.com'" in report
+    assert "participant 1: Participant Ana@example.com <Ana@example.com>" in report
+    assert "participant 2:" in report
+    assert "application number 'APP3'" in report
+    assert "participant 3:" in report and "participant 4:" in report
+    # Empty application numbers don't conflict
+    assert "participant 5:" not in report and "participant 6:" not in report
+    assert not set(PARTICIPANT_UNIQUE_INDEXES) & index_names(legacy_engine)
+
+def test_distinct_participants_get_the_unique_indexes(legacy_engine):
+    add_participants(legacy_engine, ("ana@example.com", "APP1"), ("bo@example.com", ""), ("cy@example.com", ""))
+
+    with legacy_engine.begin() as conn:
+        create_model_indexes(conn)
+
+    assert set(PARTICIPANT_UNIQUE_INDEXES) <= index_names(legacy_engine)
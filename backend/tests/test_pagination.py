@@ -0,0 +1,75 @@
+import orjson
+from tests.conftest import answers
+
+def submit(client, participant_id: int, letter: str, total_time: int):
+    response = client.post("/api/quiz/submit", json={
+        "participant_id": participant_id, "total_time": total_time, "responses": answers(letter)
+    })
+    assert response.status_code == 200, response.text
+
+def pages(client, path: str, key: str, event_id: int, limit: int):
+    """Every page of a listing, following next_cursor"""
+    params = {"event_id": event_id, "limit": limit}
+    result = []
+    while True:
+        response = client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page[key]) <= limit
+        result.append(page[key])
+        if page["next_cursor"] is None:
+            return result
+        params["cursor"] = page["next_cursor"]
+
+def ordering(entries: list):
+    return [(-e["total_marks"], e["total_time"], e["participant_id"]) for e in entries]
+
+def test_leaderboard_pages_continue_across_ties(client, event_id, register):
+    # Ties on marks and on marks and time, broken by participant_id
+    for letter, total_time in [("A", 30), ("B", 20), ("A", 20), ("A", 30), ("B", 20), ("A", 30), ("B", 40)]:
+        submit(client, register(event_id), letter, total_time)
+
+    entries = [entry for page in pages(client, "/api/admin/leaderboard", "toppers", event_id, 2) for entry in page]
+    assert [e["rank"] for e in entries] == list(range(1, 8))
+    assert ordering(entries) == sorted(ordering(entries))
+
+    whole = client.get("/api/admin/leaderboard", params={"event_id": event_id, "limit": 1000}).json()
+    assert whole["toppers"] == entries
+    streamed = orjson.loads(client.get("/api/admin/leaderboard", params={"event_id": event_id, "stream": True}).content)
+    assert streamed["toppers"] == entries and streamed["total_participants"] == 7
+
+def test_rows_ranked_above_the_cursor_do_not_shift_later_pages(client, event_id, register):
+    for total_time in (10, 20, 30, 40):
+        submit(client, register(event_id), "B", total_time)
+
+    first = client.get("/api/admin/leaderboard", params={"event_id": event_id, "limit": 2}).json()
+    # A new leader arrives between the two page requests
+    submit(client, register(event_id), "A", 5)
+    second = client.get("/api/admin/leaderboard", params={
+        "event_id": event_id, "limit": 2, "cursor": first["next_cursor"]
+    }).json()
+
+    assert [e["total_time"] for e in first["toppers"] + second["toppers"]] == [10, 20, 30, 40]
+    assert [e["rank"] for e in second["toppers"]] == [3, 4]
+
+def test_score_pages_include_participants_who_have_not_submitted(client, event_id, register):
+    submitted = [register(event_id) for _ in range(3)]
+    waiting = [register(event_id) for _ in range(2)]
+    for participant_id, letter in zip(submitted, "ABA"):
+        submit(client, participant_id, letter, 25)
+
+    entries = [
+        entry for page in pages(client, "/api/admin/participants/scores", "participants", event_id, 2) for entry in page
+    ]
+    assert [e["rank"] for e in entries] == list(range(1, 6))
+    # Not submitted counts as 0 marks in 0 seconds, ahead of 0 marks in 25
+    assert [e["participant_id"] for e in entries] == [submitted[0], submitted[2]] + waiting + [submitted[1]]
+    assert ordering(entries) == sorted(ordering(entries))
+
+    streamed = orjson.loads(client.get("/api/admin/participants/scores", params={"event_id": event_id}).content)
+    assert streamed["participants"] == entries
+
+def test_malformed_cursor_is_rejected(client, event_id):
+    for cursor in ("not-a-cursor", "WzEsMiwzXQ"):  # garbage, and a valid encoding of 3 values
+        response = client.get("/api/admin/leaderboard", params={"event_id": event_id, "cursor": cursor})
+        assert response.status_code == 400
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool, QueuePool
+from app import database
+
+@pytest.fixture
+def profile(monkeypatch):
+    """profile(name, budget, workers): set the pool settings app.database read from the environment"""
+    def profile(name: str, budget: int = 50, workers: int = 1):
+        monkeypatch.setattr(database, "DB_POOL_PROFILE", name)
+        monkeypatch.setattr(database, "DB_CONNECTION_BUDGET", budget)
+        monkeypatch.setattr(database, "WEB_CONCURRENCY", workers)
+    return profile
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 8, 16])
+@pytest.mark.parametrize("engines", [1, 2])
+def test_worker_profile_splits_the_budget(profile, workers, engines):
+    profile("worker", budget=50, workers=workers)
+    options = database.pool_options(QueuePool, engines)
+
+    per_engine = options["pool_size"] + options["max_overflow"]
+    assert per_engine == max(2, 50 // (workers * engines))
+    assert options["max_overflow"] == per_engine // 3
+    if per_engine > 2:
+        # Every worker at full overflow stays within the container's budget
+        assert workers * engines * per_engine <= 50
+
+def test_worker_profile_keeps_two_connections_per_engine(profile):
+    profile("worker", budget=4, workers=8)
+    options = database.pool_options(QueuePool)
+    assert (options["pool_size"], options["max_overflow"]) == (2, 0)
+
+def test_fixed_and_external_profiles(profile, tmp_path):
+    profile("fixed", workers=8)
+    options = database.pool_options(QueuePool)
+    assert (options["pool_size"], options["max_overflow"]) == (20, 10)
+
+    profile("external")
+    options = database.pool_options(QueuePool)
+    assert options["poolclass"] is NullPool
+    engine = create_engine(f"sqlite:///{tmp_path / 'external.db'}", **options)
+    assert database.pool_capacity(engine) is None
+
+def test_pool_capacity_is_what_the_options_allow(profile, tmp_path):
+    profile("worker", budget=40, workers=2)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pooled.db'}", **database.pool_options(QueuePool))
+    assert database.pool_capacity(engine) == 20
+
+def test_unknown_profile_is_rejected(profile):
+    profile("unbounded")
+    with pytest.raises(ValueError, match="DB_POOL_PROFILE"):
+        database.pool_options(QueuePool)
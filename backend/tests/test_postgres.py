@@ -0,0 +1,98 @@
+"""
+The PostgreSQL-only paths: partitioning quiz_responses by event and
+detaching an archived event's partition. Set TEST_POSTGRES_URL to a scratch
+database (its public schema is dropped and recreated), e.g.
+postgresql+psycopg2://postgres@localhost/brainspark_test
+"""
+
+import os
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+from app import crud, models
+from app.database import Base
+from app.migrations import _is_partitioned, _partition_quiz_responses, migrate
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+@pytest.fixture
+def engine():
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    yield engine
+    engine.dispose()
+
+def add_participant(conn, event_id: int, participant_id: int, responses: int = 10):
+    conn.execute(insert(models.Participant), [{
+        "id": participant_id,
+        "event_id": event_id,
+        "full_name": f"Participant {participant_id}",
+        "contact_number": "9999999999",
+        "email": f"participant{participant_id}@example.com",
+        "school_college": "Test School",
+        "application_number": f"APP{participant_id}",
+    }])
+    conn.execute(insert(models.QuizResponse), [
+        {"event_id": event_id, "participant_id": participant_id, "question_number": n, "selected_answer": "A",
+         "time_taken": 3, "is_correct": True}
+        for n in range(1, responses + 1)
+    ])
+
+def partitions(conn):
+    return conn.execute(text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'quiz_responses'::regclass ORDER BY 1"
+    )).scalars().all()
+
+def test_fresh_install_partitions_quiz_responses(engine):
+    migrate(engine)
+    with engine.connect() as conn:
+        assert _is_partitioned(conn, "quiz_responses")
+        assert partitions(conn) == ["quiz_responses_event_1"]
+
+def test_existing_responses_move_into_their_partition(engine):
+    # quiz_responses as created before it was partitioned
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Event), [{"id": 1, "name": "Default event", "is_active": True}])
+        add_participant(conn, 1, 1)
+
+    with engine.begin() as conn:
+        _partition_quiz_responses(conn)
+
+    with engine.begin() as conn:
+        assert _is_partitioned(conn, "quiz_responses")
+        assert conn.execute(text("SELECT count(*) FROM quiz_responses_event_1")).scalar() == 10
+        primary_key = conn.execute(text("""
+            SELECT array_agg(a.attname ORDER BY k.n)
+            FROM pg_constraint c, unnest(c.conkey) WITH ORDINALITY AS k(attnum, n), pg_attribute a
+            WHERE c.conrelid = 'quiz_responses'::regclass AND c.contype = 'p'
+              AND a.attrelid = c.conrelid AND a.attnum = k.attnum
+        """)).scalar()
+        assert primary_key == ["event_id", "id"]
+        # Ids continue from the old table's sequence
+        new_id = conn.execute(text("""
+            INSERT INTO quiz_responses (event_id, participant_id, question_number) VALUES (1, 1, 11) RETURNING id
+        """)).scalar()
+        assert new_id == 11
+
+def test_archive_detaches_the_event_partition(engine):
+    migrate(engine)
+    db = Session(bind=engine)
+    try:
+        event = crud.create_event(db, "Second event")
+        with engine.begin() as conn:
+            add_participant(conn, 1, 1)
+            add_participant(conn, event.id, 2)
+
+        assert crud.archive_event(db, event.id) == f"quiz_responses_event_{event.id}"
+    finally:
+        db.close()
+
+    with engine.connect() as conn:
+        assert partitions(conn) == ["quiz_responses_event_1"]
+        assert conn.execute(text("SELECT count(*) FROM quiz_responses")).scalar() == 10
+        assert conn.execute(text(f"SELECT count(*) FROM quiz_responses_event_{event.id}")).scalar() == 10
@@ -0,0 +1,54 @@
+"""
+Statements each route may run, read from the X-Query-Count header the query
+profiler adds. A change that adds a query to a hot route fails here; raise
+the budget only when the extra statement is intended.
+"""
+
+from tests.conftest import answers, questions
+
+def assert_budget(response, budget: int):
+    assert response.status_code == 200, response.text
+    count = int(response.headers["X-Query-Count"])
+    assert count <= budget, f"{response.request.method} {response.request.url.path} ran {count} statements, budget {budget}"
+
+def submit(client, participant_id: int):
+    return client.post("/api/quiz/submit", json={"participant_id": participant_id, "total_time": 30, "responses": answers("A")})
+
+def test_participant_routes(client, event_id, register):
+    assert_budget(client.post("/api/participants", json={
+        "full_name": "Budget Participant",
+        "contact_number": "9999999999",
+        "email": f"budget{event_id}@example.com",
+        "school_college": "Test School",
+        "application_number": f"BUDGET{event_id}",
+        "event_id": event_id,
+    }), 1)
+
+    client.get("/api/quiz/questions", params={"event_id": event_id})
+    assert_budget(client.get("/api/quiz/questions", params={"event_id": event_id}), 0)
+
+    submit(client, register(event_id))
+    participant_id = register(event_id)
+    assert_budget(submit(client, participant_id), 6)
+    assert_budget(submit(client, participant_id), 1)
+    assert_budget(client.get(f"/api/quiz/rank/{participant_id}"), 0)
+
+def test_admin_routes(client, event_id, register):
+    for _ in range(3):
+        submit(client, register(event_id))
+
+    assert_budget(client.get("/api/admin/leaderboard", params={"event_id": event_id}), 1)
+    assert_budget(client.get("/api/admin/questions/analytics", params={"event_id": event_id}), 2)
+    assert_budget(client.get("/api/results/statistics", params={"event_id": event_id}), 1)
+    assert_budget(client.get("/api/admin/events"), 1)
+
+def test_upload_statements_do_not_grow_with_the_upload(client, event_id):
+    small = client.post("/api/admin/questions/upload", params={"event_id": event_id}, json=questions("B"))
+    assert_budget(small, 4)
+
+    large = questions("C")
+    large["questions"] = [
+        dict(question, question_number=n, text=f"Test question number {n}")
+        for n, question in enumerate(large["questions"] * 20, start=1)
+    ]
+    assert_budget(client.post("/api/admin/questions/upload", params={"event_id": event_id}, json=large), 4)
@@ -0,0 +1,73 @@
+import pytest
+from app.database import SessionLocal
+from app import models
+from app.routers import async_routes, quiz
+
+@pytest.fixture
+def bank_mode(monkeypatch):
+    monkeypatch.setattr(quiz, "QUIZ_MODE", "bank")
+    monkeypatch.setattr(async_routes, "QUIZ_MODE", "bank")
+
+def bank(size: int):
+    """Questions whose right option is labelled "right", in a different place for each"""
+    return {"questions": [
+        {
+            "question_number": n,
+            "text": f"Bank question {n}",
+            **{f"option{i}_text": "right" if i == n % 4 + 1 else f"wrong {i}" for i in range(1, 5)},
+            **{f"option{i}_is_correct": i == n % 4 + 1 for i in range(1, 5)},
+        }
+        for n in range(1, size + 1)
+    ]}
+
+def upload(client, event_id: int, size: int):
+    response = client.post("/api/admin/questions/upload", params={"event_id": event_id}, json=bank(size))
+    assert response.status_code == 200, response.text
+
+def served(client, event_id: int, participant_id: int):
+    response = client.get("/api/quiz/questions", params={"event_id": event_id, "participant_id": participant_id})
+    assert response.status_code == 200, response.text
+    return response.json()["questions"]
+
+def right_answers(questions: list):
+    return [
+        {
+            "question_number": q["question_number"],
+            "selected_answer": next(letter for letter, text in q["options"].items() if text == "right"),
+            "time_taken": 3,
+        }
+        for q in questions
+    ]
+
+def test_served_set_is_stored_and_graded_after_the_bank_changes(client, event_id, register, bank_mode):
+    upload(client, event_id, 30)
+    participants = [register(event_id), register(event_id)]
+    served_sets = {pid: served(client, event_id, pid) for pid in participants}
+    assert all(len(questions) == 10 for questions in served_sets.values())
+
+    # The bank grows: a fresh draw would now pick other questions
+    upload(client, event_id, 60)
+    assert {pid: served(client, event_id, pid) for pid in participants} == served_sets
+
+    for participant_id, questions in served_sets.items():
+        response = client.post("/api/quiz/submit", json={
+            "participant_id": participant_id,
+            "total_time": 30,
+            "responses": right_answers(questions),
+        })
+        assert response.status_code == 200, response.text
+        assert response.json()["score"] == 10
+    # The first submission loaded the new answer key; the stored set came with the participant
+    assert response.headers["X-Grading-Queries"] == "0"
+
+    db = SessionLocal()
+    try:
+        stored = db.get(models.QuestionSet, participants[0])
+        assert [f"Bank question {n}" for n in stored.question_numbers] == [q["text"] for q in served_sets[participants[0]]]
+    finally:
+        db.close()
+
+def test_participant_of_another_event_gets_404(client, event_id, register, bank_mode):
+    other = client.post("/api/admin/events", json={"name": f"Other bank event for {event_id}"}).json()["id"]
+    response = client.get("/api/quiz/questions", params={"event_id": event_id, "participant_id": register(other)})
+    assert response.status_code == 404
@@ -0,0 +1,40 @@
+from app import crud, models
+from app.database import SessionLocal
+from app.question_cache import question_cache
+
+def get_questions(client, event_id: int, **headers):
+    return client.get("/api/quiz/questions", params={"event_id": event_id}, headers=headers)
+
+def test_cached_questions_and_revalidations_run_no_queries(client, event_id):
+    first = get_questions(client, event_id)
+    assert first.status_code == 200
+
+    again = get_questions(client, event_id)
+    assert again.status_code == 200 and again.headers["X-Query-Count"] == "0"
+    revalidated = get_questions(client, event_id, **{"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304 and revalidated.headers["X-Query-Count"] == "0"
+
+def test_upload_in_another_worker_is_served_after_the_ttl(client, event_id, monkeypatch):
+    before = get_questions(client, event_id)
+
+    # What another worker's upload leaves behind: new questions and a bumped
+    # version, without invalidating this worker's copy
+    db = SessionLocal()
+    try:
+        db.query(models.Question).filter(
+            models.Question.event_id == event_id, models.Question.question_number == 1
+        ).update({models.Question.text: "Uploaded by another worker"})
+        crud.bump_questions_version(db, event_id)
+        db.commit()
+    finally:
+        db.close()
+
+    assert get_questions(client, event_id).content == before.content
+
+    monkeypatch.setattr(question_cache, "ttl", 0)
+    after = get_questions(client, event_id)
+    assert after.json()["questions"][0]["text"] == "Uploaded by another worker"
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+    # Checked again after the TTL, but not reloaded while the version holds
+    assert get_questions(client, event_id).headers["X-Query-Count"] == "1"
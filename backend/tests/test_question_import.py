@@ -0,0 +1,93 @@
+import csv
+import io
+import orjson
+import pytest
+from app import crud
+from tests.conftest import questions
+
+FIELDS = list(questions()["questions"][0])
+
+@pytest.fixture
+def new_event(client):
+    """An event without questions"""
+    response = client.post("/api/admin/events", json={"name": "Import test event"})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def chunked(body: bytes, size: int = 7):
+    """The body as a stream of small chunks that split lines (and UTF-8 characters) apart"""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+def upload(client, event_id: int, body: bytes, content_type: str):
+    return client.post(
+        "/api/admin/questions/upload", params={"event_id": event_id},
+        content=chunked(body), headers={"Content-Type": content_type}
+    )
+
+def ndjson(rows: list):
+    return b"\n".join(orjson.dumps(row) for row in rows) + b"\n"
+
+def served(client, event_id: int):
+    response = client.get("/api/quiz/questions", params={"event_id": event_id})
+    assert response.status_code == 200, response.text
+    return response.json()["questions"]
+
+def test_ndjson_upload_streams_in_batches(client, new_event, monkeypatch):
+    monkeypatch.setattr(crud, "QUESTION_UPSERT_BATCH_SIZE", 4)
+    rows = questions("C")["questions"]
+    rows[0]["text"] = "Première question, avec des accents"
+    body = b"\xef\xbb\xbf" + ndjson(rows[:5]) + b"\n   \n" + ndjson(rows[5:])
+
+    response = upload(client, new_event, body, "application/x-ndjson")
+    assert response.status_code == 200, response.text
+    assert (response.json()["questions_added"], response.json()["questions_updated"]) == (10, 0)
+    assert response.json()["total_questions"] == 10
+    assert served(client, new_event)[0]["text"] == "Première question, avec des accents"
+
+def test_csv_upload_with_quoted_multiline_fields_updates_by_number(client, new_event):
+    assert upload(client, new_event, ndjson(questions("A")["questions"]), "application/x-ndjson").status_code == 200
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS)
+    writer.writeheader()
+    for row in questions("B")["questions"][:3]:
+        writer.writerow({key: str(value).lower() if isinstance(value, bool) else value for key, value in row.items()})
+    writer.writerow(dict(
+        questions("B")["questions"][0], question_number=11,
+        text='A question "quoted", over\ntwo lines', option1_is_correct="false", option2_is_correct="true",
+        option3_is_correct="false", option4_is_correct="false"
+    ))
+
+    response = upload(client, new_event, buffer.getvalue().encode(), "text/csv; charset=utf-8")
+    assert response.status_code == 200, response.text
+    assert (response.json()["questions_added"], response.json()["questions_updated"]) == (1, 3)
+    assert response.json()["total_questions"] == 11
+    assert served(client, new_event)[-1]["text"] == 'A question "quoted", over\ntwo lines'
+
+def test_malformed_ndjson_line_is_422_and_saves_nothing(client, new_event, monkeypatch):
+    monkeypatch.setattr(crud, "QUESTION_UPSERT_BATCH_SIZE", 2)
+    rows = questions("A")["questions"]
+    # Line 4 comes after the first batch has been written
+    body = ndjson(rows[:3]) + b'{"question_number": 4, "text": \n' + ndjson(rows[4:])
+
+    response = upload(client, new_event, body, "application/x-ndjson")
+    assert response.status_code == 422
+    error, = response.json()["detail"]
+    assert error["loc"] == ["body", 4] and error["type"] == "json_invalid"
+    assert served(client, new_event) == []
+
+def test_invalid_csv_field_is_located_by_row_and_field(client, new_event):
+    header = ",".join(FIELDS)
+    good = questions("A")["questions"][0]
+    row = ",".join(str(good[field]).lower() if isinstance(good[field], bool) else str(good[field]) for field in FIELDS)
+    body = f"{header}\n{row}\n{row.replace('Test question number 1', 'Too short', 1)}\n".encode()
+
+    response = upload(client, new_event, body, "text/csv")
+    assert response.status_code == 422
+    error, = response.json()["detail"]
+    assert error["loc"] == ["body", 3, "text"]
+
+    unterminated = upload(client, new_event, f'{header}\n{row}\n1,"never closed\n'.encode(), "text/csv")
+    assert unterminated.status_code == 422
+    assert served(client, new_event) == []
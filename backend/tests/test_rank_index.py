@@ -0,0 +1,59 @@
+import threading
+from app.database import SessionLocal
+from app.rank_index import RankIndex
+from tests.conftest import answers
+
+def submit(client, participant_id: int, letter: str):
+    response = client.post("/api/quiz/submit", json={
+        "participant_id": participant_id,
+        "total_time": 30,
+        "responses": answers(letter),
+    })
+    assert response.status_code == 200, response.text
+
+def test_reload_runs_in_the_background_and_keeps_updates(client, event_id, register):
+    first, second, third = register(event_id), register(event_id), register(event_id)
+    submit(client, first, "B")
+
+    index = RankIndex(ttl=0)
+    db = SessionLocal()
+    try:
+        index.load(db)
+
+        # A written elsewhere: only a reload finds it
+        submit(client, second, "A")
+
+        release = threading.Event()
+        rows = index._rows
+        def slow_rows(session):
+            assert release.wait(5)
+            return rows(session)
+        index._rows = slow_rows
+
+        # The stale index answers while the reload waits on the database
+        assert index.position(db, first)["rank"] == 1
+        assert index._reload_thread.is_alive()
+        index.update(third, event_id, 5, 20)
+
+        release.set()
+        index._reload_thread.join(5)
+        index._rows = rows
+        index.ttl = 60
+
+        assert [entry["participant_id"] for entry in index.top(db, event_id, 10)] == [second, third, first]
+    finally:
+        db.close()
+
+def test_archived_event_leaves_the_index_at_once(client, event_id, register):
+    participant_id = register(event_id)
+    submit(client, participant_id, "A")
+    assert client.get(f"/api/quiz/rank/{participant_id}").status_code == 200
+
+    active = client.get("/api/admin/events").json()["events"]
+    active_id = next(event["id"] for event in active if event["is_active"])
+    if active_id == event_id:
+        other = client.post("/api/admin/events", json={"name": f"Replacement for {event_id}"}).json()["id"]
+        assert client.post(f"/api/admin/events/{other}/activate").status_code == 200
+
+    assert client.post(f"/api/admin/events/{event_id}/archive").status_code == 200
+    assert client.get(f"/api/quiz/rank/{participant_id}").status_code == 404
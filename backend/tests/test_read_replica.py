@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app import events, models
+from app.answer_key import answer_key
+from app.database import Base
+from app.events import EventDirectory
+
+@pytest.fixture
+def lagging_replica(tmp_path, monkeypatch, event_id):
+    """A session on a replica that still sees `event_id` as open, whatever the primary says"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Event), [{"id": event_id, "name": "Replicated event", "is_active": False}])
+    monkeypatch.setattr(events, "is_replica", lambda db: db.get_bind() is engine)
+    db = Session(bind=engine)
+    yield db
+    db.close()
+    engine.dispose()
+
+def test_event_directory_is_filled_from_the_primary(client, event_id, lagging_replica):
+    # Archived on the primary; the replica hasn't caught up
+    assert client.post(f"/api/admin/events/{event_id}/archive").status_code == 200
+
+    directory = EventDirectory()
+    with pytest.raises(HTTPException) as error:
+        directory.resolve(lagging_replica, event_id, open_only=True)
+    assert error.value.status_code == 409
+
+def test_analytics_leave_the_answer_key_alone(client, event_id):
+    answer_key.invalidate(event_id)
+    response = client.get("/api/admin/questions/analytics", params={"event_id": event_id})
+    assert response.status_code == 200, response.text
+    assert [q["question_number"] for q in response.json()["questions"]] == list(range(1, 11))
+    assert event_id not in answer_key._entries
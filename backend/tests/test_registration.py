@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.routers.participants import APPLICATION_NUMBER_TAKEN, EMAIL_TAKEN
+
+def registration(event_id: int, email: str, application_number: str):
+    return {
+        "full_name": "Concurrent Participant",
+        "contact_number": "9999999999",
+        "email": email,
+        "school_college": "Test School",
+        "application_number": application_number,
+        "event_id": event_id,
+    }
+
+def register_concurrently(client, bodies):
+    with ThreadPoolExecutor(max_workers=len(bodies)) as pool:
+        return list(pool.map(lambda body: client.post("/api/participants", json=body), bodies))
+
+def test_concurrent_case_variant_emails_register_once(client, event_id):
+    emails = ["race@example.com", "Race@example.com", "RACE@example.com", "race@EXAMPLE.com"] * 2
+    responses = register_concurrently(client, [
+        registration(event_id, email, f"RACE-{event_id}-{n}") for n, email in enumerate(emails)
+    ])
+
+    assert sorted(r.status_code for r in responses) == [200] + [400] * (len(emails) - 1)
+    assert {r.json()["detail"] for r in responses if r.status_code == 400} == {EMAIL_TAKEN}
+
+def test_concurrent_application_numbers_register_once(client, event_id):
+    responses = register_concurrently(client, [
+        registration(event_id, f"number{n}@example.com", "APP-RACE") for n in range(8)
+    ])
+
+    assert sorted(r.status_code for r in responses) == [200] + [400] * 7
+    assert {r.json()["detail"] for r in responses if r.status_code == 400} == {APPLICATION_NUMBER_TAKEN}
+
+def test_same_email_registers_in_another_event(client, event_id, register):
+    register(event_id, email="shared@example.com")
+    other = client.post("/api/admin/events", json={"name": f"Other event for {event_id}"}).json()["id"]
+    register(other, email="Shared@example.com")
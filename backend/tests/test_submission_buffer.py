@@ -0,0 +1,60 @@
+import orjson
+import pytest
+from app import submission_buffer as buffer_module
+from app.routers import quiz
+from app.submission_buffer import SubmissionBuffer
+from tests.conftest import answers
+
+@pytest.fixture
+def buffer(monkeypatch):
+    """A running buffer that holds submissions until it is stopped"""
+    buffer = SubmissionBuffer(batch_size=1000, linger=30)
+    monkeypatch.setattr(quiz, "SUBMIT_MODE", "buffered")
+    monkeypatch.setattr(quiz, "submission_buffer", buffer)
+    buffer.start()
+    yield buffer
+    buffer.stop()
+
+def submit(client, participant_id: int, key: str, letter: str = "A"):
+    return client.post(
+        "/api/quiz/submit",
+        json={"participant_id": participant_id, "total_time": 30, "responses": answers(letter)},
+        headers={"Idempotency-Key": key}
+    )
+
+def test_retry_while_queued_replays_or_conflicts(client, event_id, register, buffer):
+    participant_id = register(event_id)
+    first = submit(client, participant_id, f"key-{participant_id}")
+    assert first.status_code == 200, first.text
+    assert first.json()["score"] == 10
+
+    # Still queued: the same key replays it, another key is refused
+    retry = submit(client, participant_id, f"key-{participant_id}", "B")
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert submit(client, participant_id, f"other-{participant_id}").status_code == 409
+
+    buffer.stop()
+    assert buffer.flushed_submissions == 1
+    assert buffer.duplicate_submissions == 0
+    assert submit(client, participant_id, f"other-{participant_id}").status_code == 409
+    assert submit(client, participant_id, f"key-{participant_id}").headers["Idempotent-Replayed"] == "true"
+
+def test_unwritable_submission_is_logged_and_spooled(client, event_id, register, buffer, monkeypatch, tmp_path, capsys):
+    spool = tmp_path / "spool.ndjson"
+    monkeypatch.setattr(buffer_module, "SUBMIT_SPOOL_PATH", str(spool))
+
+    def fail(db, submissions):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(buffer_module.crud, "save_quiz_submissions", fail)
+
+    participant_id = register(event_id)
+    assert submit(client, participant_id, f"key-{participant_id}").status_code == 200
+    buffer.stop()
+
+    assert buffer.failed_submissions == 1
+    assert f"Dropped quiz submission for participant {participant_id}" in capsys.readouterr().out
+    spooled = [orjson.loads(line) for line in spool.read_bytes().splitlines()]
+    assert [s["participant_id"] for s in spooled] == [participant_id]
+    assert len(spooled[0]["answers"]) == 10
@@ -1,29 +1,90 @@
+"""
+Reset or archive one event's data, leaving every other event as it is.
+
+Usage (DATABASE_URL from the environment or backend/.env):
+    python clear_data.py --list                     # events and their participant counts
+    python clear_data.py --event-id 3               # delete event 3's participants and results
+    python clear_data.py --event-id 3 --archive     # close event 3 instead, keeping its results
+
+A reset deletes the event's participants with their responses, receipts,
+question sets, scores and leaderboard rows, and keeps the event and its
+questions. Archived events can't be reset: their results are final (on
+PostgreSQL their responses live in the detached table archiving returned).
+Running workers drop the deleted participants from their rank index within
+RANK_INDEX_TTL seconds.
+"""
+
+import argparse
 import os
-from sqlalchemy import create_engine, text
+import sys
+
 from dotenv import load_dotenv
 
-load_dotenv(dotenv_path='backend/.env')
-DATABASE_URL = os.getenv('DATABASE_URL')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+load_dotenv(dotenv_path=os.path.join(BACKEND_DIR, ".env"))
+
+if not os.getenv("DATABASE_URL"):
+    print("Error: DATABASE_URL not found in the environment or backend/.env")
+    sys.exit(1)
+
+# Add the backend directory to path to import app modules
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import func
+from app import crud, models
+from app.database import SessionLocal
 
-if not DATABASE_URL:
-    print("Error: DATABASE_URL not found in backend/.env")
-    exit(1)
 
-def clear_data():
-    engine = create_engine(DATABASE_URL)
-    
+def list_events(db):
+    counts = dict(
+        db.query(models.Participant.event_id, func.count()).group_by(models.Participant.event_id).all()
+    )
+    for event in crud.get_events(db):
+        state = "archived" if event.archived_at else "active" if event.is_active else "open"
+        print(f"{event.id:>4}  {state:<8}  {counts.get(event.id, 0):>6} participants  {event.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--list", action="store_true", help="list the events and their participant counts")
+    parser.add_argument("--event-id", type=int, help="the event to reset or archive")
+    parser.add_argument("--archive", action="store_true", help="archive the event instead of deleting its data")
+    parser.add_argument("--yes", action="store_true", help="don't ask for confirmation")
+    args = parser.parse_args()
+
+    db = SessionLocal()
     try:
-        with engine.connect() as connection:
-            print("Clearing data from tables...")
-            
-            # Using TRUNCATE with CASCADE is efficient for PostgreSQL
-            # It deletes all rows from the specified tables and recursively from tables that have foreign keys referencing them.
-            connection.execute(text("TRUNCATE TABLE participants CASCADE;"))
-            
-            connection.commit()
-            print("Data successfully cleared from participants, leaderboard, and quiz_responses.")
-    except Exception as e:
-        print(f"Failed to clear data: {e}")
+        if args.list or args.event_id is None:
+            list_events(db)
+            if args.event_id is None and not args.list:
+                print("Pass --event-id to reset (or --archive) one of these events")
+            return
+
+        event = crud.get_event(db, args.event_id)
+        if event is None:
+            print(f"Error: event {args.event_id} not found")
+            sys.exit(1)
+        if event.archived_at is not None:
+            print(f"Error: event {event.id} ({event.name}) is archived; its results are kept as they are")
+            sys.exit(1)
+        if args.archive and event.is_active:
+            print(f"Error: event {event.id} ({event.name}) is active; activate another event before archiving it")
+            sys.exit(1)
+
+        action = "Archive" if args.archive else "Delete all participants and results of"
+        if not args.yes and input(f"{action} event {event.id} ({event.name})? Type its id to confirm: ") != str(event.id):
+            print("Cancelled")
+            return
+
+        if args.archive:
+            archived_table = crud.archive_event(db, event.id)
+            print(f"✓ Archived event {event.id}" + (f"; its responses are in {archived_table}" if archived_table else ""))
+        else:
+            deleted = crud.reset_event(db, event.id)
+            print(f"✓ Deleted {deleted} participants and their results from event {event.id}")
+    finally:
+        db.close()
+
 
 if __name__ == "__main__":
-    clear_data()
+    main()
@@ -33,7 +33,7 @@ function Quiz() {
         const fetchQuestions = async () => {
             try {
                 console.log('Fetching questions from API...');
-                const data = await getQuestions();
+                const data = await getQuestions(participantId, safeSessionStorage.getItem('eventId'));
                 console.log('Questions received:', data);
                 console.log('Number of questions:', data.questions?.length);
 
@@ -76,6 +76,7 @@ function RegistrationForm() {
 
             // Store participant data safely
             safeSessionStorage.setItem('participantId', response.participant_id);
+            safeSessionStorage.setItem('eventId', response.event_id);
             safeSessionStorage.setItem('participantName', formData.full_name);
             console.log('Storage updated safely');
             console.log('Navigating to /quiz...');
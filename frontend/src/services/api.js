@@ -16,8 +16,14 @@ export const registerParticipant = async (data) => {
 };
 
 // Quiz API
-export const getQuestions = async () => {
-  const response = await api.get('/api/quiz/questions');
+// participantId selects the participant's own question set when the
+// backend runs in question-bank mode (ignored otherwise); eventId is the
+// event the participant registered for (default: the active event)
+export const getQuestions = async (participantId, eventId) => {
+  const params = {};
+  if (participantId) params.participant_id = participantId;
+  if (eventId) params.event_id = eventId;
+  const response = await api.get('/api/quiz/questions', { params });
   return response.data;
 };
 